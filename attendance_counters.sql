@@ -0,0 +1,140 @@
+-- Incremental attendance counters on students.
+-- Instead of recomputing every percentage over the whole history
+-- (calculate_percentage.sql), each write to attendance applies its delta.
+-- Works for mark_attendance upserts, re-uploads that change a status, and deletes.
+
+-- 1. Counter columns
+ALTER TABLE students ADD COLUMN IF NOT EXISTS attendance_percentage DECIMAL(5,2);
+ALTER TABLE students ADD COLUMN IF NOT EXISTS total_sessions INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE students ADD COLUMN IF NOT EXISTS present_sessions INTEGER NOT NULL DEFAULT 0;
+
+-- Present + OD + Late = Present for percentage purposes
+CREATE OR REPLACE FUNCTION attendance_is_present(status TEXT) RETURNS INTEGER AS $$
+    SELECT CASE WHEN status IN ('Present', 'OD', 'Late') THEN 1 ELSE 0 END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION attendance_percentage_of(present INTEGER, total INTEGER) RETURNS DECIMAL(5,2) AS $$
+    SELECT CASE WHEN total > 0 THEN ROUND(present::decimal * 100 / total, 2) ELSE 0 END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 2. Statement-level triggers: one UPDATE per statement, touching only the
+--    students whose rows changed (O(changed rows), not O(history)).
+CREATE OR REPLACE FUNCTION attendance_counters_on_insert() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE students s
+    SET total_sessions = s.total_sessions + d.total,
+        present_sessions = s.present_sessions + d.present,
+        attendance_percentage = attendance_percentage_of(s.present_sessions + d.present, s.total_sessions + d.total)
+    FROM (
+        SELECT student_id, COUNT(*)::INTEGER AS total, SUM(attendance_is_present(status))::INTEGER AS present
+        FROM new_rows
+        GROUP BY student_id
+    ) d
+    WHERE s.id = d.student_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Upserts that hit an existing (student_id, date, session) land here, so a
+-- re-upload that flips Absent -> Present moves present_sessions by +1 while
+-- total_sessions stays the same. Unchanged rows cancel out.
+CREATE OR REPLACE FUNCTION attendance_counters_on_update() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE students s
+    SET total_sessions = s.total_sessions + d.total,
+        present_sessions = s.present_sessions + d.present,
+        attendance_percentage = attendance_percentage_of(s.present_sessions + d.present, s.total_sessions + d.total)
+    FROM (
+        SELECT student_id, SUM(total)::INTEGER AS total, SUM(present)::INTEGER AS present
+        FROM (
+            SELECT student_id, 1 AS total, attendance_is_present(status) AS present FROM new_rows
+            UNION ALL
+            SELECT student_id, -1, -attendance_is_present(status) FROM old_rows
+        ) changes
+        GROUP BY student_id
+        HAVING SUM(total) <> 0 OR SUM(present) <> 0
+    ) d
+    WHERE s.id = d.student_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION attendance_counters_on_delete() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE students s
+    SET total_sessions = s.total_sessions - d.total,
+        present_sessions = s.present_sessions - d.present,
+        attendance_percentage = attendance_percentage_of(s.present_sessions - d.present, s.total_sessions - d.total)
+    FROM (
+        SELECT student_id, COUNT(*)::INTEGER AS total, SUM(attendance_is_present(status))::INTEGER AS present
+        FROM old_rows
+        GROUP BY student_id
+    ) d
+    WHERE s.id = d.student_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS attendance_counters_insert ON attendance;
+DROP TRIGGER IF EXISTS attendance_counters_update ON attendance;
+DROP TRIGGER IF EXISTS attendance_counters_delete ON attendance;
+
+CREATE TRIGGER attendance_counters_insert
+    AFTER INSERT ON attendance REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION attendance_counters_on_insert();
+
+CREATE TRIGGER attendance_counters_update
+    AFTER UPDATE ON attendance REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION attendance_counters_on_update();
+
+CREATE TRIGGER attendance_counters_delete
+    AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION attendance_counters_on_delete();
+
+-- 3. Full recompute (one-time backfill, or repair after verify finds drift)
+CREATE OR REPLACE FUNCTION rebuild_attendance_counters() RETURNS INTEGER AS $$
+    WITH stats AS (
+        SELECT
+            s.id as student_id,
+            COUNT(a.id) as total,
+            COALESCE(SUM(attendance_is_present(a.status)), 0) as present_count
+        FROM students s
+        LEFT JOIN attendance a ON s.id = a.student_id
+        GROUP BY s.id
+    ), updated AS (
+        UPDATE students
+        SET total_sessions = stats.total,
+            present_sessions = stats.present_count,
+            attendance_percentage = attendance_percentage_of(stats.present_count::INTEGER, stats.total::INTEGER)
+        FROM stats
+        WHERE students.id = stats.student_id
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM updated;
+$$ LANGUAGE sql;
+
+-- 4. Verification: students whose counters disagree with a full recompute
+CREATE OR REPLACE FUNCTION verify_attendance_counters()
+RETURNS TABLE (
+    student_id UUID,
+    register_number TEXT,
+    stored_total INTEGER,
+    actual_total INTEGER,
+    stored_present INTEGER,
+    actual_present INTEGER
+) AS $$
+    SELECT
+        s.id,
+        s.register_number,
+        s.total_sessions,
+        COUNT(a.id)::INTEGER,
+        s.present_sessions,
+        COALESCE(SUM(attendance_is_present(a.status)), 0)::INTEGER
+    FROM students s
+    LEFT JOIN attendance a ON s.id = a.student_id
+    GROUP BY s.id, s.register_number, s.total_sessions, s.present_sessions
+    HAVING s.total_sessions <> COUNT(a.id)
+        OR s.present_sessions <> COALESCE(SUM(attendance_is_present(a.status)), 0);
+$$ LANGUAGE sql STABLE;
+
+SELECT rebuild_attendance_counters();
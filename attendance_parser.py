@@ -0,0 +1,160 @@
+import io
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+
+from metrics import timed
+
+# REGEX PATTERNS (compiled once per process)
+
+# Date: Matches DD Jan YYYY or DD-MM-YYYY
+# Example: 31 Jan 2026
+DATE_RE = re.compile(r"(\d{1,2})[\s\.\-\/]+([A-Za-z]{3,9})[\s\.\-\/]+(\d{4})", re.IGNORECASE)
+
+# Session: Morning or Afternoon
+SESSION_RE = re.compile(r"(Morning|Afternoon)", re.IGNORECASE)
+
+# Section: AD-A, AD-B, Section A, Section B
+SECTION_RE = re.compile(r"(AD|Section)[\s-]*([AB])", re.IGNORECASE)
+
+# Category headers, checked in this priority order
+ABSENT_RE = re.compile(r"(Absentees|Absent)", re.IGNORECASE)
+OD_RE = re.compile(r"(OD|On Duty)", re.IGNORECASE)
+LATE_RE = re.compile(r"(Late|Late comers)", re.IGNORECASE)
+
+# One scan that tells us whether a line can be a header at all.
+# Most lines are "59. Name" and fail this, skipping the three checks above.
+HEADER_HINT_RE = re.compile(r"absent|od|on duty|late", re.IGNORECASE)
+
+# Register number at the start of a line: "59." or "59 Name"
+STUDENT_RE = re.compile(r"\d+")
+
+# Metadata may be split over line breaks (e.g. "31 Jan" / "2026").
+# While metadata is still missing we keep the previous lines holding this many
+# tokens (a date has three), plus any separator-only lines between them.
+CARRY_LINES = 2
+SEPARATOR_ONLY_RE = re.compile(r"[\s\.\-\/]+")
+
+
+@lru_cache(maxsize=1024)
+def _iso_date(day: str, month_str: str, year: str):
+    try:
+        # Handle standard 3-letter months
+        date_obj = datetime.strptime(f"{day}-{month_str[:3]}-{year}", "%d-%b-%Y")
+        return date_obj.strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def _iter_lines(source):
+    """
+    Accepts a string, a file-like object or any iterable of lines.
+    """
+    if isinstance(source, str):
+        return io.StringIO(source)
+    return source
+
+
+@timed("parse.attendance_text")
+def parse_attendance_text(source):
+    """
+    Parses attendance text using REGEX (Rule-based) in a single pass.
+
+    `source` can be the full message as a string, a file-like stream or an
+    iterator of lines. Returns {"date", "session", "section", "records"}.
+    Date, session and section are the first matches in the text, exactly as
+    with the old global searches, including matches split over line breaks.
+    """
+    data = {
+        "date": None,
+        "session": None,
+        "section": None,
+        "records": []
+    }
+    records = data["records"]
+
+    # Only the first date match counts, even if it is not a valid date
+    date_found = session_found = section_found = False
+    carry = []
+    carry_tokens = 0
+
+    active_status = None  # None means we haven't hit a header yet
+
+    for line in _iter_lines(source):
+        line_clean = line.strip()
+        if not line_clean:
+            continue
+
+        # METADATA (until all three are found)
+        if not (date_found and session_found and section_found):
+            window = "\n".join(carry) + "\n" + line_clean if carry else line_clean
+
+            if not date_found:
+                date_match = DATE_RE.search(window)
+                if date_match:
+                    date_found = True
+                    data["date"] = _iso_date(*date_match.groups())
+
+            if not session_found:
+                session_match = SESSION_RE.search(window)
+                if session_match:
+                    session_found = True
+                    # Standardize case
+                    sess = session_match.group(1).lower()
+                    data["session"] = "Morning" if "morning" in sess else "Afternoon"
+
+            if not section_found:
+                section_match = SECTION_RE.search(window)
+                if section_match:
+                    section_found = True
+                    data["section"] = section_match.group(2).upper()
+
+            carry.append(line_clean)
+            if not SEPARATOR_ONLY_RE.fullmatch(line_clean):
+                carry_tokens += 1
+                while carry_tokens > CARRY_LINES:
+                    if not SEPARATOR_ONLY_RE.fullmatch(carry.pop(0)):
+                        carry_tokens -= 1
+                # Nothing can start on a separator-only line
+                while SEPARATOR_ONLY_RE.fullmatch(carry[0]):
+                    carry.pop(0)
+
+        # RECORDS
+        # Check for Headers
+        if HEADER_HINT_RE.search(line_clean):
+            if ABSENT_RE.search(line_clean):
+                active_status = "Absent"
+                continue
+            elif OD_RE.search(line_clean):
+                active_status = "OD"
+                continue
+            elif LATE_RE.search(line_clean):
+                active_status = "Late"
+                continue
+
+        if "Present" in line_clean or "Total" in line_clean:
+            active_status = None  # Reset if we hit summary lines
+            continue
+
+        if active_status:
+            student_match = STUDENT_RE.match(line_clean)
+            if student_match:
+                records.append({
+                    "register_number": student_match.group(0),
+                    "status": active_status
+                })
+
+    return data
+
+
+def parse_many(texts, workers: int = None, chunksize: int = 64):
+    """
+    Parses many attendance messages, returning one dict per message in order.
+    With `workers` > 1 the messages (strings) are spread over a process pool,
+    which pays off for large backlogs such as a whole term's messages.
+    """
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(parse_attendance_text, texts, chunksize=chunksize))
+    return [parse_attendance_text(text) for text in texts]
@@ -0,0 +1,209 @@
+-- Indexed, monthly partitioned attendance table.
+-- Run after schema.sql (and attendance_counters.sql / attendance_rollup.sql if
+-- you use them). Safe to re-run:
+-- an attendance table that is already partitioned is left as it is.
+--
+-- What the app reads, and the index that serves it:
+--   View Records pages     date range + section, ORDER BY date DESC, session DESC, student_id DESC
+--                          -> attendance_keyset_idx (keyset cursor order); later pages
+--                             through attendance_page_after(), one range scan
+--   mark_attendance diff   date + session + section
+--                          -> same index, then students by id
+--   roster fetch           students WHERE section IN (...)
+--                          -> students_section_idx (covering: no heap access)
+--   "who was absent on..." status + date range
+--                          -> attendance_status_date_idx (partial: Present is ~85% of rows)
+--   per-student history    student_id (+ date)
+--                          -> the UNIQUE (student_id, date, session) index
+-- Partitions by month mean date-range queries only touch the months they need,
+-- and old terms can be detached or archived without a table-wide DELETE.
+
+-- 1. Students: section lookups return everything the roster needs from the index
+CREATE INDEX IF NOT EXISTS students_section_idx
+    ON students (section) INCLUDE (id, register_number, full_name);
+
+-- 2. Partition management
+CREATE OR REPLACE FUNCTION attendance_partition_name(month DATE) RETURNS TEXT AS $$
+    SELECT 'attendance_' || to_char(date_trunc('month', month), 'YYYY_MM');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Creates the partition holding `month` if it doesn't exist yet. Rows for that
+-- month that landed in the default partition are moved into it. They are moved
+-- partition-to-partition, so the statement triggers on attendance don't fire
+-- and the counters on students stay as they are.
+CREATE OR REPLACE FUNCTION create_attendance_partition(month DATE) RETURNS TEXT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', month)::DATE;
+    month_end DATE := (date_trunc('month', month) + INTERVAL '1 month')::DATE;
+    partition_name TEXT := attendance_partition_name(month);
+    has_default BOOLEAN := to_regclass('attendance_default') IS NOT NULL;
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN partition_name;
+    END IF;
+
+    IF has_default THEN
+        CREATE TEMP TABLE attendance_moving ON COMMIT DROP AS
+            SELECT * FROM attendance_default WHERE false;
+        WITH moved AS (
+            DELETE FROM attendance_default
+            WHERE date >= month_start AND date < month_end
+            RETURNING *
+        )
+        INSERT INTO attendance_moving SELECT * FROM moved;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF attendance FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start, month_end
+    );
+
+    IF has_default THEN
+        EXECUTE format('INSERT INTO %I SELECT * FROM attendance_moving', partition_name);
+        DROP TABLE attendance_moving;
+    END IF;
+
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Makes sure every month from `from_month` to `to_month` has a partition.
+-- Schedule it monthly (e.g. pg_cron) to keep a few months ahead of today.
+CREATE OR REPLACE FUNCTION ensure_attendance_partitions(
+    from_month DATE DEFAULT date_trunc('month', now())::DATE,
+    to_month DATE DEFAULT (date_trunc('month', now()) + INTERVAL '6 months')::DATE
+) RETURNS INTEGER AS $$
+DECLARE
+    month DATE := date_trunc('month', from_month)::DATE;
+    created INTEGER := 0;
+BEGIN
+    WHILE month <= to_month LOOP
+        IF to_regclass(attendance_partition_name(month)) IS NULL THEN
+            PERFORM create_attendance_partition(month);
+            created := created + 1;
+        END IF;
+        month := (month + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 3. Migration from the plain table (one transaction; writers wait on the lock)
+DO $$
+DECLARE
+    first_month DATE;
+    last_month DATE;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.oid = to_regclass('attendance')
+    ) THEN
+        RAISE NOTICE 'attendance is already partitioned';
+        RETURN;
+    END IF;
+
+    LOCK TABLE attendance IN EXCLUSIVE MODE;
+
+    -- The primary key must contain the partition key, hence (id, date).
+    -- UNIQUE (student_id, date, session) already does, so upserts keep working.
+    CREATE TABLE attendance_partitioned (
+        id UUID DEFAULT gen_random_uuid() NOT NULL,
+        student_id UUID REFERENCES students(id) ON DELETE CASCADE,
+        date DATE NOT NULL,
+        session TEXT NOT NULL CHECK (session IN ('Morning', 'Afternoon')),
+        status TEXT NOT NULL CHECK (status IN ('Present', 'Absent', 'OD', 'Late')),
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+        PRIMARY KEY (id, date),
+        UNIQUE (student_id, date, session)
+    ) PARTITION BY RANGE (date);
+
+    ALTER TABLE attendance RENAME TO attendance_unpartitioned;
+    ALTER TABLE attendance_partitioned RENAME TO attendance;
+
+    -- Catches dates outside every monthly partition, so inserts never fail
+    CREATE TABLE attendance_default PARTITION OF attendance DEFAULT;
+
+    SELECT date_trunc('month', MIN(date))::DATE, date_trunc('month', MAX(date))::DATE
+    INTO first_month, last_month
+    FROM attendance_unpartitioned;
+    PERFORM ensure_attendance_partitions(
+        LEAST(COALESCE(first_month, date_trunc('month', now())::DATE), date_trunc('month', now())::DATE),
+        (GREATEST(COALESCE(last_month, date_trunc('month', now())::DATE), date_trunc('month', now())::DATE)
+            + INTERVAL '6 months')::DATE
+    );
+
+    -- Counter and rollup triggers aren't on the new table yet, so this copy doesn't double count
+    INSERT INTO attendance (id, student_id, date, session, status, created_at)
+    SELECT id, student_id, date, session, status, created_at FROM attendance_unpartitioned;
+
+    ALTER TABLE attendance ENABLE ROW LEVEL SECURITY;
+    CREATE POLICY "Allow anon read/write access" ON attendance FOR ALL USING (true) WITH CHECK (true);
+
+    -- Same counter triggers as attendance_counters.sql, on the new table
+    IF to_regproc('attendance_counters_on_insert') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS attendance_counters_insert ON attendance_unpartitioned;
+        DROP TRIGGER IF EXISTS attendance_counters_update ON attendance_unpartitioned;
+        DROP TRIGGER IF EXISTS attendance_counters_delete ON attendance_unpartitioned;
+
+        CREATE TRIGGER attendance_counters_insert
+            AFTER INSERT ON attendance REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION attendance_counters_on_insert();
+        CREATE TRIGGER attendance_counters_update
+            AFTER UPDATE ON attendance REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION attendance_counters_on_update();
+        CREATE TRIGGER attendance_counters_delete
+            AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION attendance_counters_on_delete();
+    END IF;
+
+    -- Same rollup triggers as attendance_rollup.sql, on the new table
+    IF to_regproc('attendance_rollup_on_insert') IS NOT NULL THEN
+        DROP TRIGGER IF EXISTS attendance_rollup_insert ON attendance_unpartitioned;
+        DROP TRIGGER IF EXISTS attendance_rollup_update ON attendance_unpartitioned;
+        DROP TRIGGER IF EXISTS attendance_rollup_delete ON attendance_unpartitioned;
+
+        CREATE TRIGGER attendance_rollup_insert
+            AFTER INSERT ON attendance REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION attendance_rollup_on_insert();
+        CREATE TRIGGER attendance_rollup_update
+            AFTER UPDATE ON attendance REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION attendance_rollup_on_update();
+        CREATE TRIGGER attendance_rollup_delete
+            AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION attendance_rollup_on_delete();
+    END IF;
+
+    RAISE NOTICE 'attendance partitioned; the old table is kept as attendance_unpartitioned';
+END;
+$$;
+
+-- 4. Indexes (created on every partition, present and future)
+-- Keyset order of View Records; INCLUDE lets the diff read status from the index.
+-- Replaces attendance_date_session_student_idx (date DESC, session, student_id):
+-- with mixed directions the cursor can't be one row comparison.
+DROP INDEX IF EXISTS attendance_date_session_student_idx;
+CREATE INDEX IF NOT EXISTS attendance_keyset_idx
+    ON attendance (date DESC, session DESC, student_id DESC) INCLUDE (status);
+
+-- Non-present rows only: small, and exactly what "who was absent/OD/late" asks for
+CREATE INDEX IF NOT EXISTS attendance_status_date_idx
+    ON attendance (status, date) INCLUDE (student_id, session)
+    WHERE status <> 'Present';
+
+-- 5. Keyset pages: rows after the cursor of View Records (records.py), for
+--    supabase.rpc("attendance_page_after", ...).select(...) with the page's
+--    filters, embed and ORDER BY on top. A single-SELECT SQL function is inlined
+--    into that query, so the row comparison becomes the index scan's start key.
+--    Created after the migration, so SETOF attendance is the partitioned table.
+CREATE OR REPLACE FUNCTION attendance_page_after(after_date DATE, after_session TEXT, after_student_id UUID)
+RETURNS SETOF attendance AS $$
+    SELECT * FROM attendance
+    WHERE (date, session, student_id) < (after_date, after_session, after_student_id);
+$$ LANGUAGE sql STABLE;
+
+ANALYZE students;
+ANALYZE attendance;
+
+-- After checking the app against the new table:
+--   DROP TABLE attendance_unpartitioned;
@@ -0,0 +1,248 @@
+-- Daily attendance rollup per (section, date, session).
+-- Trend charts (View Records -> Trends) read only this table, so a range
+-- query costs O(days x sections) rather than O(attendance rows).
+-- Like attendance_counters.sql, each write to attendance applies its delta,
+-- so mark_attendance keeps it current without any change on the app side.
+-- Run after schema.sql; attendance_partitioning.sql carries the triggers over.
+
+-- 1. Rollup table
+CREATE TABLE IF NOT EXISTS attendance_daily_rollup (
+    section TEXT NOT NULL,
+    date DATE NOT NULL,
+    session TEXT NOT NULL,
+    present INTEGER NOT NULL DEFAULT 0,
+    absent INTEGER NOT NULL DEFAULT 0,
+    od INTEGER NOT NULL DEFAULT 0,
+    late INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL,
+    PRIMARY KEY (section, date, session)
+);
+
+-- "Every section over this range" reads by date first
+CREATE INDEX IF NOT EXISTS attendance_daily_rollup_date_idx ON attendance_daily_rollup (date, section);
+
+-- Adds signed per-status counts to the rollup, creating rows as needed.
+CREATE OR REPLACE FUNCTION apply_attendance_rollup(deltas JSONB) RETURNS VOID AS $$
+    INSERT INTO attendance_daily_rollup AS r (section, date, session, present, absent, od, late)
+    SELECT section, date, session, present, absent, od, late
+    FROM jsonb_to_recordset(deltas)
+        AS d (section TEXT, date DATE, session TEXT, present INTEGER, absent INTEGER, od INTEGER, late INTEGER)
+    ON CONFLICT (section, date, session) DO UPDATE
+    SET present = r.present + EXCLUDED.present,
+        absent = r.absent + EXCLUDED.absent,
+        od = r.od + EXCLUDED.od,
+        late = r.late + EXCLUDED.late,
+        updated_at = timezone('utc'::text, now());
+$$ LANGUAGE sql;
+
+-- 2. Statement-level triggers: one upsert per statement, touching only the
+--    (section, date, session) rows the statement changed.
+--    SECURITY DEFINER: writers of attendance only get read access to the rollup.
+CREATE OR REPLACE FUNCTION attendance_rollup_on_insert() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM apply_attendance_rollup(COALESCE(jsonb_agg(d), '[]'))
+    FROM (
+        SELECT s.section, n.date, n.session,
+               COUNT(*) FILTER (WHERE n.status = 'Present') AS present,
+               COUNT(*) FILTER (WHERE n.status = 'Absent') AS absent,
+               COUNT(*) FILTER (WHERE n.status = 'OD') AS od,
+               COUNT(*) FILTER (WHERE n.status = 'Late') AS late
+        FROM new_rows n
+        JOIN students s ON s.id = n.student_id
+        GROUP BY s.section, n.date, n.session
+    ) d;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Upserts that hit an existing (student_id, date, session) land here, so a
+-- re-upload that flips Absent -> Present moves one count from absent to
+-- present for that day. Unchanged rows cancel out and write nothing.
+CREATE OR REPLACE FUNCTION attendance_rollup_on_update() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM apply_attendance_rollup(COALESCE(jsonb_agg(d), '[]'))
+    FROM (
+        SELECT s.section, c.date, c.session,
+               COALESCE(SUM(c.sign) FILTER (WHERE c.status = 'Present'), 0) AS present,
+               COALESCE(SUM(c.sign) FILTER (WHERE c.status = 'Absent'), 0) AS absent,
+               COALESCE(SUM(c.sign) FILTER (WHERE c.status = 'OD'), 0) AS od,
+               COALESCE(SUM(c.sign) FILTER (WHERE c.status = 'Late'), 0) AS late
+        FROM (
+            SELECT student_id, date, session, status, 1 AS sign FROM new_rows
+            UNION ALL
+            SELECT student_id, date, session, status, -1 FROM old_rows
+        ) c
+        JOIN students s ON s.id = c.student_id
+        GROUP BY s.section, c.date, c.session
+        HAVING SUM(c.sign) FILTER (WHERE c.status = 'Present') <> 0
+            OR SUM(c.sign) FILTER (WHERE c.status = 'Absent') <> 0
+            OR SUM(c.sign) FILTER (WHERE c.status = 'OD') <> 0
+            OR SUM(c.sign) FILTER (WHERE c.status = 'Late') <> 0
+    ) d;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION attendance_rollup_on_delete() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM apply_attendance_rollup(COALESCE(jsonb_agg(d), '[]'))
+    FROM (
+        SELECT s.section, o.date, o.session,
+               -COUNT(*) FILTER (WHERE o.status = 'Present') AS present,
+               -COUNT(*) FILTER (WHERE o.status = 'Absent') AS absent,
+               -COUNT(*) FILTER (WHERE o.status = 'OD') AS od,
+               -COUNT(*) FILTER (WHERE o.status = 'Late') AS late
+        FROM old_rows o
+        JOIN students s ON s.id = o.student_id
+        GROUP BY s.section, o.date, o.session
+    ) d;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS attendance_rollup_insert ON attendance;
+DROP TRIGGER IF EXISTS attendance_rollup_update ON attendance;
+DROP TRIGGER IF EXISTS attendance_rollup_delete ON attendance;
+
+CREATE TRIGGER attendance_rollup_insert
+    AFTER INSERT ON attendance REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION attendance_rollup_on_insert();
+
+CREATE TRIGGER attendance_rollup_update
+    AFTER UPDATE ON attendance REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION attendance_rollup_on_update();
+
+CREATE TRIGGER attendance_rollup_delete
+    AFTER DELETE ON attendance REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION attendance_rollup_on_delete();
+
+-- 3. Students moving section or being deleted. The triggers above look the
+--    section up in students, which is already gone for cascaded deletes and
+--    already changed for moves, so these shift the student's counts first.
+CREATE OR REPLACE FUNCTION attendance_rollup_on_student_change() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM apply_attendance_rollup(COALESCE(jsonb_agg(d), '[]'))
+    FROM (
+        SELECT OLD.section AS section, date, session,
+               -COUNT(*) FILTER (WHERE status = 'Present') AS present,
+               -COUNT(*) FILTER (WHERE status = 'Absent') AS absent,
+               -COUNT(*) FILTER (WHERE status = 'OD') AS od,
+               -COUNT(*) FILTER (WHERE status = 'Late') AS late
+        FROM attendance WHERE student_id = OLD.id
+        GROUP BY date, session
+    ) d;
+
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+
+    PERFORM apply_attendance_rollup(COALESCE(jsonb_agg(d), '[]'))
+    FROM (
+        SELECT NEW.section AS section, date, session,
+               COUNT(*) FILTER (WHERE status = 'Present') AS present,
+               COUNT(*) FILTER (WHERE status = 'Absent') AS absent,
+               COUNT(*) FILTER (WHERE status = 'OD') AS od,
+               COUNT(*) FILTER (WHERE status = 'Late') AS late
+        FROM attendance WHERE student_id = NEW.id
+        GROUP BY date, session
+    ) d;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS attendance_rollup_student_section ON students;
+DROP TRIGGER IF EXISTS attendance_rollup_student_delete ON students;
+
+CREATE TRIGGER attendance_rollup_student_section
+    AFTER UPDATE OF section ON students
+    FOR EACH ROW WHEN (OLD.section IS DISTINCT FROM NEW.section)
+    EXECUTE FUNCTION attendance_rollup_on_student_change();
+
+-- BEFORE, so the student's attendance rows still exist to be counted
+CREATE TRIGGER attendance_rollup_student_delete
+    BEFORE DELETE ON students
+    FOR EACH ROW EXECUTE FUNCTION attendance_rollup_on_student_change();
+
+-- 4. Full recompute (one-time backfill, or repair after verify finds drift).
+--    SECURITY DEFINER like the triggers, since RLS leaves the rollup read-only,
+--    but only the service role may call it (see the REVOKE below):
+--    scripts/verify_rollup.py --repair runs with the service role key.
+--    TRUNCATE, not an unqualified DELETE, which PostgREST's safeupdate rejects.
+CREATE OR REPLACE FUNCTION rebuild_attendance_rollup() RETURNS INTEGER AS $$
+DECLARE
+    written INTEGER;
+BEGIN
+    TRUNCATE attendance_daily_rollup;
+    INSERT INTO attendance_daily_rollup (section, date, session, present, absent, od, late)
+    SELECT s.section, a.date, a.session,
+           COUNT(*) FILTER (WHERE a.status = 'Present'),
+           COUNT(*) FILTER (WHERE a.status = 'Absent'),
+           COUNT(*) FILTER (WHERE a.status = 'OD'),
+           COUNT(*) FILTER (WHERE a.status = 'Late')
+    FROM attendance a
+    JOIN students s ON s.id = a.student_id
+    GROUP BY s.section, a.date, a.session;
+    GET DIAGNOSTICS written = ROW_COUNT;
+    RETURN written;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Functions are executable by PUBLIC by default, and Supabase also grants anon
+-- and authenticated explicitly; a full rebuild is not for app clients
+REVOKE EXECUTE ON FUNCTION rebuild_attendance_rollup() FROM PUBLIC;
+DO $$
+DECLARE
+    client_role TEXT;
+BEGIN
+    FOREACH client_role IN ARRAY ARRAY['anon', 'authenticated'] LOOP
+        IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = client_role) THEN
+            EXECUTE format('REVOKE EXECUTE ON FUNCTION rebuild_attendance_rollup() FROM %I', client_role);
+        END IF;
+    END LOOP;
+    IF EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'service_role') THEN
+        GRANT EXECUTE ON FUNCTION rebuild_attendance_rollup() TO service_role;
+    END IF;
+END;
+$$;
+
+-- 5. Verification: rollup rows that disagree with a full recompute
+--    (rows emptied by deletes count as zero, not as drift)
+CREATE OR REPLACE FUNCTION verify_attendance_rollup()
+RETURNS TABLE (
+    section TEXT,
+    date DATE,
+    session TEXT,
+    stored INTEGER[],
+    actual INTEGER[]
+) AS $$
+    WITH actual AS (
+        SELECT s.section, a.date, a.session, ARRAY[
+            COUNT(*) FILTER (WHERE a.status = 'Present'),
+            COUNT(*) FILTER (WHERE a.status = 'Absent'),
+            COUNT(*) FILTER (WHERE a.status = 'OD'),
+            COUNT(*) FILTER (WHERE a.status = 'Late')
+        ]::INTEGER[] AS counts
+        FROM attendance a
+        JOIN students s ON s.id = a.student_id
+        GROUP BY s.section, a.date, a.session
+    ), stored AS (
+        SELECT section, date, session, ARRAY[present, absent, od, late] AS counts
+        FROM attendance_daily_rollup
+    )
+    SELECT
+        COALESCE(st.section, ac.section),
+        COALESCE(st.date, ac.date),
+        COALESCE(st.session, ac.session),
+        COALESCE(st.counts, ARRAY[0, 0, 0, 0]),
+        COALESCE(ac.counts, ARRAY[0, 0, 0, 0])
+    FROM stored st
+    FULL JOIN actual ac ON ac.section = st.section AND ac.date = st.date AND ac.session = st.session
+    WHERE COALESCE(st.counts, ARRAY[0, 0, 0, 0]) <> COALESCE(ac.counts, ARRAY[0, 0, 0, 0]);
+$$ LANGUAGE sql STABLE;
+
+-- Read-only for the app; only the triggers above write to it
+ALTER TABLE attendance_daily_rollup ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow anon read access" ON attendance_daily_rollup;
+CREATE POLICY "Allow anon read access" ON attendance_daily_rollup FOR SELECT USING (true);
+
+SELECT rebuild_attendance_rollup();
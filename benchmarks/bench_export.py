@@ -0,0 +1,139 @@
+"""
+Benchmark: streaming Parquet/CSV export vs the old in-memory CSV download.
+
+    python benchmarks/bench_export.py --rows 1000000
+
+Each variant runs in its own subprocess so peak RSS is measured in isolation:
+  legacy_csv      all rows as dicts -> DataFrame -> df.to_csv().encode()
+  stream_csv      export.write_csv, one page at a time
+  stream_parquet  export.write_parquet, one page at a time
+Pages come from a synthetic generator shaped like the Supabase response, so
+the numbers measure the export pipeline and not the database.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import FIRST_NAMES, LAST_NAMES
+
+VARIANTS = ("legacy_csv", "stream_csv", "stream_parquet")
+
+
+def synthetic_pages(rows: int, students: int = 2000, page_size: int = 999, seed: int = 42):
+    """
+    Yields pages of attendance rows with an embedded student, like records.fetch_attendance_page.
+    """
+    rng = random.Random(seed)
+    people = [
+        {"register_number": str(i + 1), "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+         "section": "A" if i < students // 2 else "B"}
+        for i in range(students)
+    ]
+    status_choices = ["Present"] * 85 + ["Absent"] * 8 + ["OD"] * 4 + ["Late"] * 3
+    start = date(2025, 7, 1)
+    page = []
+    for i in range(rows):
+        slot = i // students
+        page.append({
+            "date": (start + timedelta(days=slot // 2)).isoformat(),
+            "session": "Morning" if slot % 2 == 0 else "Afternoon",
+            "status": rng.choice(status_choices),
+            "student_id": f"s{i % students}",
+            "students": people[i % students],
+        })
+        if len(page) == page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_variant(variant: str, rows: int):
+    import pandas as pd
+    from export import records_to_batch, write_csv, write_parquet
+    from records import to_display_rows
+
+    baseline_mb = _peak_rss_mb()
+    sink = io.BytesIO() if variant == "legacy_csv" else open(os.devnull, "wb")
+    start = time.perf_counter()
+
+    if variant == "legacy_csv":
+        data = []
+        for page in synthetic_pages(rows):
+            data.extend(to_display_rows(page))
+        sink.write(pd.DataFrame(data).to_csv(index=False).encode("utf-8"))
+        size = sink.tell()
+    else:
+        batches = (records_to_batch(page) for page in synthetic_pages(rows))
+        # Count bytes without keeping them: the real export spools to a temp file
+        counter = _CountingSink(sink)
+        (write_csv if variant == "stream_csv" else write_parquet)(batches, counter)
+        size = counter.written
+
+    elapsed = time.perf_counter() - start
+    sink.close()
+    return {
+        "variant": variant,
+        "seconds": round(elapsed, 2),
+        "rows_per_s": round(rows / elapsed),
+        "output_mb": round(size / 1e6, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_growth_mb": round(_peak_rss_mb() - baseline_mb, 1),
+    }
+
+
+class _CountingSink(io.RawIOBase):
+    def __init__(self, inner):
+        self.inner = inner
+        self.written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.written += len(data)
+        return self.inner.write(data)
+
+    def tell(self):
+        return self.written
+
+
+def run(rows: int = 1_000_000, variants=VARIANTS):
+    results = []
+    for variant in variants:
+        # Fresh interpreter per variant: ru_maxrss never goes down
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--rows", str(rows), "--variant", variant],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output))
+    by_name = {r["variant"]: r for r in results}
+    return {
+        "benchmark": "export",
+        "rows": rows,
+        **{f"{name}_{key}": value for name, r in by_name.items() for key, value in r.items() if key != "variant"},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--variant", choices=VARIANTS, help="run a single variant in this process")
+    args = parser.parse_args()
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.rows)))
+    else:
+        print(json.dumps(run(args.rows), indent=2))
@@ -0,0 +1,116 @@
+"""
+Benchmark: OCR upload payload size and end-to-end latency with and without
+image preprocessing (grayscale, margin trim, downscale, JPEG re-encode).
+
+    python benchmarks/bench_image_prep.py                       # synthetic screenshots, local stub
+    python benchmarks/bench_image_prep.py --corpus ~/screenshots --upload-bps 250000
+
+Against the stub, latency is a fixed delay plus upload time at --upload-bps,
+which is what dominates on a phone hotspot. Pass --url/--api-key to measure the
+real OCR Space API instead.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr
+from benchmarks.ocr_stub_server import start_stub_server
+from benchmarks.synthetic import attendance_messages
+from image_prep import PREP_OPTIONS, preprocess_image
+
+
+def synthetic_screenshots(count: int = 6, width: int = 1440, height: int = 3120):
+    """
+    Phone-sized PNG screenshots of chat bubbles with attendance text and some colour noise.
+    """
+    shots = []
+    for i, message in enumerate(attendance_messages(count)):
+        # Noisy photo wallpaper behind the chat, which is what makes real screenshots several MB
+        noise = Image.effect_noise((width, height), 30 + i)
+        img = Image.merge("RGB", (noise.point(lambda v: v * 0.6 + 90), noise.point(lambda v: v * 0.5 + 100), noise))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle([0, 0, width, 180], fill=(7, 94, 84))  # app bar
+        top = 300
+        draw.rounded_rectangle([80, top, width - 200, top + 60 * (message.count("\n") + 2)], 30, fill=(220, 248, 198))
+        for line_no, line in enumerate(message.split("\n")):
+            draw.text((120, top + 30 + line_no * 60), line, fill=(20, 20, 20), font_size=44)
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        shots.append((buffer.getvalue(), f"shot{i}.png", "image/png"))
+    return shots
+
+
+def load_corpus(directory: str):
+    shots = []
+    for path in sorted(glob.glob(os.path.join(directory, "*"))):
+        extension = os.path.splitext(path)[1].lower()
+        if extension in (".png", ".jpg", ".jpeg"):
+            with open(path, "rb") as f:
+                mime = "image/png" if extension == ".png" else "image/jpeg"
+                shots.append((f.read(), os.path.basename(path), mime))
+    return shots
+
+
+def _ocr_all(shots, url, api_key, prep):
+    ocr.get_ocr_cache().clear()
+    start = time.perf_counter()
+    for image_bytes, name, mime in shots:
+        # Unique suffix defeats the cache without changing what gets uploaded
+        ocr.extract_text(image_bytes, name, mime, api_key, url=url, prep=prep,
+                         options={**ocr.OCR_OPTIONS, "bench": time.time_ns()})
+    return (time.perf_counter() - start) / len(shots)
+
+
+def run(shots, url=None, api_key="stub-key", upload_bps=250_000, delay=0.3, quality=PREP_OPTIONS["quality"],
+        max_width=PREP_OPTIONS["max_width"]):
+    prep = {**PREP_OPTIONS, "quality": quality, "max_width": max_width}
+
+    start = time.perf_counter()
+    processed = [preprocess_image(image_bytes, **prep)[0] for image_bytes, _, _ in shots]
+    prep_ms = (time.perf_counter() - start) * 1000 / len(shots)
+
+    server = None
+    if url is None:
+        server, url = start_stub_server(delay=delay, upload_bps=upload_bps)
+    try:
+        raw_latency = _ocr_all(shots, url, api_key, prep=None)
+        prep_latency = _ocr_all(shots, url, api_key, prep=prep)
+    finally:
+        if server:
+            server.shutdown()
+
+    raw_bytes = sum(len(s[0]) for s in shots)
+    prep_bytes = sum(len(p) for p in processed)
+    return {
+        "benchmark": "image_preprocessing",
+        "images": len(shots),
+        "max_width": max_width,
+        "jpeg_quality": quality,
+        "avg_payload_kb_before": round(raw_bytes / len(shots) / 1024, 1),
+        "avg_payload_kb_after": round(prep_bytes / len(shots) / 1024, 1),
+        "payload_reduction": round(1 - prep_bytes / raw_bytes, 3),
+        "avg_preprocess_ms": round(prep_ms, 1),
+        "avg_latency_s_before": round(raw_latency, 3),
+        "avg_latency_s_after": round(prep_latency, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of sample screenshots (default: synthetic)")
+    parser.add_argument("--url", help="OCR endpoint (default: local stub)")
+    parser.add_argument("--api-key", default="stub-key")
+    parser.add_argument("--upload-bps", type=float, default=250_000, help="stub uplink speed in bytes/s")
+    parser.add_argument("--quality", type=int, default=PREP_OPTIONS["quality"])
+    parser.add_argument("--max-width", type=int, default=PREP_OPTIONS["max_width"])
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_screenshots()
+    print(json.dumps(run(corpus, args.url, args.api_key, args.upload_bps, quality=args.quality, max_width=args.max_width), indent=2))
@@ -0,0 +1,119 @@
+"""
+Benchmark: cold-start import time of app.py and every page, per module.
+
+    python benchmarks/bench_imports.py
+    python benchmarks/bench_imports.py --top 15 --all-imports
+
+Each entry point is started in a fresh interpreter under `python -X importtime`
+running only its module-level import statements (the rest of a page needs a
+Streamlit session). streamlit is imported first and reported on its own, since
+every page pays for it. For each page: the import time on top of streamlit and
+the heaviest top-level packages, by self time summed over their submodules.
+With --all-imports, imports inside functions (the lazy ones) are run too, which
+shows what loading on first use saves. The best of --repeat runs is kept.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\| ( *)(\S+)$")
+
+
+def entry_points():
+    pages = sorted(f for f in os.listdir(os.path.join(ROOT, "pages")) if f.endswith(".py"))
+    return ["app.py"] + [f"pages/{page}" for page in pages]
+
+
+def import_statements(path: str, all_imports: bool = False) -> str:
+    """
+    Source of the import statements of `path`: module-level ones only, or every
+    one (including those inside functions and blocks) with `all_imports`.
+    """
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    nodes = ast.walk(tree) if all_imports else tree.body
+    imports = [node for node in nodes if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def _profile(code: str):
+    """
+    Runs `code` after `import streamlit` under -X importtime.
+    Returns (streamlit_us, [(module, self_us)] for everything imported after it).
+    """
+    prelude = f"import sys\nsys.path.insert(0, {ROOT!r})\nimport streamlit\n"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", prelude + code],
+        capture_output=True, text=True, cwd=ROOT,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    baseline_us, modules, after_streamlit = 0, [], False
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        if after_streamlit:
+            modules.append((name, self_us))
+        elif name == "streamlit" and not indent:
+            # Printed once streamlit and everything it pulled in are done
+            baseline_us, after_streamlit = cumulative_us, True
+    return baseline_us, modules
+
+
+def profile_entry_point(path: str, all_imports: bool = False, repeat: int = 3, top: int = 10):
+    code = import_statements(path, all_imports)
+    best = None
+    for _ in range(repeat):
+        baseline_us, modules = _profile(code)
+        total_us = sum(self_us for _, self_us in modules)
+        if best is None or total_us < best[1]:
+            best = (baseline_us, total_us, modules)
+
+    baseline_us, total_us, modules = best
+    by_package = defaultdict(int)
+    for name, self_us in modules:
+        by_package[name.split(".")[0]] += self_us
+    heaviest = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "streamlit_s": round(baseline_us / 1e6, 3),
+        "import_s": round(total_us / 1e6, 3),
+        "modules": len(modules),
+        "top_packages": {name: round(us / 1e6, 3) for name, us in heaviest},
+    }
+
+
+def _slug(path: str) -> str:
+    return re.sub(r"\W+", "_", os.path.splitext(os.path.basename(path))[0]).strip("_").lower()
+
+
+def run(all_imports: bool = False, repeat: int = 3, top: int = 10):
+    pages = {path: profile_entry_point(path, all_imports, repeat, top) for path in entry_points()}
+    report = {
+        "benchmark": "imports",
+        "all_imports": all_imports,
+        "streamlit_s": min(page["streamlit_s"] for page in pages.values()),
+    }
+    # Flat keys, so run_all.compare() tracks each page's startup cost
+    for path, page in pages.items():
+        report[f"{_slug(path)}_import_s"] = page["import_s"]
+    report["pages"] = pages
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all-imports", action="store_true", help="also run imports inside functions (lazy ones)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="packages listed per page")
+    args = parser.parse_args()
+    print(json.dumps(run(args.all_imports, args.repeat, args.top), indent=2))
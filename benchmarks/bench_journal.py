@@ -0,0 +1,94 @@
+"""
+Benchmark: save latency of utils.mark_attendance (synchronous upsert) vs
+journal.journal_attendance (local SQLite journal, flushed in the background).
+
+    python benchmarks/bench_journal.py --messages 100 --latency 0.05
+
+Both paths save the same parsed messages against FakeSupabase with `--latency`
+seconds per request. For the journal, the time until the flusher has every
+row upstream is reported separately, along with the diff and upsert requests
+it needed.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from attendance_parser import parse_attendance_text
+from benchmarks.synthetic import attendance_messages, student_rows
+from database import FakeSupabase
+from journal import AttendanceJournal, journal_attendance
+from roster import get_roster, invalidate_roster
+from utils import mark_attendance
+
+
+def _save_all(save, parsed):
+    latencies = []
+    for item in parsed:
+        start = time.perf_counter()
+        result = save(item)
+        latencies.append(time.perf_counter() - start)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+    latencies.sort()
+    return {
+        "s": round(sum(latencies), 3),
+        "ms_per_save": round(sum(latencies) * 1000 / len(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def run(messages: int = 100, students_per_section: int = 60, sections=("A", "B"), latency: float = 0.05):
+    texts = attendance_messages(messages, students_per_section, sections)
+    parsed = [parse_attendance_text(text) for text in texts]
+
+    # Direct: every save waits for the diff read and the upsert
+    direct_fake = FakeSupabase({"students": student_rows(students_per_section, sections), "attendance": []}, latency=latency)
+    invalidate_roster()
+    for section in sections:
+        get_roster(direct_fake, section)  # warm roster cache, as in a running app
+    direct = _save_all(lambda item: mark_attendance(direct_fake, item), parsed)
+
+    # Journaled: every save is a local transaction; the flusher catches up
+    fake = FakeSupabase({"students": student_rows(students_per_section, sections), "attendance": []}, latency=latency)
+    invalidate_roster()
+    for section in sections:
+        get_roster(fake, section)
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = AttendanceJournal(os.path.join(tmp, "journal.sqlite3"), flush_interval=0.05)
+        requests_before = fake.requests
+        start = time.perf_counter()
+        journal.start(lambda: fake)
+        journaled = _save_all(lambda item: journal_attendance(journal, fake, item), parsed)
+        while journal.pending_rows():
+            time.sleep(0.01)
+        drained_s = time.perf_counter() - start
+        journal.stop(5)
+        flush_requests = fake.requests - requests_before
+    invalidate_roster()
+
+    return {
+        "benchmark": "journal",
+        "messages": messages,
+        "latency_s": latency,
+        "direct_ms_per_save": direct["ms_per_save"],
+        "direct_p95_ms": direct["p95_ms"],
+        "journal_ms_per_save": journaled["ms_per_save"],
+        "journal_p95_ms": journaled["p95_ms"],
+        "journal_drained_s": round(drained_s, 3),
+        "journal_flush_requests": flush_requests,
+        "rows_upstream": len(fake.tables["attendance"]),
+        "rows_match": len(fake.tables["attendance"]) == len(direct_fake.tables["attendance"]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--students", type=int, default=60, help="students per section")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per simulated request")
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.students, latency=args.latency), indent=2))
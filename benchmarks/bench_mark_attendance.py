@@ -0,0 +1,77 @@
+"""
+Benchmark: utils.mark_attendance against the in-memory FakeSupabase.
+
+    python benchmarks/bench_mark_attendance.py --messages 200 --latency 0.02
+
+Three passes over the same parsed messages:
+  first upload    every row is new
+  re-upload       nothing changed, so the delta check skips every write
+  full rewrite    delta=False, every row is upserted again
+`--latency` adds a simulated network round trip per request.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from attendance_parser import parse_attendance_text
+from benchmarks.synthetic import attendance_messages, student_rows
+from database import FakeSupabase
+from roster import invalidate_roster
+from utils import mark_attendance
+
+
+def _pass(fake, parsed, delta):
+    requests_before = fake.requests
+    written = 0
+    start = time.perf_counter()
+    for item in parsed:
+        result = mark_attendance(fake, item, delta=delta)
+        if "error" in result:
+            raise RuntimeError(result["error"])
+        written += result["count"]
+    elapsed = time.perf_counter() - start
+    return {
+        "s": round(elapsed, 3),
+        "ms_per_message": round(elapsed * 1000 / len(parsed), 2),
+        "rows_written": written,
+        "requests": fake.requests - requests_before,
+    }
+
+
+def run(messages: int = 200, students_per_section: int = 60, sections=("A", "B"), latency: float = 0.0):
+    fake = FakeSupabase({"students": student_rows(students_per_section, sections), "attendance": []}, latency=latency)
+    parsed = [parse_attendance_text(text) for text in attendance_messages(messages, students_per_section, sections)]
+    invalidate_roster()
+
+    first = _pass(fake, parsed, delta=True)
+    again = _pass(fake, parsed, delta=True)
+    rewrite = _pass(fake, parsed, delta=False)
+    invalidate_roster()
+
+    return {
+        "benchmark": "mark_attendance",
+        "messages": messages,
+        "students": students_per_section * len(sections),
+        "latency_s": latency,
+        "attendance_rows": len(fake.tables["attendance"]),
+        "first_upload_s": first["s"],
+        "first_upload_ms_per_message": first["ms_per_message"],
+        "first_upload_requests": first["requests"],
+        "reupload_s": again["s"],
+        "reupload_ms_per_message": again["ms_per_message"],
+        "reupload_rows_written": again["rows_written"],
+        "full_rewrite_s": rewrite["s"],
+        "full_rewrite_ms_per_message": rewrite["ms_per_message"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--students", type=int, default=60, help="students per section")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per request")
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.students, latency=args.latency), indent=2))
@@ -0,0 +1,56 @@
+"""
+Benchmark: sequential vs concurrent OCR of several images against the local stub.
+
+    python benchmarks/bench_ocr_concurrency.py --images 4 --delay 1.0
+
+With concurrency the wall-clock time should be close to one image's latency.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ocr
+from benchmarks.ocr_stub_server import start_stub_server
+
+
+def run(images: int = 4, delay: float = 1.0, fail_rate: float = 0.0):
+    server, url = start_stub_server(delay=delay, fail_rate=fail_rate)
+    ocr.OCR_BACKOFF = 0.1
+    try:
+        # Distinct bytes per run so the OCR cache never answers
+        def batch(tag):
+            return [(f"{tag}-{i}-{time.time_ns()}".encode(), f"img{i}.png", "image/png") for i in range(images)]
+
+        start = time.perf_counter()
+        sequential = [ocr.extract_text(*image, "stub-key", url=url) for image in batch("seq")]
+        sequential_s = time.perf_counter() - start
+
+        os.environ["OCR_SPACE_URL"] = url
+        start = time.perf_counter()
+        concurrent = ocr.extract_many(batch("par"), "stub-key")
+        concurrent_s = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    failures = sum(1 for text in sequential + concurrent if text.startswith("OCR"))
+    return {
+        "benchmark": "ocr_concurrency",
+        "images": images,
+        "stub_delay_s": delay,
+        "sequential_s": round(sequential_s, 2),
+        "concurrent_s": round(concurrent_s, 2),
+        "speedup": round(sequential_s / concurrent_s, 2),
+        "failed_requests": failures,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.images, args.delay, args.fail_rate), indent=2))
@@ -0,0 +1,173 @@
+"""
+Throughput benchmark: single-pass attendance_parser vs the original parser.
+
+    python benchmarks/bench_parser.py --messages 5000
+
+Also checks that both produce identical output on every message.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from attendance_parser import parse_attendance_text, parse_many
+from benchmarks.synthetic import attendance_messages
+
+# Inputs that stress the edges of the metadata search
+EDGE_CASES = [
+    "31\nJan\n2026\nMorning\nAD\nB\nAbsent\n12. X",
+    "AD -A\n31 Jan 2026 afternoon\nOn Duty\n5 Y\nTotal 60\n6 Z",
+    "Section b\n99 Foo 2026\n01 Feb 2026\nMORNING\nLate comers\n7\n8.",
+    "nothing useful here",
+    "",
+]
+
+
+def legacy_parse_attendance_text(text: str):
+    """
+    The original multi-scan parser from utils.py, kept as the baseline.
+    """
+    
+    # 1. Normalize text
+    # Replace common OCR errors or spacing issues could happen, but let's stick to basic regex first.
+    lines = text.split('\n')
+    
+    data = {
+        "date": None,
+        "session": None,
+        "section": None,
+        "records": []
+    }
+    
+    # REGEX PATTERNS
+    
+    # Date: Matches DD Jan YYYY or DD-MM-YYYY
+    # Example: 31 Jan 2026
+    date_pattern = r"(\d{1,2})[\s\.\-\/]+([A-Za-z]{3,9})[\s\.\-\/]+(\d{4})" 
+    
+    # Session: Morning or Afternoon
+    session_pattern = r"(Morning|Afternoon)"
+    
+    # Section: AD-A, AD-B, Section A, Section B
+    # We look for "-A" or "-B" or " A" / " B" near keywords like AD or Section
+    section_pattern_broad = r"(AD|Section)[\s-]*([AB])"
+    
+    # Categories Keywords
+    cat_absent = r"(Absentees|Absent)"
+    cat_od = r"(OD|On Duty)"
+    cat_late = r"(Late|Late comers)"
+    
+    current_category = "Absent" # Default assumption if numbers appear early? No, usually sections have headers.
+    
+    # SEARCH FOR METADATA GLOBALLY FIRST
+    
+    # Date
+    date_match = re.search(date_pattern, text, re.IGNORECASE)
+    if date_match:
+        try:
+            day, month_str, year = date_match.groups()
+            # Parse date string to object then back to ISO YYYY-MM-DD
+            # Handle standard 3-letter months
+            date_obj = datetime.strptime(f"{day}-{month_str[:3]}-{year}", "%d-%b-%Y")
+            data["date"] = date_obj.strftime("%Y-%m-%d")
+        except:
+            # Fallback or try other formats if complex
+            pass
+            
+    # Session
+    session_match = re.search(session_pattern, text, re.IGNORECASE)
+    if session_match:
+        # Standardize case
+        sess = session_match.group(1).lower()
+        data["session"] = "Morning" if "morning" in sess else "Afternoon"
+        
+    # Section
+    section_match = re.search(section_pattern_broad, text, re.IGNORECASE)
+    if section_match:
+        data["section"] = section_match.group(2).upper()
+        
+    # PARSE RECORDS LINE BY LINE
+    # We detect when we enter a "Block" (Absent, OD, Late)
+    # Then we look for register numbers "69.Name" -> 69
+    
+    active_status = None # None means we haven't hit a header yet
+    
+    for line in lines:
+        line_clean = line.strip()
+        if not line_clean:
+            continue
+            
+        # Check for Headers
+        if re.search(cat_absent, line_clean, re.IGNORECASE):
+            active_status = "Absent"
+            continue
+        elif re.search(cat_od, line_clean, re.IGNORECASE):
+            active_status = "OD"
+            continue
+        elif re.search(cat_late, line_clean, re.IGNORECASE):
+            active_status = "Late"
+            continue
+        elif "Present" in line_clean or "Total" in line_clean:
+            active_status = None # Reset if we hit summary lines
+            continue
+            
+        # extract_students
+        if active_status:
+            # Look for "digits dot" pattern e.g. "59." or just "59" at start of line
+            # Strict mode: Number followed by dot or space and letters
+            # Regex: Start of line, digits, dot or space
+            student_match = re.match(r"^(\d+)", line_clean)
+            if student_match:
+                reg_no = student_match.group(1)
+                data["records"].append({
+                    "register_number": reg_no,
+                    "status": active_status
+                })
+
+    return data
+
+
+def _time(fn, messages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(messages)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(messages: int = 5000, repeat: int = 3, workers: int = None):
+    corpus = list(attendance_messages(messages)) + EDGE_CASES
+
+    mismatches = sum(
+        1 for text in corpus
+        if parse_attendance_text(text) != legacy_parse_attendance_text(text)
+    )
+
+    legacy_s = _time(lambda c: [legacy_parse_attendance_text(t) for t in c], corpus, repeat)
+    single_pass_s = _time(lambda c: [parse_attendance_text(t) for t in c], corpus, repeat)
+    batch_s = _time(lambda c: parse_many(c, workers=workers), corpus, repeat)
+
+    return {
+        "benchmark": "parse_attendance_text",
+        "messages": len(corpus),
+        "mismatches": mismatches,
+        "legacy_msgs_per_s": round(len(corpus) / legacy_s),
+        "single_pass_msgs_per_s": round(len(corpus) / single_pass_s),
+        "parse_many_msgs_per_s": round(len(corpus) / batch_s),
+        "parse_many_workers": workers or 1,
+        "speedup": round(legacy_s / single_pass_s, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.repeat, args.workers), indent=2))
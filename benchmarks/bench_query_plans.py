@@ -0,0 +1,234 @@
+"""
+Benchmark: EXPLAIN ANALYZE of the app's real queries on the plain schema vs the
+indexed, partitioned one (attendance_partitioning.sql).
+
+    python benchmarks/bench_query_plans.py --dsn postgresql://postgres@localhost/postgres --rows 10000000
+
+Each layout is built in its own scratch schema (bench_plain, bench_partitioned),
+filled with the same synthetic attendance and analyzed. The queries are the SQL
+that PostgREST runs for View Records pages, the mark_attendance diff and upsert,
+the roster fetch and the assistant's fast path. Write queries are rolled back.
+Needs psycopg2 and a Postgres you can create schemas in (13+).
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAYOUTS = {
+    "plain": ["schema.sql"],
+    "partitioned": ["schema.sql", "attendance_partitioning.sql"],
+}
+
+START_DATE = date(2020, 1, 1)
+
+RECORD_COLUMNS = "a.date, a.session, a.status, a.student_id, s.register_number, s.full_name, s.section"
+
+QUERIES = {
+    # View Records, section + one month, first page
+    "records_first_page": f"""
+        SELECT {RECORD_COLUMNS}
+        FROM attendance a JOIN students s ON s.id = a.student_id
+        WHERE s.section = 'A' AND a.date >= %(month_start)s AND a.date <= %(month_end)s
+        ORDER BY a.date DESC, a.session DESC, a.student_id DESC
+        LIMIT 101
+    """,
+    # View Records, next page from a keyset cursor, no filters
+    # (records._after_cursor: the fallback without attendance_page_after)
+    "records_keyset_page": f"""
+        SELECT {RECORD_COLUMNS}
+        FROM attendance a JOIN students s ON s.id = a.student_id
+        WHERE a.date <= %(day)s
+          AND (a.date < %(day)s
+               OR (a.date = %(day)s AND a.session < 'Morning')
+               OR (a.date = %(day)s AND a.session = 'Morning' AND a.student_id < %(student_id)s))
+        ORDER BY a.date DESC, a.session DESC, a.student_id DESC
+        LIMIT 101
+    """,
+    # mark_attendance: stored statuses of one section, day and session
+    "save_diff": """
+        SELECT a.student_id, a.status
+        FROM attendance a JOIN students s ON s.id = a.student_id
+        WHERE a.date = %(day)s AND a.session = 'Morning' AND s.section = 'A'
+    """,
+    # mark_attendance: one section's upsert (rolled back)
+    "save_upsert": """
+        INSERT INTO attendance (student_id, date, session, status)
+        SELECT id, %(day)s, 'Morning', 'Absent' FROM students WHERE section = 'A'
+        ON CONFLICT (student_id, date, session) DO UPDATE SET status = EXCLUDED.status
+    """,
+    # roster.py: students of a section
+    "roster_fetch": """
+        SELECT id, register_number, section FROM students WHERE section IN ('A')
+    """,
+    # Assistant fast path: who was absent this week
+    "absent_in_week": """
+        SELECT s.register_number, s.full_name, s.section, COUNT(*) AS sessions, COUNT(*) OVER () AS matches
+        FROM attendance a JOIN students s ON s.id = a.student_id
+        WHERE a.date BETWEEN %(day)s AND %(week_end)s AND a.status = 'Absent'
+        GROUP BY s.id, s.register_number, s.full_name, s.section
+        ORDER BY s.section, LENGTH(s.register_number), s.register_number
+    """,
+    # One student's history
+    "student_history": """
+        SELECT date, session, status FROM attendance
+        WHERE student_id = %(student_id)s
+        ORDER BY date DESC
+        LIMIT 100
+    """,
+}
+
+
+# Queries the app runs differently on a layout
+LAYOUT_QUERIES = {
+    "partitioned": {
+        # records._keyset_query: rpc("attendance_page_after").select(...)
+        "records_keyset_page": f"""
+            SELECT {RECORD_COLUMNS}
+            FROM attendance_page_after(%(day)s, 'Morning', %(student_id)s) a
+            JOIN students s ON s.id = a.student_id
+            ORDER BY a.date DESC, a.session DESC, a.student_id DESC
+            LIMIT 101
+        """,
+    },
+}
+
+
+def _run_sql_file(cur, name):
+    with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+        cur.execute(f.read())
+
+
+def build_layout(conn, layout: str, rows: int, students: int):
+    """
+    Creates schema bench_<layout> with the layout's DDL and `rows` attendance rows.
+    Returns the parameters the queries use.
+    """
+    schema = f"bench_{layout}"
+    per_section = students // 2
+    days = max(1, rows // (students * 2))
+
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema}")
+        cur.execute(f"SET search_path TO {schema}")
+        for sql_file in LAYOUTS[layout]:
+            _run_sql_file(cur, sql_file)
+
+        if layout == "partitioned":
+            cur.execute("SELECT ensure_attendance_partitions(%s, %s)", (START_DATE, START_DATE + timedelta(days=days)))
+
+        cur.execute("""
+            INSERT INTO students (register_number, full_name, section)
+            SELECT g::text, 'Student ' || g, CASE WHEN g <= %s THEN 'A' ELSE 'B' END
+            FROM generate_series(1, %s) g
+        """, (per_section, per_section * 2))
+
+        # ~10% absent, 3% OD, 2% late; same seed for both layouts
+        cur.execute("SELECT setseed(0.42)")
+        cur.execute("""
+            INSERT INTO attendance (student_id, date, session, status)
+            SELECT s.id, %s::date + d, se,
+                   CASE WHEN r < 0.10 THEN 'Absent' WHEN r < 0.13 THEN 'OD' WHEN r < 0.15 THEN 'Late' ELSE 'Present' END
+            FROM generate_series(0, %s - 1) d
+            CROSS JOIN unnest(ARRAY['Morning', 'Afternoon']) se
+            CROSS JOIN students s
+            CROSS JOIN LATERAL (SELECT random() AS r) rnd
+        """, (START_DATE, days))
+        cur.execute("ANALYZE students; ANALYZE attendance")
+
+        cur.execute("SELECT count(*) FROM attendance")
+        loaded = cur.fetchone()[0]
+        cur.execute("SELECT id FROM students WHERE register_number = %s", (str(per_section // 2),))
+        student_id = cur.fetchone()[0]
+    conn.commit()
+
+    middle = START_DATE + timedelta(days=days // 2)
+    return loaded, {
+        "day": middle,
+        "week_end": middle + timedelta(days=6),
+        "month_start": middle.replace(day=1),
+        "month_end": middle.replace(day=28),
+        "student_id": student_id,
+    }
+
+
+def _plan_summary(plan):
+    relations, nodes = set(), []
+
+    def walk(node):
+        nodes.append(node["Node Type"])
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan["Plan"])
+    return {
+        "execution_ms": round(plan["Execution Time"], 3),
+        "planning_ms": round(plan["Planning Time"], 3),
+        "rows": plan["Plan"]["Actual Rows"],
+        "shared_hit": plan["Plan"].get("Shared Hit Blocks", 0),
+        "shared_read": plan["Plan"].get("Shared Read Blocks", 0),
+        "relations": len(relations),
+        "scans": sorted({n for n in nodes if "Scan" in n}),
+    }
+
+
+def explain_all(conn, layout: str, params: dict, repeat: int = 3):
+    results = {}
+    with conn.cursor() as cur:
+        cur.execute(f"SET search_path TO bench_{layout}")
+        for name, sql in {**QUERIES, **LAYOUT_QUERIES.get(layout, {})}.items():
+            best = None
+            for _ in range(repeat):
+                cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+                summary = _plan_summary(cur.fetchone()[0][0])
+                conn.rollback()  # undo save_upsert; also ends the read transaction
+                cur.execute(f"SET search_path TO bench_{layout}")
+                if best is None or summary["execution_ms"] < best["execution_ms"]:
+                    best = summary
+            results[name] = best
+    return results
+
+
+def run(dsn: str, rows: int = 10_000_000, students: int = 2000, repeat: int = 3, keep: bool = False):
+    conn = psycopg2.connect(dsn)
+    report = {"benchmark": "query_plans", "target_rows": rows, "students": students, "layouts": {}}
+    try:
+        for layout in LAYOUTS:
+            print(f"building {layout}...", file=sys.stderr)
+            loaded, params = build_layout(conn, layout, rows, students)
+            report["rows"] = loaded
+            report["layouts"][layout] = explain_all(conn, layout, params, repeat)
+
+        plain, partitioned = report["layouts"]["plain"], report["layouts"]["partitioned"]
+        report["speedup"] = {
+            name: round(plain[name]["execution_ms"] / max(partitioned[name]["execution_ms"], 0.001), 1)
+            for name in QUERIES
+        }
+    finally:
+        if not keep:
+            with conn.cursor() as cur:
+                for layout in LAYOUTS:
+                    cur.execute(f"DROP SCHEMA IF EXISTS bench_{layout} CASCADE")
+            conn.commit()
+        conn.close()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.environ.get("DATABASE_URL"), help="Postgres DSN (default: $DATABASE_URL)")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--keep", action="store_true", help="keep the bench_* schemas afterwards")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("pass --dsn or set DATABASE_URL")
+    print(json.dumps(run(args.dsn, args.rows, args.students, args.repeat, args.keep), indent=2, default=str))
@@ -0,0 +1,86 @@
+"""
+Benchmark: the View Records path on FakeSupabase data.
+
+    python benchmarks/bench_records.py --rows 50000
+
+Times fetching every matching row through keyset pages (records.iter_attendance_pages),
+flattening them (to_display_rows), the percentage summary (stats.attendance_summary)
+and the CSV export.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import record_columns
+from database import FakeSupabase
+from records import iter_attendance_pages, to_display_rows
+from stats import attendance_summary
+
+
+def seeded_backend(rows: int, students: int = 1000, seed: int = 42):
+    """
+    FakeSupabase holding `rows` attendance rows spread over `students` students.
+    """
+    columns = record_columns(rows, students, seed)
+    student_by_reg = {}
+    attendance = []
+    for i in range(rows):
+        reg = columns["Register No"][i]
+        if reg not in student_by_reg:
+            student_by_reg[reg] = {
+                "id": f"s{reg}",
+                "register_number": reg,
+                "full_name": columns["Name"][i],
+                "section": columns["Section"][i],
+            }
+        attendance.append({
+            "id": f"a{i}",
+            "student_id": f"s{reg}",
+            "date": columns["Date"][i],
+            "session": columns["Session"][i],
+            "status": columns["Status"][i],
+        })
+    return FakeSupabase({"students": list(student_by_reg.values()), "attendance": attendance})
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(rows: int = 50_000, students: int = 1000, page_size: int = 999):
+    fake = seeded_backend(rows, students)
+    filters = {"section": None, "date_from": None, "date_to": None, "statuses": None, "register_number": None}
+
+    pages, fetch_s = _timed(lambda: list(iter_attendance_pages(fake, filters, page_size=page_size)))
+    display, transform_s = _timed(lambda: [row for page in pages for row in to_display_rows(page)])
+    df, frame_s = _timed(lambda: pd.DataFrame(display))
+    _, summary_s = _timed(lambda: attendance_summary(df, by="student"))
+    csv, csv_s = _timed(lambda: df.to_csv(index=False).encode("utf-8"))
+
+    return {
+        "benchmark": "view_records",
+        "rows": len(display),
+        "pages": len(pages),
+        "fetch_s": round(fetch_s, 3),
+        "to_display_rows_s": round(transform_s, 3),
+        "dataframe_s": round(frame_s, 3),
+        "summary_s": round(summary_s, 3),
+        "csv_export_s": round(csv_s, 3),
+        "csv_mb": round(len(csv) / 1e6, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=999)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.students, args.page_size), indent=2))
@@ -0,0 +1,80 @@
+"""
+Benchmark: vectorized stats.attendance_summary vs the old per-student groupby loop.
+
+    python benchmarks/bench_stats.py --rows 1000000 --students 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.synthetic import record_columns
+from stats import attendance_summary
+
+
+def legacy_student_stats(df_stats):
+    """
+    The loop the Attendance Percentage tab used before stats.py.
+    """
+    stats = []
+    students_group = df_stats.groupby("Register No")
+
+    for reg_no, group in students_group:
+        total_sessions = len(group)
+        present_count = len(group[group['Status'].isin(['Present', 'OD', 'Late'])])
+        absent_count = len(group[group['Status'] == 'Absent'])
+        perc = (present_count / total_sessions) * 100 if total_sessions > 0 else 0
+
+        stats.append({
+            "Register No": reg_no,
+            "Name": group.iloc[0]["Name"],
+            "Total Sessions": total_sessions,
+            "Present": present_count,
+            "Absent": absent_count,
+            "Attendance %": round(perc, 2)
+        })
+
+    return pd.DataFrame(stats)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(rows: int = 1_000_000, students: int = 2000):
+    df = pd.DataFrame(record_columns(rows, students))
+
+    legacy, legacy_s = _timed(lambda: legacy_student_stats(df))
+    vectorized, vectorized_s = _timed(lambda: attendance_summary(df, by="student"))
+
+    columns = list(legacy.columns)
+    identical = legacy.reset_index(drop=True).equals(vectorized[columns].reset_index(drop=True))
+
+    timings = {}
+    for level in ("section", "date", "session"):
+        _, timings[f"by_{level}_s"] = _timed(lambda: attendance_summary(df, by=level))
+
+    return {
+        "benchmark": "attendance_summary",
+        "rows": rows,
+        "students": students,
+        "identical": identical,
+        "legacy_loop_s": round(legacy_s, 3),
+        "vectorized_s": round(vectorized_s, 3),
+        "speedup": round(legacy_s / vectorized_s, 1),
+        **{k: round(v, 3) for k, v in timings.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--students", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.students), indent=2))
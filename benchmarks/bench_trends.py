@@ -0,0 +1,94 @@
+"""
+Benchmark: a per-day, per-section trend from raw attendance rows vs from the
+daily rollup (attendance_rollup.sql) on FakeSupabase data.
+
+    python benchmarks/bench_trends.py --rows 50000 --latency 0.02
+
+The raw path is what a trend needed before the rollup: every attendance row
+through keyset pages, then stats.attendance_summary by date and section. The
+rollup path reads attendance_daily_rollup (seeded here the way its triggers
+would leave it) and runs stats.rollup_trends. `--latency` is slept per request.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_records import seeded_backend
+from records import fetch_daily_rollup, iter_attendance_pages, to_display_rows
+from stats import attendance_summary, rollup_trends
+
+STATUS_COLUMNS = {"Present": "present", "Absent": "absent", "OD": "od", "Late": "late"}
+
+
+def rollup_rows(fake):
+    """
+    The attendance_daily_rollup rows the triggers keep for `fake`'s attendance.
+    """
+    section_of = {s["id"]: s["section"] for s in fake.tables["students"]}
+    counts = defaultdict(lambda: dict.fromkeys(STATUS_COLUMNS.values(), 0))
+    for row in fake.tables["attendance"]:
+        counts[(section_of[row["student_id"]], row["date"], row["session"])][STATUS_COLUMNS[row["status"]]] += 1
+    return [
+        {"section": section, "date": day, "session": session, **status_counts}
+        for (section, day, session), status_counts in counts.items()
+    ]
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(rows: int = 50_000, students: int = 1000, latency: float = 0.0):
+    fake = seeded_backend(rows, students)
+    fake.tables["attendance_daily_rollup"] = rollup_rows(fake)
+    fake.latency = latency
+    filters = {"section": None, "date_from": None, "date_to": None, "statuses": None, "register_number": None}
+
+    def from_raw():
+        display = [row for page in iter_attendance_pages(fake, filters) for row in to_display_rows(page)]
+        return attendance_summary(pd.DataFrame(display), by=["date", "section"])
+
+    def from_rollup():
+        return rollup_trends(fetch_daily_rollup(fake, filters), "day")
+
+    fake.requests = 0
+    raw, raw_s = _timed(from_raw)
+    raw_requests = fake.requests
+
+    fake.requests = 0
+    rolled, rollup_s = _timed(from_rollup)
+    rollup_requests = fake.requests
+
+    # Same numbers either way
+    raw_pct = raw.set_index(["Date", "Section"])["Attendance %"].sort_index().to_numpy()
+    rolled_pct = rolled.set_index(["Date", "Section"])["Attendance %"].sort_index().to_numpy()
+
+    return {
+        "benchmark": "trends",
+        "attendance_rows": rows,
+        "rollup_rows": len(fake.tables["attendance_daily_rollup"]),
+        "points": len(rolled),
+        "raw_s": round(raw_s, 3),
+        "raw_requests": raw_requests,
+        "rollup_s": round(rollup_s, 4),
+        "rollup_requests": rollup_requests,
+        "speedup": round(raw_s / max(rollup_s, 1e-6), 1),
+        "results_match": len(raw_pct) == len(rolled_pct) and bool((raw_pct == rolled_pct).all()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds slept per request")
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.students, args.latency), indent=2))
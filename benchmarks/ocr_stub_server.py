@@ -0,0 +1,86 @@
+"""
+Local stand-in for the OCR Space API.
+
+    python benchmarks/ocr_stub_server.py --port 8765 --delay 1.5 --fail-rate 0.2
+
+Then point the app at it with OCR_SPACE_URL=http://127.0.0.1:8765/parse/image
+(or `url` under [ocr_space] in secrets). Every request sleeps `delay` seconds and
+answers with a canned attendance message; `fail_rate` of them return HTTP 503
+so retries can be exercised. `upload_bps` adds size-dependent latency, like a
+slow uplink (0 disables it).
+
+For tests: `fail_first` makes the first N requests fail with 503 (no randomness),
+`text` may be a function of the request body, and server.requests counts requests.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_TEXT = "31 Jan 2026\nMorning attendance\nAD-A\nAbsentees:\n59. Stub Student\n"
+
+
+def make_handler(delay: float, fail_rate: float, text, upload_bps: float = 0, fail_first: int = 0):
+    class OcrStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def do_POST(self):
+            body_length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(body_length)
+            with self.server.requests_lock:
+                self.server.requests += 1
+                request_number = self.server.requests
+            time.sleep(delay + (body_length / upload_bps if upload_bps else 0))
+
+            if request_number <= fail_first or random.random() < fail_rate:
+                self._reply(503, {"IsErroredOnProcessing": True, "ErrorMessage": ["stub overload"]})
+            else:
+                self._reply(200, {
+                    "IsErroredOnProcessing": False,
+                    "ParsedResults": [{"ParsedText": text(body) if callable(text) else text}],
+                    "RequestBytes": body_length,
+                })
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return OcrStubHandler
+
+
+def start_stub_server(port: int = 0, delay: float = 1.0, fail_rate: float = 0.0, text=SAMPLE_TEXT,
+                      upload_bps: float = 0, fail_first: int = 0):
+    """
+    Starts the stub in a daemon thread. Returns (server, url); call server.shutdown() when done.
+    Port 0 picks a free port.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(delay, fail_rate, text, upload_bps, fail_first))
+    server.requests, server.requests_lock = 0, threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/parse/image"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--upload-bps", type=float, default=0, help="simulated uplink in bytes/s")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.delay, args.fail_rate, upload_bps=args.upload_bps)
+    print(f"OCR stub listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
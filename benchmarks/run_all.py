@@ -0,0 +1,135 @@
+"""
+Runs the benchmark suite and writes one machine-readable JSON report.
+
+    python benchmarks/run_all.py --scale small --output bench.json
+    python benchmarks/run_all.py --scale small --baseline bench.json
+
+Scales set the synthetic data volume (sections, students, months of messages, rows).
+With --baseline, timings are compared to an earlier report and the exit status is 1
+when any of them regressed by more than --tolerance (default 25%).
+OCR benchmarks need a local stub server and only run with --ocr.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks import (bench_export, bench_imports, bench_journal, bench_mark_attendance, bench_parser, bench_records,
+                        bench_stats, bench_trends)
+from benchmarks.synthetic import messages_for_months
+
+SCALES = {
+    "small": {"sections": ("A", "B"), "students_per_section": 60, "months": 2, "record_rows": 20_000, "stats_rows": 100_000},
+    "medium": {"sections": ("A", "B"), "students_per_section": 60, "months": 6, "record_rows": 100_000, "stats_rows": 1_000_000},
+    "large": {"sections": ("A", "B", "C", "D"), "students_per_section": 70, "months": 12, "record_rows": 250_000, "stats_rows": 5_000_000},
+}
+
+
+def _suites(scale, with_ocr):
+    messages = messages_for_months(scale["months"], scale["sections"])
+    students = scale["students_per_section"] * len(scale["sections"])
+    suites = {
+        "parser": lambda: bench_parser.run(messages=messages),
+        "mark_attendance": lambda: bench_mark_attendance.run(
+            messages=messages, students_per_section=scale["students_per_section"], sections=scale["sections"]),
+        "view_records": lambda: bench_records.run(rows=scale["record_rows"], students=students),
+        "stats": lambda: bench_stats.run(rows=scale["stats_rows"], students=students),
+        "export": lambda: bench_export.run(rows=scale["record_rows"]),
+        "trends": lambda: bench_trends.run(rows=scale["record_rows"], students=students),
+        "journal": lambda: bench_journal.run(
+            messages=50, students_per_section=scale["students_per_section"], sections=scale["sections"]),
+        "imports": lambda: bench_imports.run(),
+    }
+    if with_ocr:
+        from benchmarks import bench_image_prep, bench_ocr_concurrency
+        suites["ocr_concurrency"] = lambda: bench_ocr_concurrency.run(images=4, delay=0.5)
+        suites["image_prep"] = lambda: bench_image_prep.run(bench_image_prep.synthetic_screenshots())
+    return suites
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(scale_name: str = "small", only=None, with_ocr: bool = False):
+    scale = SCALES[scale_name]
+    results = {}
+    for name, suite in _suites(scale, with_ocr).items():
+        if only and name not in only:
+            continue
+        print(f"running {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        results[name] = suite()
+        results[name]["wall_s"] = round(time.perf_counter() - start, 3)
+
+    return {
+        "meta": {
+            "scale": scale_name,
+            **{k: list(v) if isinstance(v, tuple) else v for k, v in scale.items()},
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance: float = 0.25):
+    """
+    Lists metrics that got worse than `baseline` by more than `tolerance`.
+    Durations (*_s, *_ms_per_*) should go down; throughputs (*_per_s) should go up.
+    """
+    regressions = []
+    for suite, metrics in report["results"].items():
+        previous = baseline.get("results", {}).get(suite, {})
+        for key, value in metrics.items():
+            old = previous.get(key)
+            if key == "wall_s" or not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            if key.endswith("_per_s"):
+                change = old / value - 1 if value else float("inf")
+            elif key.endswith("_s") or "_ms_per_" in key:
+                change = value / old - 1
+            else:
+                continue
+            if change > tolerance:
+                regressions.append({"suite": suite, "metric": key, "baseline": old, "current": value,
+                                    "worse_by": f"{change:.0%}"})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--only", nargs="+", help="suites to run (default: all)")
+    parser.add_argument("--ocr", action="store_true", help="also run the OCR benchmarks against the local stub")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    report = run(args.scale, args.only, args.ocr)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if report.get("regressions"):
+        print(f"{len(report['regressions'])} metric(s) regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,127 @@
+import random
+from datetime import date, timedelta
+
+FIRST_NAMES = ["Arun", "Priya", "Karthik", "Divya", "Rahul", "Sneha", "Vikram", "Meena", "Naveen", "Lakshmi"]
+LAST_NAMES = ["Kumar", "S", "R", "Raj", "Devi", "M", "Krishnan", "Prakash"]
+
+
+def attendance_message(rng: random.Random, day: date, session: str, section: str, register_numbers, noise: bool = True) -> str:
+    """
+    Builds one WhatsApp-style attendance message like the ones staff paste.
+    With `noise`, adds the kind of junk OCR produces (stray spaces, chat chrome).
+    """
+    absent = sorted(rng.sample(register_numbers, k=min(len(register_numbers), rng.randint(0, 6))))
+    remaining = [r for r in register_numbers if r not in absent]
+    od = sorted(rng.sample(remaining, k=min(len(remaining), rng.randint(0, 3))))
+    remaining = [r for r in remaining if r not in od]
+    late = sorted(rng.sample(remaining, k=min(len(remaining), rng.randint(0, 2))))
+
+    def name():
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+    lines = [
+        f"{day.day} {day.strftime('%b')} {day.year}",
+        f"{session} attendance",
+        f"AD-{section}",
+        f"Total: {len(register_numbers)}",
+        f"Present: {len(register_numbers) - len(absent)}",
+        "Absentees:",
+    ]
+    lines += [f"{reg}. {name()}" for reg in absent]
+    if od:
+        lines.append("OD:")
+        lines += [f"{reg}. {name()}" for reg in od]
+    if late:
+        lines.append("Late comers:")
+        lines += [f"{reg} {name()}" for reg in late]
+
+    if noise:
+        lines = [("  " + line + " ") if rng.random() < 0.2 else line for line in lines]
+        lines.insert(0, rng.choice(["", "12:41", "Class Rep", "~ Staff Advisor"]))
+        lines.append(rng.choice(["", "Thank you", "Sent from WhatsApp"]))
+
+    return "\n".join(lines)
+
+
+def section_rosters(students_per_section: int = 60, sections=("A", "B")):
+    """
+    Register numbers per section, numbered consecutively across sections.
+    """
+    return {
+        section: [str(i) for i in range(1 + s * students_per_section, 1 + (s + 1) * students_per_section)]
+        for s, section in enumerate(sections)
+    }
+
+
+def student_rows(students_per_section: int = 60, sections=("A", "B"), seed: int = 42):
+    """
+    `students` table rows matching the rosters used by attendance_messages().
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"s{reg}",
+            "register_number": reg,
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "section": section,
+        }
+        for section, register_numbers in section_rosters(students_per_section, sections).items()
+        for reg in register_numbers
+    ]
+
+
+def messages_for_months(months: int, sections=("A", "B"), school_days_per_month: int = 22):
+    """
+    How many messages `months` of teaching produce (two sessions a day per section).
+    """
+    return months * school_days_per_month * 2 * len(sections)
+
+
+def attendance_messages(count: int, students_per_section: int = 60, sections=("A", "B"), seed: int = 42,
+                        noise: bool = True):
+    """
+    Yields `count` messages cycling through days, sessions and sections.
+    """
+    rng = random.Random(seed)
+    rosters = section_rosters(students_per_section, sections)
+    day = date(2026, 1, 5)
+    produced = 0
+    while produced < count:
+        for session in ("Morning", "Afternoon"):
+            for section in sections:
+                if produced >= count:
+                    return
+                yield attendance_message(rng, day, session, section, rosters[section], noise=noise)
+                produced += 1
+        day += timedelta(days=1)
+
+
+def record_columns(rows: int, students: int = 1000, seed: int = 42):
+    """
+    Returns View Records style data as a dict of columns (cheap to turn into a DataFrame).
+    Status mix is roughly 85% Present, 8% Absent, 4% OD, 3% Late.
+    """
+    rng = random.Random(seed)
+    day = date(2025, 7, 1)
+    dates, sessions, reg_nos, names, sections, statuses = [], [], [], [], [], []
+    status_choices = ["Present"] * 85 + ["Absent"] * 8 + ["OD"] * 4 + ["Late"] * 3
+    student_names = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(students)]
+
+    for i in range(rows):
+        student = i % students
+        slot = i // students
+        dates.append((day + timedelta(days=slot // 2)).isoformat())
+        sessions.append("Morning" if slot % 2 == 0 else "Afternoon")
+        reg_nos.append(str(student + 1))
+        names.append(student_names[student])
+        sections.append("A" if student < students // 2 else "B")
+        statuses.append(rng.choice(status_choices))
+
+    return {
+        "Date": dates,
+        "Session": sessions,
+        "Register No": reg_nos,
+        "Name": names,
+        "Section": sections,
+        "Status": statuses,
+    }
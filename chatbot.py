@@ -1,18 +1,141 @@
 import streamlit as st
-from langchain_groq import ChatGroq
-from langchain_community.utilities import SQLDatabase
-from langchain_community.agent_toolkits import create_sql_agent
-import os
+import threading
+import time
+from sqlalchemy import MetaData, create_engine
+from langchain_core.callbacks import BaseCallbackHandler
+
+# langchain_groq, langchain_community's SQLDatabase / agent toolkit and sql_guard
+# are imported where they are first used: together they take seconds to import,
+# which only the assistant's agent path should pay (warmup.py preloads them).
 
 # from langchain.agents import AgentType # Removed to avoid ImportError
 
+MODEL_NAME = "llama-3.3-70b-versatile"
+
+# Built once per process and reused by every question and every session.
+# Keyed by db_url / API key, so different credentials get their own instances.
+_lock = threading.Lock()
+_engines = {}  # db_url -> Engine
+_databases = {}  # db_url -> SQLDatabase
+_llms = {}  # api_key -> ChatGroq
+_agents = {}  # (db_url, api_key) -> agent
+
+
+def _get_engine_locked(db_url: str):
+    engine = _engines.get(db_url)
+    if engine is None:
+        # pre_ping replaces connections the database dropped while idle
+        engine = create_engine(db_url, pool_pre_ping=True, pool_size=5, max_overflow=5, pool_recycle=1800)
+        _engines[db_url] = engine
+    return engine
+
+
+def get_engine(db_url: str):
+    """
+    Returns the shared SQLAlchemy engine (connection pool) for `db_url`.
+    """
+    with _lock:
+        return _get_engine_locked(db_url)
+
+
+def get_sql_database(db_url: str) -> "GuardedSQLDatabase":
+    """
+    Returns the shared SQLDatabase for `db_url`: it uses the shared engine, and the
+    schema is reflected and rendered (CREATE TABLE + sample rows) only once.
+    Queries the agent runs through it are cost-limited (see sql_guard.py).
+    """
+    from langchain_community.utilities import SQLDatabase
+    from sql_guard import GuardedSQLDatabase, guard_settings
+
+    with _lock:
+        db = _databases.get(db_url)
+        if db is None:
+            engine = _get_engine_locked(db_url)
+            metadata = MetaData()
+            reflected = SQLDatabase(engine, metadata=metadata)
+
+            # The agent asks for table info on most questions; without this every
+            # call would re-query sample rows. Render it once and serve it from memory.
+            table_info = {
+                table: reflected.get_table_info([table])
+                for table in reflected.get_usable_table_names()
+            }
+            db = GuardedSQLDatabase(
+                engine,
+                metadata=metadata,
+                custom_table_info=table_info,
+                lazy_table_reflection=True,
+                **guard_settings(),
+            )
+            _databases[db_url] = db
+        return db
+
+
+def get_llm(api_key: str) -> "ChatGroq":
+    """
+    Returns the shared Groq client for `api_key` (Llama 3.3 70b is good for SQL).
+    """
+    from langchain_groq import ChatGroq
+
+    with _lock:
+        llm = _llms.get(api_key)
+        if llm is None:
+            # streaming=True makes every LLM step emit tokens to callbacks as they arrive
+            llm = ChatGroq(model_name=MODEL_NAME, temperature=0, api_key=api_key, streaming=True)
+            _llms[api_key] = llm
+        return llm
+
+
+class LatencyTracker(BaseCallbackHandler):
+    """
+    Callback that records time-to-first-token and the number of LLM round trips
+    for one agent run. `started` is a time.perf_counter() value.
+    """
+
+    def __init__(self, started: float = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.first_token_at = None
+        self.llm_calls = 0
+
+    def on_llm_start(self, *args, **kwargs):
+        self.llm_calls += 1
+
+    def on_chat_model_start(self, *args, **kwargs):
+        self.llm_calls += 1
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        if self.first_token_at is None and token:
+            self.first_token_at = time.perf_counter()
+
+    @property
+    def time_to_first_token(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started
+
+
+def invalidate_chatbot_agent():
+    """
+    Drops cached agents, LLM clients and databases (closing their pools).
+    Call after the database schema changes so the next question re-reflects it.
+    """
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _databases.clear()
+        _llms.clear()
+        _agents.clear()
+
+
 def get_chatbot_agent():
     """
-    Creates and returns a LangChain SQL Agent powered by Groq (Llama 3).
+    Returns the LangChain SQL Agent powered by Groq (Llama 3), built on first use
+    and cached for the process. See invalidate_chatbot_agent().
     """
     # 1. Setup API Key
     if "groq" in st.secrets:
-        os.environ["GROQ_API_KEY"] = st.secrets["groq"]["api_key"]
+        api_key = st.secrets["groq"]["api_key"]
     else:
         st.error("Groq secrets missing.")
         return None
@@ -23,29 +146,46 @@ def get_chatbot_agent():
         st.warning("To use the Chatbot, please add `db_url` to `.streamlit/secrets.toml` under `[supabase]` section.")
         return None
 
+    agent = _agents.get((db_url, api_key))
+    if agent is not None:
+        return agent
+
     try:
-        db = SQLDatabase.from_uri(db_url)
+        get_sql_database(db_url)
     except Exception as e:
         st.error(f"Database connection failed: {e}")
         return None
 
-    # 3. Setup LLM (Using Groq - Llama 3 70b is good for SQL)
+    # 3. Setup LLM
     try:
-        llm = ChatGroq(
-            model_name="llama-3.3-70b-versatile", 
-            temperature=0
-        )
+        get_llm(api_key)
     except Exception as e:
         st.error(f"Failed to init Groq: {e}")
         return None
 
     # 4. Create Agent
+    return build_chatbot_agent(db_url, api_key)
+
+
+def build_chatbot_agent(db_url: str, api_key: str):
+    """
+    Returns the cached agent for these credentials, building it (and the shared
+    database and LLM client) if needed. Raises on failure and makes no Streamlit
+    calls, so it can run off the script thread (see warmup.py).
+    """
+    agent = _agents.get((db_url, api_key))
+    if agent is not None:
+        return agent
+
+    from langchain_community.agent_toolkits import create_sql_agent
+
     agent = create_sql_agent(
-        llm=llm,
-        db=db,
+        llm=get_llm(api_key),
+        db=get_sql_database(db_url),
         agent_type="zero-shot-react-description",
         verbose=True,
         handle_parsing_errors=True
     )
-    
-    return agent
+
+    with _lock:
+        return _agents.setdefault((db_url, api_key), agent)
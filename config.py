@@ -0,0 +1,19 @@
+import os
+import streamlit as st
+
+
+def get_secret(section: str, key: str, default=None):
+    """
+    Reads a value from .streamlit/secrets.toml.
+    Environment variables named SECTION_KEY (e.g. SUPABASE_URL) take precedence,
+    which is handy for scripts and benchmarks that run outside Streamlit.
+    """
+    env_value = os.environ.get(f"{section}_{key}".upper())
+    if env_value is not None:
+        return env_value
+
+    try:
+        return st.secrets[section][key]
+    except Exception:
+        # No secrets file, or section/key missing
+        return default
@@ -0,0 +1,514 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from config import get_secret
+
+# Seconds between liveness probes of a pooled client.
+# Probes only happen when a client is handed out, never in the background.
+HEALTH_CHECK_INTERVAL = 30
+
+# _lock guards the registry only; probes and builds run under the client's own
+# lock in _name_locks, so one slow reconnect doesn't stall the other names
+_lock = threading.Lock()
+_clients = {}  # name -> _PooledClient
+_name_locks = {}  # name -> threading.Lock
+_generation = 0  # bumped when the pool is dropped, so a client built before that isn't pooled
+_backend_factory = None
+
+
+class _PooledClient:
+    def __init__(self, client):
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_checked = self.created_at
+
+
+def _supabase_factory():
+    """
+    Default backend: a real Supabase client built from secrets.
+    Set `backend = "fake"` under [supabase] (or SUPABASE_BACKEND=fake) to use
+    the in-process FakeSupabase instead, e.g. for offline load tests.
+    """
+    if get_secret("supabase", "backend") == "fake":
+        return _shared_fake()
+
+    url = get_secret("supabase", "url")
+    key = get_secret("supabase", "key")
+    if not url or not key:
+        raise RuntimeError("Supabase `url` and `key` are missing in secrets.")
+
+    from supabase import create_client
+    return create_client(url, key)
+
+
+def set_backend(factory):
+    """
+    Plugs in a custom client factory (a zero-argument callable).
+    Pass None to go back to the default Supabase backend.
+    Existing pooled clients are dropped so the next get_client() uses the new backend.
+    """
+    global _backend_factory, _generation
+    with _lock:
+        _backend_factory = factory
+        _clients.clear()
+        _generation += 1
+
+
+def _build_client(factory=None):
+    factory = factory or _backend_factory or _supabase_factory
+    return factory()
+
+
+def _is_alive(client) -> bool:
+    """
+    Cheap liveness probe: a one-row read that goes through the HTTP connection.
+    """
+    try:
+        client.table("students").select("id").limit(1).execute()
+        return True
+    except Exception:
+        return False
+
+
+def get_client(name: str = "default"):
+    """
+    Returns the process-wide client registered under `name`, creating it on first use.
+    Clients are shared across sessions and pages so their HTTP connections stay alive.
+    A client that fails its periodic health check is rebuilt (reconnect-on-failure).
+
+    Separate names keep separate clients, e.g. "auth" for sign-ins so that
+    a user session never leaks into the client used for data access.
+    """
+    with _lock:
+        pooled = _clients.get(name)
+        if pooled is not None and time.monotonic() - pooled.last_checked < HEALTH_CHECK_INTERVAL:
+            return pooled.client
+        name_lock = _name_locks.setdefault(name, threading.Lock())
+
+    # Probe and (re)build outside the registry lock. Callers asking for the same
+    # name wait here, then find the client another caller checked or rebuilt.
+    with name_lock:
+        with _lock:
+            pooled = _clients.get(name)
+            generation, factory = _generation, _backend_factory
+
+        if pooled is not None and time.monotonic() - pooled.last_checked >= HEALTH_CHECK_INTERVAL:
+            if _is_alive(pooled.client):
+                pooled.last_checked = time.monotonic()
+            else:
+                pooled = None
+
+        if pooled is None:
+            pooled = _PooledClient(_build_client(factory))
+            with _lock:
+                if generation == _generation:
+                    _clients[name] = pooled
+
+        return pooled.client
+
+
+def mark_unhealthy(client):
+    """
+    Call after a request on `client` failed. Forces a health check the next
+    time the client is handed out, so a dead connection is replaced promptly.
+    """
+    with _lock:
+        for pooled in _clients.values():
+            if pooled.client is client:
+                pooled.last_checked = float("-inf")
+
+
+def reset_clients():
+    """
+    Drops every pooled client. The next get_client() call reconnects.
+    """
+    global _generation
+    with _lock:
+        _clients.clear()
+        _generation += 1
+
+
+def pool_status():
+    """
+    Returns a list of {name, age_seconds, last_check_seconds} for pooled clients.
+    """
+    now = time.monotonic()
+    with _lock:
+        return [
+            {
+                "name": name,
+                "age_seconds": round(now - pooled.created_at, 1),
+                "last_check_seconds": round(now - pooled.last_checked, 1),
+            }
+            for name, pooled in _clients.items()
+        ]
+
+
+# ---------------------------------------------------------------------------
+# In-process fake backend
+# ---------------------------------------------------------------------------
+# Mimics the subset of the supabase-py query builder this app uses:
+# table().select/upsert/insert/update/delete, eq/neq/gt/gte/lt/lte/in_, or_,
+# order, limit, range and execute(), and rpc() for the SQL functions in
+# FAKE_FUNCTIONS, whose rows take the same filters. Embedded selects like
+# "*, students(register_number, section)" resolve `students` through the
+# `student_id` column (table name minus trailing "s", plus "_id").
+
+_shared_fake_instance = None
+
+
+def _shared_fake():
+    """
+    One FakeSupabase per process, so every pooled client sees the same tables.
+    """
+    global _shared_fake_instance
+    if _shared_fake_instance is None:
+        _shared_fake_instance = FakeSupabase()
+    return _shared_fake_instance
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeAPIError(Exception):
+    """
+    Raised where PostgREST would answer with an error; `code` as in postgrest's APIError.
+    """
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def _attendance_page_after(tables, params):
+    # attendance_partitioning.sql: (date, session, student_id) < cursor
+    cursor = (params["after_date"], params["after_session"], params["after_student_id"])
+    return [r for r in tables.get("attendance", []) if (r["date"], r["session"], r["student_id"]) < cursor]
+
+
+# name -> fn(tables, params) returning the function's rows
+FAKE_FUNCTIONS = {
+    "attendance_page_after": _attendance_page_after,
+}
+
+
+class _FakeUser:
+    def __init__(self, email):
+        self.email = email
+
+
+class _FakeAuthResponse:
+    def __init__(self, email):
+        self.user = _FakeUser(email)
+        self.session = None
+
+
+class _FakeAuth:
+    def sign_in_with_password(self, credentials):
+        if not credentials.get("email") or not credentials.get("password"):
+            raise ValueError("Invalid login credentials")
+        return _FakeAuthResponse(credentials["email"])
+
+
+def _split_columns(columns: str):
+    """
+    Splits "a, b, students(c, d)" on top-level commas.
+    """
+    parts, depth, current = [], 0, ""
+    for char in columns:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+_OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "in": lambda a, b: a in b,
+}
+
+
+def _split_logic(expr: str):
+    """
+    Parses a PostgREST logic string like "date.lt.2026-01-31,and(date.eq.2026-01-31,id.gt.5)"
+    into a list of ("and"|"or", [...]) groups and (column, op, value) conditions.
+    """
+    terms = []
+    for part in _split_columns(expr):
+        if part.startswith(("and(", "or(")):
+            kind, inner = part.split("(", 1)
+            terms.append((kind, _split_logic(inner[:-1])))
+        else:
+            column, op, value = part.split(".", 2)
+            if op == "in":
+                value = [v.strip() for v in value.strip("()").split(",")]
+            terms.append((column, op, value))
+    return terms
+
+
+def _eval_logic(kind, terms, row):
+    results = (
+        _eval_logic(term[0], term[1], row) if term[0] in ("and", "or")
+        else _OPERATORS[term[1]](row.get(term[0]), term[2])
+        for term in terms
+    )
+    return all(results) if kind == "and" else any(results)
+
+
+def _normalize(value):
+    # Dates are stored as ISO strings, like PostgREST returns them
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+class _FakeQuery:
+    def __init__(self, backend, table_name, function=None):
+        self._backend = backend
+        self._table = table_name
+        self._function = function  # rpc(): (fn, params) producing the rows to select from
+        self._action = "select"
+        self._columns = "*"
+        self._count = None
+        self._filters = []  # (column, op, value)
+        self._orders = []  # (column, desc)
+        self._limit = None
+        self._offset = 0
+        self._payload = None
+        self._on_conflict = None
+
+    # --- actions ---
+    def select(self, columns="*", count=None):
+        self._action = "select"
+        self._columns = columns
+        self._count = count
+        return self
+
+    def upsert(self, rows, on_conflict=""):
+        self._action = "upsert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        self._on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()] or ["id"]
+        return self
+
+    def insert(self, rows):
+        self._action = "insert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, values):
+        self._action = "update"
+        self._payload = values
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    # --- filters ---
+    def _add(self, column, op, value):
+        self._filters.append((column, op, _normalize(value)))
+        return self
+
+    def eq(self, column, value):
+        return self._add(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._add(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._add(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._add(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._add(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._add(column, "lte", value)
+
+    def in_(self, column, values):
+        return self._add(column, "in", [_normalize(v) for v in values])
+
+    def or_(self, filters):
+        self._filters.append(("", "or", _split_logic(filters)))
+        return self
+
+    # --- modifiers ---
+    def order(self, column, desc=False):
+        self._orders.append((column, desc))
+        return self
+
+    def limit(self, size):
+        self._limit = size
+        return self
+
+    def range(self, start, end):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # --- execution ---
+    def execute(self):
+        self._backend._round_trip()
+        with self._backend._lock:
+            if self._function is not None:
+                fn, params = self._function
+                return self._run_select(fn(self._backend.tables, params))
+            rows = self._backend.tables.setdefault(self._table, [])
+            if self._action == "select":
+                return self._run_select(rows)
+            if self._action == "upsert":
+                return FakeResponse(self._run_upsert(rows))
+            if self._action == "insert":
+                return FakeResponse([self._insert(rows, r) for r in self._payload])
+            if self._action == "update":
+                matched = [r for r in rows if self._matches(r)]
+                for r in matched:
+                    r.update({k: _normalize(v) for k, v in self._payload.items()})
+                return FakeResponse([dict(r) for r in matched])
+            if self._action == "delete":
+                matched = [r for r in rows if self._matches(r)]
+                self._backend.tables[self._table] = [r for r in rows if not self._matches(r)]
+                return FakeResponse([dict(r) for r in matched])
+        raise ValueError(f"Unsupported action {self._action}")
+
+    def _insert(self, rows, row):
+        new_row = {k: _normalize(v) for k, v in row.items()}
+        new_row.setdefault("id", str(uuid.uuid4()))
+        new_row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        rows.append(new_row)
+        return dict(new_row)
+
+    def _run_upsert(self, rows):
+        index = {tuple(r.get(c) for c in self._on_conflict): r for r in rows}
+        written = []
+        for row in self._payload:
+            row = {k: _normalize(v) for k, v in row.items()}
+            key = tuple(row.get(c) for c in self._on_conflict)
+            existing = index.get(key)
+            if existing is not None:
+                existing.update(row)
+                written.append(dict(existing))
+            else:
+                inserted = self._insert(rows, row)
+                index[key] = rows[-1]
+                written.append(inserted)
+        return written
+
+    def _run_select(self, rows):
+        columns = _split_columns(self._columns)
+        embeds = {}  # name -> (inner, [columns])
+        plain = []
+        for col in columns:
+            if "(" in col:
+                name, inner_cols = col.split("(", 1)
+                inner = name.endswith("!inner")
+                name = name.replace("!inner", "").strip()
+                embeds[name] = (inner, [c.strip() for c in inner_cols.rstrip(")").split(",")])
+            else:
+                plain.append(col)
+
+        # Index embedded tables by id once per query
+        lookups = {
+            name: {r.get("id"): r for r in self._backend.tables.get(name, [])}
+            for name in embeds
+        }
+
+        result = []
+        for row in rows:
+            if not self._matches(row):
+                continue
+            shaped = dict(row) if "*" in plain else {c: row.get(c) for c in plain}
+            keep = True
+            for name, (inner, embed_cols) in embeds.items():
+                embedded = self._resolve_embed(name, row, embed_cols, lookups[name])
+                if embedded is None and inner:
+                    keep = False
+                    break
+                shaped[name] = embedded
+            if keep:
+                result.append(shaped)
+
+        for column, desc in reversed(self._orders):
+            result.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+
+        count = len(result) if self._count else None
+        end = None if self._limit is None else self._offset + self._limit
+        return FakeResponse(result[self._offset:end], count=count)
+
+    def _resolve_embed(self, name, row, embed_cols, lookup):
+        candidate = lookup.get(row.get(name.rstrip("s") + "_id"))
+        if candidate is None:
+            return None
+        for column, op, value in self._filters:
+            if column.startswith(name + "."):
+                if not _OPERATORS[op](candidate.get(column.split(".", 1)[1]), value):
+                    return None
+        if embed_cols == ["*"]:
+            return dict(candidate)
+        return {c: candidate.get(c) for c in embed_cols}
+
+    def _matches(self, row):
+        for column, op, value in self._filters:
+            if op == "or":
+                if not _eval_logic("or", value, row):
+                    return False
+            elif "." in column:
+                # Embedded filters are applied in _resolve_embed
+                continue
+            elif not _OPERATORS[op](row.get(column), value):
+                return False
+        return True
+
+
+class FakeSupabase:
+    """
+    In-memory stand-in for a Supabase client. Tables are plain lists of dicts,
+    so tests and benchmarks can seed them directly:
+
+        fake = FakeSupabase()
+        fake.tables["students"] = [{"id": "1", "register_number": "59", "section": "A"}]
+
+    `latency` (seconds) is slept on every execute() to model the network round trip;
+    `requests` counts executed queries.
+    """
+
+    def __init__(self, tables=None, latency: float = 0.0):
+        self.tables = tables if tables is not None else {}
+        self.auth = _FakeAuth()
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.RLock()
+
+    def _round_trip(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        if name not in FAKE_FUNCTIONS:
+            raise FakeAPIError(f"Could not find the function public.{name}", code="PGRST202")
+        return _FakeQuery(self, name, function=(FAKE_FUNCTIONS[name], params or {}))
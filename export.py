@@ -0,0 +1,139 @@
+import tempfile
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from config import get_secret
+from metrics import span
+from records import MAX_PAGE_SIZE, iter_attendance_pages
+
+# Streaming exports of filtered attendance records.
+# Rows are read page by page (keyset pagination, see records.py) and each page is
+# converted to an Arrow record batch and written out before the next is fetched,
+# so memory stays bounded by the page size whatever the date range.
+
+# Low-cardinality columns are dictionary-encoded (stored once, referenced by index)
+EXPORT_SCHEMA = pa.schema([
+    ("Date", pa.date32()),
+    ("Session", pa.dictionary(pa.int8(), pa.string())),
+    ("Register No", pa.string()),
+    ("Name", pa.string()),
+    ("Section", pa.dictionary(pa.int8(), pa.string())),
+    ("Status", pa.dictionary(pa.int8(), pa.string())),
+])
+
+# Rows per Parquet row group; readers can skip whole groups by date
+ROW_GROUP_SIZE = 100_000
+
+# Exports bigger than this are spooled to a temporary file instead of memory
+SPOOL_BYTES = 32 * 1024 * 1024
+
+# st.download_button reads the whole file into memory (and keeps it for the session),
+# so a download is capped at this many rows (about 12 MB of CSV).
+# Overridable with `max_rows` under [export].
+EXPORT_MAX_ROWS = 250_000
+
+EXPORT_FORMATS = {
+    "parquet": ("attendance_records.parquet", "application/vnd.apache.parquet"),
+    "csv": ("attendance_records.csv", "text/csv"),
+}
+
+
+def _dictionary(values):
+    return pa.array(values, pa.string()).dictionary_encode().cast(pa.dictionary(pa.int8(), pa.string()))
+
+
+def records_to_batch(records) -> pa.RecordBatch:
+    """
+    One Arrow record batch from attendance rows with their embedded student.
+    """
+    students = [r["students"] for r in records]
+    return pa.record_batch([
+        pa.array([date.fromisoformat(r["date"]) if isinstance(r["date"], str) else r["date"] for r in records], pa.date32()),
+        _dictionary([r["session"] for r in records]),
+        pa.array([s["register_number"] for s in students], pa.string()),
+        pa.array([s["full_name"] for s in students], pa.string()),
+        _dictionary([s["section"] for s in students]),
+        _dictionary([r["status"] for r in records]),
+    ], schema=EXPORT_SCHEMA)
+
+
+def export_row_limit() -> int:
+    return int(get_secret("export", "max_rows", EXPORT_MAX_ROWS))
+
+
+def iter_record_batches(supabase, filters: dict, page_size: int = MAX_PAGE_SIZE - 1, max_rows: int = None):
+    """
+    Yields one record batch per page of matching rows, in View Records order,
+    stopping after `max_rows` rows when it is set.
+    """
+    remaining = max_rows
+    for records in iter_attendance_pages(supabase, filters, page_size=page_size):
+        if remaining is not None:
+            records = records[:remaining]
+            remaining -= len(records)
+        yield records_to_batch(records)
+        if remaining == 0:
+            return
+
+
+def write_parquet(batches, sink, row_group_size: int = ROW_GROUP_SIZE, compression: str = "zstd") -> int:
+    """
+    Streams record batches into a Parquet file (path or binary file object).
+    Batches are buffered only up to one row group. Returns the number of rows written.
+    """
+    rows = 0
+    pending, pending_rows = [], 0
+    with pq.ParquetWriter(sink, EXPORT_SCHEMA, compression=compression) as writer:
+        for batch in batches:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= row_group_size:
+                writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_size)
+                rows += pending_rows
+                pending, pending_rows = [], 0
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending), row_group_size=row_group_size)
+            rows += pending_rows
+        if rows == 0:
+            # Still produce a valid file with the schema
+            writer.write_table(EXPORT_SCHEMA.empty_table())
+    return rows
+
+
+def write_csv(batches, sink) -> int:
+    """
+    Streams record batches into CSV (path or binary file object), header first.
+    Returns the number of rows written.
+    """
+    rows = 0
+    # Dictionary columns are written as their plain values
+    plain_schema = pa.schema([
+        pa.field(f.name, f.type.value_type if pa.types.is_dictionary(f.type) else f.type) for f in EXPORT_SCHEMA
+    ])
+    with pa_csv.CSVWriter(sink, plain_schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch.cast(plain_schema))
+            rows += batch.num_rows
+    return rows
+
+
+def export_records(supabase, filters: dict, fmt: str = "parquet", page_size: int = MAX_PAGE_SIZE - 1, max_rows: int = None):
+    """
+    Exports the rows matching `filters` as "parquet" or "csv", newest first, up to
+    `max_rows` (export_row_limit() by default).
+    Returns a binary file object positioned at the start; large exports live on disk.
+    """
+    if max_rows is None:
+        max_rows = export_row_limit()
+    writers = {"parquet": write_parquet, "csv": write_csv}
+    if fmt not in writers:
+        raise ValueError(f"Unknown export format {fmt!r}")
+
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    with span("export.records", format=fmt):
+        writers[fmt](iter_record_batches(supabase, filters, page_size, max_rows), output)
+    output.seek(0)
+    return output
@@ -0,0 +1,70 @@
+import io
+
+from PIL import Image, ImageChops, ImageOps
+
+# Screenshots are downscaled to at most this width before upload.
+# Chat text stays comfortably legible for OCR at this size.
+MAX_WIDTH = 1280
+
+# JPEG quality for the re-encoded upload (1-95)
+JPEG_QUALITY = 80
+
+PREP_OPTIONS = {
+    "max_width": MAX_WIDTH,
+    "quality": JPEG_QUALITY,
+    "grayscale": True,
+    "crop": True,
+}
+
+
+def _trim_borders(img: Image.Image) -> Image.Image:
+    """
+    Crops uniform margins (the colour of the top-left pixel) around the content.
+    """
+    background = Image.new(img.mode, img.size, img.getpixel((0, 0)))
+    bbox = ImageChops.difference(img, background).getbbox()
+    if bbox and bbox != (0, 0) + img.size:
+        return img.crop(bbox)
+    return img
+
+
+def preprocess_image(image_bytes: bytes, max_width: int = MAX_WIDTH, quality: int = JPEG_QUALITY,
+                     grayscale: bool = True, crop: bool = True):
+    """
+    Shrinks a screenshot before OCR upload: grayscale, trim margins, downscale to
+    `max_width` and re-encode as JPEG. Returns (bytes, mime_type, extension).
+
+    Memory stays bounded: JPEGs are decoded directly at reduced scale (draft mode)
+    and PNGs are reduced to 8-bit grayscale before any resampling. If the result
+    is not smaller than the original, the original is returned unchanged.
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    original_format = (img.format or "PNG").upper()
+
+    if grayscale:
+        # For JPEG this picks a reduced-size grayscale decode; must happen before pixels load
+        img.draft("L", (max_width, max_width * 4))
+
+    # Phone photos carry their rotation in EXIF; apply it before we drop metadata
+    img = ImageOps.exif_transpose(img)
+
+    if grayscale:
+        img = img.convert("L")
+    elif img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    if crop:
+        img = _trim_borders(img)
+
+    if img.width > max_width:
+        height = round(img.height * max_width / img.width)
+        img = img.resize((max_width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=quality, optimize=True)
+    processed = output.getvalue()
+
+    if len(processed) >= len(image_bytes):
+        mime = "image/png" if original_format == "PNG" else f"image/{original_format.lower()}"
+        return image_bytes, mime, original_format.lower()
+    return processed, "image/jpeg", "jpg"
@@ -0,0 +1,153 @@
+import re
+
+from attendance_parser import DATE_RE, HEADER_HINT_RE, SECTION_RE, SESSION_RE, parse_many
+from roster import get_rosters
+from utils import (
+    UPSERT_BATCH_SIZE,
+    build_attendance_rows,
+    upsert_attendance_rows,
+    validate_parsed_attendance,
+)
+
+# WhatsApp export message headers, e.g.
+#   Android: "31/01/2026, 09:15 - Staff Advisor: message"
+#   iOS:     "[31/01/26, 9:15:32 AM] Staff Advisor: message"
+MESSAGE_HEADER_RE = re.compile(
+    r"^\[?\d{1,2}[/.\-]\d{1,2}[/.\-]\d{2,4},?\s+\d{1,2}:\d{2}(?::\d{2})?(?:\s?[APap]\.?[Mm]\.?)?\]?\s*(?:-\s*)?[^:]{1,60}:\s?"
+)
+
+# Invisible direction marks WhatsApp sprinkles into exports
+_INVISIBLE_CHARS = dict.fromkeys(map(ord, "\u200e\u200f\u202a\u202c"), None)
+
+
+def _next_message_start(lines):
+    """
+    Index in the lines gathered so far where the next pasted message begins: bare
+    section lines (and blank lines after them) that sit right above its date line.
+    """
+    start = len(lines)
+    while start > 0 and not lines[start - 1].strip():
+        start -= 1
+    end_of_blanks = start
+    while start > 0 and _is_section_line(lines[start - 1]):
+        start -= 1
+    return start if start < end_of_blanks else len(lines)
+
+
+def _is_section_line(line: str) -> bool:
+    # "AD-B", "Section A": a section name with no dates, student numbers or status headers
+    line = line.strip()
+    return bool(
+        line
+        and SECTION_RE.search(line)
+        and not DATE_RE.search(line)
+        and not HEADER_HINT_RE.search(SECTION_RE.sub("", line))
+        and not re.search(r"\d", line)
+    )
+
+
+def split_export(text: str):
+    """
+    Splits a WhatsApp chat export (or several pasted messages) into per-message blocks
+    and keeps only the ones that look like attendance (a date and a session).
+
+    Exports are split on the timestamp headers. Plain pasted text without headers
+    is split before every line that contains a date; a section line written just
+    above the date (e.g. "AD-B") moves along with it into the new message.
+    """
+    lines = text.translate(_INVISIBLE_CHARS).split("\n")
+    has_headers = any(MESSAGE_HEADER_RE.match(line) for line in lines)
+
+    messages, current = [], []
+    for line in lines:
+        if has_headers:
+            header = MESSAGE_HEADER_RE.match(line)
+            if header:
+                if current:
+                    messages.append("\n".join(current))
+                current = [line[header.end():]]
+                continue
+        elif DATE_RE.search(line) and current:
+            start = _next_message_start(current)
+            if start:
+                messages.append("\n".join(current[:start]))
+            current = current[start:]
+        current.append(line)
+    if current:
+        messages.append("\n".join(current))
+
+    return [m for m in messages if DATE_RE.search(m) and SESSION_RE.search(m)]
+
+
+def ingest_export(supabase, text: str, batch_size: int = UPSERT_BATCH_SIZE, workers: int = None, progress=None):
+    """
+    Bulk mode for backfilling a semester from a chat export.
+
+    Splits the export into attendance messages, parses them (in parallel with
+    `workers` > 1), looks up the rosters of all sections at once and writes
+    every resulting row through chunked upserts of `batch_size` rows.
+
+    progress(fraction, text) is called as work advances (st.progress compatible).
+    Returns {"blocks": [per-block report], "rows_written": int, "error": str or None}.
+    """
+    def report(fraction, message):
+        if progress:
+            progress(min(fraction, 1.0), message)
+
+    blocks = split_export(text)
+    report(0.0, f"Found {len(blocks)} attendance messages. Parsing...")
+
+    parsed_blocks = parse_many(blocks, workers=workers)
+    report(0.2, "Parsed. Fetching rosters...")
+
+    block_reports = []
+    valid = []
+    for index, parsed in enumerate(parsed_blocks, start=1):
+        entry = {
+            "Block": index,
+            "Date": parsed.get("date"),
+            "Session": parsed.get("session"),
+            "Section": parsed.get("section"),
+            "Listed": len(parsed.get("records", [])),
+            "Rows": 0,
+            "Status": "OK",
+        }
+        error = validate_parsed_attendance(parsed)
+        if error:
+            entry["Status"] = f"Error: {error}"
+        else:
+            valid.append((entry, parsed))
+        block_reports.append(entry)
+
+    try:
+        rosters = get_rosters(supabase, {parsed["section"] for _, parsed in valid})
+    except Exception as e:
+        return {"blocks": block_reports, "rows_written": 0, "error": f"Roster fetch failed: {e}"}
+
+    rows = []
+    for entry, parsed in valid:
+        roster = rosters.get(parsed["section"])
+        if not roster:
+            entry["Status"] = f"Error: No student records found for Section {parsed['section']}."
+            continue
+        block_rows = build_attendance_rows(parsed, roster)
+        entry["Rows"] = len(block_rows)
+        rows.extend(block_rows)
+
+    report(0.3, f"Writing {len(rows)} rows in batches of {batch_size}...")
+
+    written = 0
+
+    def chunk_progress(done, total):
+        nonlocal written
+        written = done
+        report(0.3 + 0.7 * done / total, f"Written {done} / {total} rows")
+
+    try:
+        upsert_attendance_rows(supabase, rows, batch_size=batch_size, progress=chunk_progress)
+    except Exception as e:
+        # Earlier chunks are committed; upserts make a retry safe
+        return {"blocks": block_reports, "rows_written": written, "error": str(e)}
+
+    report(1.0, "Done.")
+    return {"blocks": block_reports, "rows_written": written, "error": None}
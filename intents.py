@@ -0,0 +1,263 @@
+import re
+from datetime import date, datetime, timedelta
+
+# Deterministic answers for the questions staff ask most, e.g.
+#   "Who was absent on Jan 31st?"
+#   "Who was on OD this week in section B?"
+#   "What is the attendance percentage of 59?"
+# Anything that doesn't fully match one of these shapes goes to the LLM agent.
+# The queries run through the agent's GuardedSQLDatabase (sql_guard.py), so they
+# get the same statement timeout and row cap as the SQL the agent writes.
+
+# PARAMETERIZED QUERIES (SQLAlchemy caches their compiled form)
+
+# One day: every matching record. `matches` is the count before the row cap.
+STATUS_ON_DAY_SQL = """
+    SELECT a.date, a.session, s.register_number, s.full_name, s.section, COUNT(*) OVER () AS matches
+    FROM attendance a
+    JOIN students s ON s.id = a.student_id
+    WHERE a.date BETWEEN :start AND :end
+      AND a.status = :status
+      AND (CAST(:section AS TEXT) IS NULL OR s.section = :section)
+      AND (CAST(:session AS TEXT) IS NULL OR a.session = :session)
+    ORDER BY a.date, a.session, s.section, LENGTH(s.register_number), s.register_number
+"""
+
+# Longer ranges: one row per student with how many sessions matched, since
+# "who was present this month" would otherwise list nearly every record
+STATUS_IN_RANGE_SQL = """
+    SELECT s.register_number, s.full_name, s.section, COUNT(*) AS sessions, COUNT(*) OVER () AS matches
+    FROM attendance a
+    JOIN students s ON s.id = a.student_id
+    WHERE a.date BETWEEN :start AND :end
+      AND a.status = :status
+      AND (CAST(:section AS TEXT) IS NULL OR s.section = :section)
+      AND (CAST(:session AS TEXT) IS NULL OR a.session = :session)
+    GROUP BY s.id, s.register_number, s.full_name, s.section
+    ORDER BY s.section, LENGTH(s.register_number), s.register_number
+"""
+
+STUDENT_PERCENTAGE_SQL = """
+    SELECT
+        s.register_number,
+        s.full_name,
+        s.section,
+        COUNT(a.id) AS total,
+        COALESCE(SUM(CASE WHEN a.status IN ('Present', 'OD', 'Late') THEN 1 ELSE 0 END), 0) AS present
+    FROM students s
+    LEFT JOIN attendance a ON a.student_id = s.id
+    WHERE s.register_number = :register_number
+    GROUP BY s.id, s.register_number, s.full_name, s.section
+"""
+
+# QUESTION SHAPES
+
+STATUS_WORDS = {
+    "absent": "Absent",
+    "absentees": "Absent",
+    "od": "OD",
+    "on od": "OD",
+    "on duty": "OD",
+    "late": "Late",
+    "present": "Present",
+}
+
+STATUS_QUESTION_RE = re.compile(
+    r"^\s*(?:list|show(?:\s+me)?|tell\s+me)?\s*"
+    r"(?:who|which\s+students?)\s+(?:was|were|is|are|came)\s+"
+    r"(?P<status>absent|on\s+od|od|on\s+duty|late|present)\b(?P<rest>.*)$",
+    re.IGNORECASE,
+)
+
+PERCENTAGE_QUESTION_RES = [
+    re.compile(
+        r"^\s*(?:what\s+is|what's|show(?:\s+me)?|get|tell\s+me)?\s*(?:the\s+)?(?:attendance\s+)?"
+        r"(?:percentage|percent|%)\s+(?:of|for)\s+(?:student\s+)?(?:reg(?:ister)?\.?\s*(?:no\.?|number)\s*)?"
+        r"(?P<register_number>\d{1,6})\s*\??\s*$",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"^\s*(?:what\s+is|what's|show(?:\s+me)?|get|tell\s+me)?\s*(?:the\s+)?(?:student\s+)?"
+        r"(?P<register_number>\d{1,6})(?:'s)?\s+attendance(?:\s+(?:percentage|percent|%))?\s*\??\s*$",
+        re.IGNORECASE,
+    ),
+]
+
+SECTION_RE = re.compile(r"\b(?:in\s+|for\s+|of\s+)?(?:section|sec|ad)[\s-]*(?P<section>[ab])\b", re.IGNORECASE)
+SESSION_RE = re.compile(r"\b(?:in\s+the\s+|in\s+|during\s+the\s+|during\s+)?(?P<session>morning|afternoon)(?:\s+session)?\b", re.IGNORECASE)
+
+MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+DATE_PATTERNS = [
+    # 2026-01-31
+    (re.compile(r"\b(?P<y>\d{4})-(?P<m>\d{1,2})-(?P<d>\d{1,2})\b"), "iso"),
+    # 31/01/2026, 31-01-2026, 31.01.26
+    (re.compile(r"\b(?P<d>\d{1,2})[/.\-](?P<m>\d{1,2})[/.\-](?P<y>\d{2,4})\b"), "numeric"),
+    # 31st Jan 2026, 31 January
+    (re.compile(rf"\b(?P<d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<mon>{MONTHS})\.?(?:,?\s+(?P<y>\d{{4}}))?\b", re.IGNORECASE), "day_month"),
+    # Jan 31st, January 31 2026
+    (re.compile(rf"\b(?P<mon>{MONTHS})\.?\s+(?P<d>\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(?P<y>\d{{4}}))?\b", re.IGNORECASE), "month_day"),
+]
+RELATIVE_RANGE_RE = re.compile(r"\b(?P<range>today|yesterday|this\s+week|last\s+week|this\s+month|last\s+month)\b", re.IGNORECASE)
+
+# What may remain of a question once every recognised part is removed
+FILLER_RE = re.compile(r"^(?:\s|[?.!,]|\b(?:on|in|for|of|the|during|session|date|day|students?)\b)*$", re.IGNORECASE)
+
+
+def _parse_date(match, kind, today):
+    groups = match.groupdict()
+    year = groups.get("y")
+    year = int(year) if year else today.year
+    if year < 100:
+        year += 2000
+    if kind in ("iso", "numeric"):
+        return date(year, int(groups["m"]), int(groups["d"]))
+    month = datetime.strptime(groups["mon"][:3].title(), "%b").month
+    return date(year, month, int(groups["d"]))
+
+
+def _relative_range(name, today):
+    name = " ".join(name.lower().split())
+    if name == "today":
+        return today, today
+    if name == "yesterday":
+        day = today - timedelta(days=1)
+        return day, day
+    if name == "this week":
+        return today - timedelta(days=today.weekday()), today
+    if name == "last week":
+        start = today - timedelta(days=today.weekday() + 7)
+        return start, start + timedelta(days=6)
+    if name == "this month":
+        return today.replace(day=1), today
+    # last month
+    end = today.replace(day=1) - timedelta(days=1)
+    return end.replace(day=1), end
+
+
+def route_question(question: str, today: date = None):
+    """
+    Recognises a common question shape. Returns (intent, params) or None.
+    Intents: "status_in_range", "student_percentage".
+    """
+    today = today or date.today()
+
+    for pattern in PERCENTAGE_QUESTION_RES:
+        match = pattern.match(question)
+        if match:
+            return "student_percentage", {"register_number": match.group("register_number")}
+
+    match = STATUS_QUESTION_RE.match(question)
+    if not match:
+        return None
+
+    params = {
+        "status": STATUS_WORDS[" ".join(match.group("status").lower().split())],
+        "section": None,
+        "session": None,
+    }
+    rest = match.group("rest")
+
+    section = SECTION_RE.search(rest)
+    if section:
+        params["section"] = section.group("section").upper()
+        rest = rest[:section.start()] + " " + rest[section.end():]
+
+    session = SESSION_RE.search(rest)
+    if session:
+        params["session"] = session.group("session").title()
+        rest = rest[:session.start()] + " " + rest[session.end():]
+
+    relative = RELATIVE_RANGE_RE.search(rest)
+    if relative:
+        params["start"], params["end"] = _relative_range(relative.group("range"), today)
+        rest = rest[:relative.start()] + " " + rest[relative.end():]
+    else:
+        for pattern, kind in DATE_PATTERNS:
+            found = pattern.search(rest)
+            if found:
+                try:
+                    params["start"] = params["end"] = _parse_date(found, kind, today)
+                except ValueError:
+                    return None
+                rest = rest[:found.start()] + " " + rest[found.end():]
+                break
+        else:
+            # "Who was absent?" with no date means today
+            params["start"] = params["end"] = today
+
+    # Anything else in the question (names, counts, conditions...) needs the agent
+    if not FILLER_RE.match(rest):
+        return None
+    return "status_in_range", params
+
+
+def _format_day(day):
+    return day.strftime("%d %b %Y") if hasattr(day, "strftime") else str(day)
+
+
+def _answer_status_in_range(db, params):
+    single_day = params["end"] == params["start"]
+    rows, _ = db.fetch(STATUS_ON_DAY_SQL if single_day else STATUS_IN_RANGE_SQL, params)
+
+    period = _format_day(params["start"])
+    if params["end"] != params["start"]:
+        period = f"{period} – {_format_day(params['end'])}"
+    scope = ", ".join(filter(None, [
+        f"Section {params['section']}" if params["section"] else None,
+        params["session"],
+    ]))
+    title = f"**{params['status']}** on {period}" + (f" ({scope})" if scope else "")
+
+    if not rows:
+        return f"{title}: nobody."
+
+    matches = rows[0]["matches"]
+    if single_day:
+        lines = [f"{title}: {matches} record(s)", ""]
+        lines += ["| Date | Session | Register No | Name | Section |", "|---|---|---|---|---|"]
+        lines += [
+            f"| {_format_day(r['date'])} | {r['session']} | {r['register_number']} | {r['full_name']} | {r['section']} |"
+            for r in rows
+        ]
+    else:
+        lines = [f"{title}: {matches} student(s)", ""]
+        lines += [f"| Register No | Name | Section | {params['status']} sessions |", "|---|---|---|---|"]
+        lines += [f"| {r['register_number']} | {r['full_name']} | {r['section']} | {r['sessions']} |" for r in rows]
+    if matches > len(rows):
+        lines += ["", f"…and {matches - len(rows)} more. Narrow it down by section, session or date to see them."]
+    return "\n".join(lines)
+
+
+def _answer_student_percentage(db, params):
+    rows, _ = db.fetch(STUDENT_PERCENTAGE_SQL, params)
+    row = rows[0] if rows else None
+    if row is None:
+        return f"No student with register number {params['register_number']}."
+    if not row["total"]:
+        return f"{row['full_name']} ({row['register_number']}, Section {row['section']}) has no attendance records yet."
+
+    percentage = row["present"] * 100 / row["total"]
+    return (
+        f"**{row['full_name']}** ({row['register_number']}, Section {row['section']}): "
+        f"**{percentage:.2f}%** — present (incl. OD/Late) in {row['present']} of {row['total']} sessions."
+    )
+
+
+_HANDLERS = {
+    "status_in_range": _answer_status_in_range,
+    "student_percentage": _answer_student_percentage,
+}
+
+
+def answer_fast(db, question: str, today: date = None):
+    """
+    Answers `question` straight from the database if it matches a known shape.
+    `db` is the agent's GuardedSQLDatabase (chatbot.get_sql_database).
+    Returns (markdown answer, intent name), or None when the agent should handle it.
+    """
+    routed = route_question(question, today)
+    if routed is None:
+        return None
+
+    intent, params = routed
+    return _HANDLERS[intent](db, params), intent
@@ -0,0 +1,251 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config import get_secret
+from attendance_parser import parse_attendance_text
+from ingest import ingest_export
+from ocr import extract_text, ocr_url, prep_settings
+from roster import get_roster, unknown_register_numbers
+from journal import save_attendance, save_message
+from utils import validate_parsed_attendance
+
+# Uploads processed at the same time by the whole server process.
+# Jobs are I/O bound (OCR API, Supabase), so threads are enough.
+JOB_WORKERS = 4
+
+# Where job status is kept; survives restarts so the status panel outlives the worker
+JOBS_DB_PATH = "jobs.sqlite3"
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    owner TEXT,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_owner_created ON jobs (owner, created_at);
+"""
+
+
+def is_ocr_error(text):
+    return text.startswith(("Error", "OCR Error", "OCR Request Failed"))
+
+
+class JobFailed(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Runs ingestion jobs (OCR -> parse -> validate -> write) on a worker pool.
+    submit_*() returns a job id at once; status, stage and result are persisted in
+    SQLite so any page or session can poll them with get() / list_jobs().
+
+    Payloads (image bytes, text) only live in memory. Jobs that were still queued
+    or running when the process stopped are marked "interrupted" on the next start.
+    """
+
+    def __init__(self, db_path: str = JOBS_DB_PATH, workers: int = JOB_WORKERS):
+        self.db_path = db_path
+        self._db_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest-job")
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(
+                "UPDATE jobs SET status = 'interrupted', message = 'Server restarted before the job finished.', "
+                "updated_at = ? WHERE status IN (?, ?)",
+                (time.time(), *ACTIVE_STATUSES),
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:  # commits, or rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    # Persistence
+
+    def _insert(self, job_id, kind, name, owner):
+        now = time.time()
+        with self._db_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, name, owner, status, progress, message, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', 0, 'Waiting for a worker...', ?, ?)",
+                (job_id, kind, name, owner, now, now),
+            )
+
+    def _update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{column} = ?" for column in fields)
+        with self._db_lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    @staticmethod
+    def _row_to_job(row):
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, owner=None, limit: int = 50):
+        """
+        Newest first. With `owner`, only that user's jobs.
+        """
+        query, params = "SELECT * FROM jobs", ()
+        if owner is not None:
+            query, params = query + " WHERE owner = ?", (owner,)
+        with self._connect() as conn:
+            rows = conn.execute(f"{query} ORDER BY created_at DESC LIMIT ?", (*params, limit)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def clear_finished(self, owner=None):
+        query, params = "DELETE FROM jobs WHERE status NOT IN (?, ?)", ACTIVE_STATUSES
+        if owner is not None:
+            query, params = query + " AND owner = ?", (*params, owner)
+        with self._db_lock, self._connect() as conn:
+            conn.execute(query, params)
+
+    # Submission
+
+    def _submit(self, kind, name, owner, work):
+        job_id = uuid.uuid4().hex[:12]
+        self._insert(job_id, kind, name, owner)
+        self._pool.submit(self._run, job_id, work)
+        return job_id
+
+    def submit_image(self, supabase, image_bytes: bytes, filename: str, mime_type: str, api_key: str,
+                     ocr_url: str = None, prep: dict = None, owner: str = None):
+        """
+        Queues a screenshot for OCR, parsing and saving. Settings are resolved by the
+        caller: worker threads have no Streamlit script context.
+        """
+        def work(job_id):
+            self._stage(job_id, "ocr", 0.1, "Reading the screenshot...")
+            text = extract_text(image_bytes, filename, mime_type, api_key, url=ocr_url, prep=prep)
+            if is_ocr_error(text):
+                raise JobFailed(text)
+            return self._parse_and_save(job_id, supabase, text, owner)
+
+        return self._submit("image", filename, owner, work)
+
+    def submit_images(self, supabase, images, api_key: str, owner: str = None):
+        """
+        Queues several (bytes, filename, mime_type) screenshots, one job each.
+        Call from the script thread: OCR settings are read from secrets here.
+        """
+        url, prep = ocr_url(), prep_settings()
+        return [
+            self.submit_image(supabase, data, filename, mime_type, api_key, ocr_url=url, prep=prep, owner=owner)
+            for data, filename, mime_type in images
+        ]
+
+    def submit_text(self, supabase, text: str, name: str = "Pasted text", owner: str = None):
+        """
+        Queues one attendance message for parsing and saving.
+        """
+        return self._submit("text", name, owner, lambda job_id: self._parse_and_save(job_id, supabase, text, owner))
+
+    def submit_export(self, supabase, text: str, name: str = "Chat export", batch_size: int = None,
+                      workers: int = None, owner: str = None):
+        """
+        Queues a bulk import of a chat export (see ingest.ingest_export).
+        """
+        def work(job_id):
+            self._stage(job_id, "write", 0.0, "Starting...")
+            kwargs = {"batch_size": batch_size} if batch_size else {}
+            result = ingest_export(
+                supabase, text, workers=workers,
+                progress=lambda fraction, message: self._update(job_id, progress=fraction, message=message),
+                **kwargs,
+            )
+            failed = sum(1 for block in result["blocks"] if block["Status"] != "OK")
+            summary = {"rows_written": result["rows_written"], "messages": len(result["blocks"]), "failed_messages": failed}
+            if result["error"]:
+                raise JobFailed(f"{result['error']} ({result['rows_written']} rows were saved before the failure)")
+            return summary, f"Imported {len(result['blocks']) - failed} messages ({result['rows_written']} records), {failed} with errors."
+
+        return self._submit("export", name, owner, work)
+
+    # Pipeline
+
+    def _stage(self, job_id, stage, progress, message):
+        self._update(job_id, stage=stage, progress=progress, message=message)
+
+    def _parse_and_save(self, job_id, supabase, text, owner=None):
+        self._stage(job_id, "parse", 0.4, "Parsing...")
+        parsed = parse_attendance_text(text)
+
+        self._stage(job_id, "validate", 0.5, "Checking...")
+        error = validate_parsed_attendance(parsed)
+        if error:
+            raise JobFailed(error)
+        warnings = []
+        try:
+            unknown = unknown_register_numbers(parsed, get_roster(supabase, parsed["section"]))
+            if unknown:
+                warnings.append(f"Not in the Section {parsed['section']} roster: {', '.join(unknown)}")
+        except Exception as e:
+            warnings.append(f"Could not check register numbers against the roster: {e}")
+
+        self._stage(job_id, "write", 0.7, "Saving...")
+        # Same path as "Confirm and Save": through the journal when it is enabled
+        saved = save_attendance(supabase, parsed, owner=owner)
+        if "error" in saved:
+            raise JobFailed(f"Database Error: {saved['error']}")
+
+        message = f"{saved['section']} - {saved['date']} ({saved['session']}): {save_message(saved)}"
+        return {**saved, "listed": len(parsed["records"]), "warnings": warnings}, message
+
+    def _run(self, job_id, work):
+        self._update(job_id, status="running")
+        try:
+            result, message = work(job_id)
+        except JobFailed as e:
+            self._update(job_id, status="failed", error=str(e), message=str(e))
+        except Exception as e:
+            self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}", message="Unexpected error.")
+        else:
+            self._update(job_id, status="done", progress=1.0, result=result, message=message)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """
+    The process-wide queue. Set `workers` and `db_path` under [jobs] to tune it.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                db_path=get_secret("jobs", "db_path", JOBS_DB_PATH),
+                workers=int(get_secret("jobs", "workers", JOB_WORKERS)),
+            )
+        return _queue
@@ -0,0 +1,429 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from config import get_secret
+from database import get_client
+from metrics import increment, span
+from roster import get_roster, invalidate_roster
+from utils import (
+    UPSERT_BATCH_SIZE,
+    build_attendance_rows,
+    diff_attendance_rows,
+    mark_attendance,
+    upsert_attendance_rows,
+    validate_parsed_attendance,
+)
+
+# Write-behind journal for attendance saves.
+#
+# A save is committed to a local SQLite file and returns at once; a flusher
+# thread pushes the rows to Supabase in batched upserts. Rows are keyed by
+# (student_id, date, session) like the attendance table, so a row saved twice
+# before it is flushed is sent once, with the latest status. Like
+# mark_attendance, the flusher diffs each (section, date, session) against the
+# stored rows and only upserts what changed. Upserts on that key are
+# idempotent, which makes retrying a batch after a failure safe.
+
+# Where pending saves are kept until Supabase has them
+JOURNAL_DB_PATH = "attendance_journal.sqlite3"
+
+# Seconds between flush attempts when nothing wakes the flusher earlier
+FLUSH_INTERVAL = 2.0
+
+# Backoff after a failed flush: doubles from RETRY_MIN up to RETRY_MAX seconds
+RETRY_MIN = 1.0
+RETRY_MAX = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS saves (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT,
+    section TEXT NOT NULL,
+    date TEXT NOT NULL,
+    session TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    inserted INTEGER NOT NULL DEFAULT 0,
+    updated INTEGER NOT NULL DEFAULT 0,
+    unchanged INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    flushed_at REAL
+);
+CREATE INDEX IF NOT EXISTS saves_owner_created ON saves (owner, created_at);
+
+-- One row per attendance key: a newer save overwrites an unflushed older one
+CREATE TABLE IF NOT EXISTS pending_rows (
+    student_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    session TEXT NOT NULL,
+    status TEXT NOT NULL,
+    save_id INTEGER NOT NULL,
+    PRIMARY KEY (student_id, date, session)
+);
+CREATE INDEX IF NOT EXISTS pending_rows_save ON pending_rows (save_id);
+"""
+
+# Columns added to saves after the first release, for journals created before them
+_SAVES_COLUMNS = {
+    "inserted": "INTEGER NOT NULL DEFAULT 0",
+    "updated": "INTEGER NOT NULL DEFAULT 0",
+    "unchanged": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+def _is_permanent(error) -> bool:
+    """
+    True for errors a retry can't fix: Postgres integrity (23xxx) and data (22xxx)
+    errors, e.g. a student deleted after the save was journaled.
+    """
+    return str(getattr(error, "code", "") or "").startswith(("22", "23"))
+
+
+class AttendanceJournal:
+    """
+    Durable local buffer between "Confirm and Save" and Supabase.
+
+    record() journals a save and returns its id; flush() sends pending rows
+    upstream, oldest save first. start() runs flush() on a background thread
+    that wakes on every new save and backs off while Supabase is failing.
+    Saves are "pending" until every row is upstream, then "flushed" with how
+    many rows were inserted, updated or already stored; a save Supabase
+    rejects for good (see _is_permanent) is "failed" and dropped.
+    """
+
+    def __init__(self, db_path: str = JOURNAL_DB_PATH, batch_size: int = UPSERT_BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.last_error = None
+        self.last_flush_at = None
+        self._db_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(saves)")}
+            for column, definition in _SAVES_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE saves ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:  # commits, or rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    # Writing
+
+    def record(self, rows, section: str, owner: str = None) -> int:
+        """
+        Journals attendance rows of one (section, date, session) save in one
+        local transaction and wakes the flusher. Returns the save id.
+        """
+        with self._db_lock, self._connect() as conn:
+            save_id = conn.execute(
+                "INSERT INTO saves (owner, section, date, session, rows, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+                (owner, section, rows[0]["date"], rows[0]["session"], len(rows), time.time()),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO pending_rows (student_id, date, session, status, save_id) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (student_id, date, session) DO UPDATE "
+                "SET status = excluded.status, save_id = excluded.save_id",
+                [(r["student_id"], r["date"], r["session"], r["status"], save_id) for r in rows],
+            )
+        increment("journal.rows", len(rows), result="recorded")
+        self._wake.set()
+        return save_id
+
+    # Reading
+
+    def get(self, save_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM saves WHERE id = ?", (save_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_saves(self, owner=None, limit: int = 20):
+        """
+        Newest first. With `owner`, only that user's saves.
+        """
+        query, params = "SELECT * FROM saves", ()
+        if owner is not None:
+            query, params = query + " WHERE owner = ?", (owner,)
+        with self._connect() as conn:
+            rows = conn.execute(f"{query} ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def pending_rows(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pending_rows").fetchone()[0]
+
+    def clear_finished(self, owner=None):
+        query, params = "DELETE FROM saves WHERE status <> 'pending'", ()
+        if owner is not None:
+            query, params = query + " AND owner = ?", (owner,)
+        with self._db_lock, self._connect() as conn:
+            conn.execute(query, params)
+
+    # Flushing
+
+    def _next_batch(self):
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT p.student_id, p.date, p.session, p.status, p.save_id, s.section "
+                "FROM pending_rows p JOIN saves s ON s.id = p.save_id ORDER BY p.save_id LIMIT ?",
+                (self.batch_size,),
+            )]
+
+    def _mark_sent(self, batch, counts):
+        """
+        Drops sent rows, unless a newer save replaced them meanwhile, adds
+        `counts` ({save_id: (inserted, updated, unchanged)}) to their saves and
+        marks saves with nothing left pending as flushed.
+        """
+        with self._db_lock, self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM pending_rows WHERE student_id = ? AND date = ? AND session = ? AND save_id = ?",
+                [(r["student_id"], r["date"], r["session"], r["save_id"]) for r in batch],
+            )
+            conn.executemany(
+                "UPDATE saves SET inserted = inserted + ?, updated = updated + ?, unchanged = unchanged + ? "
+                "WHERE id = ?",
+                [(*save_counts, save_id) for save_id, save_counts in counts.items()],
+            )
+            conn.execute(
+                "UPDATE saves SET status = 'flushed', flushed_at = ?, error = NULL "
+                "WHERE status = 'pending' AND id NOT IN (SELECT save_id FROM pending_rows)",
+                (time.time(),),
+            )
+
+    def _mark_attempt(self, save_ids, error, status="pending"):
+        with self._db_lock, self._connect() as conn:
+            if status == "failed":
+                conn.executemany("DELETE FROM pending_rows WHERE save_id = ?", [(i,) for i in save_ids])
+            conn.executemany(
+                "UPDATE saves SET attempts = attempts + 1, error = ?, status = ? WHERE id = ?",
+                [(error, status, i) for i in save_ids],
+            )
+
+    def _send(self, supabase, batch):
+        """
+        Diffs `batch` per (section, date, session) against the stored rows and
+        upserts the inserts and updates. Returns {save_id: (inserted, updated,
+        unchanged)}.
+        """
+        groups = {}
+        for row in batch:
+            groups.setdefault((row["section"], row["date"], row["session"]), []).append(row)
+
+        changed, counts = [], {}
+        for (section, _, _), group in groups.items():
+            rows = [{k: r[k] for k in ("student_id", "date", "session", "status")} for r in group]
+            inserts, updates, _ = diff_attendance_rows(supabase, rows, section)
+            inserted = {r["student_id"] for r in inserts}
+            updated = {r["student_id"] for r in updates}
+            changed += inserts + updates
+            for row in group:
+                save_counts = counts.setdefault(row["save_id"], [0, 0, 0])
+                if row["student_id"] in inserted:
+                    save_counts[0] += 1
+                elif row["student_id"] in updated:
+                    save_counts[1] += 1
+                else:
+                    save_counts[2] += 1
+
+        if changed:
+            upsert_attendance_rows(supabase, changed, batch_size=self.batch_size)
+        return counts
+
+    def flush(self, supabase) -> int:
+        """
+        Sends every pending row, oldest save first. Returns the number of rows
+        flushed, unchanged ones included.
+        Raises on the first batch that fails for a reason worth retrying; rows
+        stay journaled and the next flush picks them up again.
+        """
+        sent = 0
+        with self._flush_lock:
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    break
+                save_ids = sorted({r["save_id"] for r in batch})
+                try:
+                    with span("journal.flush"):
+                        counts = self._send(supabase, batch)
+                except Exception as e:
+                    if not _is_permanent(e):
+                        self._mark_attempt(save_ids, f"Retrying: {e}")
+                        increment("journal.flush_failures")
+                        raise
+                    # One bad save must not hold back the others in the batch
+                    flushed = self._flush_one_by_one(supabase, batch)
+                else:
+                    self._mark_sent(batch, counts)
+                    flushed = len(batch)
+                sent += flushed
+                increment("journal.rows", flushed, result="flushed")
+        self.last_flush_at = time.time()
+        return sent
+
+    def _flush_one_by_one(self, supabase, batch):
+        """
+        Sends `batch` one save at a time, failing the saves Supabase rejects.
+        Returns the number of rows sent.
+        """
+        sent = 0
+        by_save = {}
+        for row in batch:
+            by_save.setdefault(row["save_id"], []).append(row)
+        for save_id, rows in by_save.items():
+            try:
+                counts = self._send(supabase, rows)
+            except Exception as e:
+                if not _is_permanent(e):
+                    raise
+                self._mark_attempt([save_id], str(e), status="failed")
+                increment("journal.rows", len(rows), result="failed")
+                # The cached roster may hold a deleted student; refetch it next time
+                save = self.get(save_id)
+                invalidate_roster(save["section"] if save else None)
+            else:
+                self._mark_sent(rows, counts)
+                sent += len(rows)
+        return sent
+
+    def start(self, client_factory=get_client):
+        """
+        Starts the background flusher (once). `client_factory` is called before
+        every flush so a replaced, healthy client is picked up.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(client_factory,), name="journal-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self, client_factory):
+        delay, failures = 0.0, 0  # flush whatever an earlier run left behind right away
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.flush(client_factory())
+            except Exception as e:
+                self.last_error = str(e)
+                failures += 1
+                # Sleep through the backoff even if new saves arrive, then retry
+                self._stop.wait(min(RETRY_MIN * 2 ** (failures - 1), RETRY_MAX))
+                delay = 0.0
+                continue
+            self.last_error, failures = None, 0
+            delay = self.flush_interval
+
+
+def journal_attendance(journal: AttendanceJournal, supabase, parsed_data: dict, owner: str = None):
+    """
+    mark_attendance() through the journal: validates, builds one row per student
+    of the section and journals them. Only the roster lookup may reach Supabase,
+    and a cached roster is used even if expired when Supabase can't be reached.
+    Every row is journaled; the flusher diffs them against the stored rows and
+    records the inserted/updated/unchanged counts on the save.
+    """
+    error = validate_parsed_attendance(parsed_data)
+    if error:
+        return {"error": error}
+
+    section = parsed_data["section"]
+    try:
+        roster = get_roster(supabase, section, allow_stale=True)
+    except Exception as e:
+        return {"error": str(e)}
+
+    if not roster:
+        return {"error": f"No student records found for Section {section}. Please populate 'students' table first."}
+
+    rows = build_attendance_rows(parsed_data, roster)
+    if not rows:
+        return {"error": "No records generated."}
+
+    with span("save.journal"):
+        save_id = journal.record(rows, section, owner=owner)
+
+    return {
+        "success": True,
+        "pending": True,
+        "save_id": save_id,
+        "count": len(rows),
+        "date": parsed_data["date"],
+        "session": parsed_data["session"],
+        "section": section,
+    }
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> AttendanceJournal:
+    """
+    The process-wide journal, with its flusher running. Set `db_path` and
+    `flush_interval` under [journal] to tune it.
+    """
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = AttendanceJournal(
+                db_path=get_secret("journal", "db_path", JOURNAL_DB_PATH),
+                flush_interval=float(get_secret("journal", "flush_interval", FLUSH_INTERVAL)),
+            )
+            _journal.start()
+        return _journal
+
+
+def journal_enabled() -> bool:
+    """
+    Saves go through the journal unless [journal] enabled = false.
+    """
+    return str(get_secret("journal", "enabled", "true")).lower() not in ("0", "false", "no")
+
+
+def save_attendance(supabase, parsed_data: dict, owner: str = None):
+    """
+    Saves through the journal (returns at once, synced in the background)
+    unless [journal] enabled = false, in which case it writes to Supabase directly.
+    Used by the Upload page and by background jobs alike.
+    """
+    if journal_enabled():
+        return journal_attendance(get_journal(), supabase, parsed_data, owner=owner)
+    return mark_attendance(supabase, parsed_data)
+
+
+def save_message(save_result) -> str:
+    if save_result.get("pending"):
+        return f"{save_result['count']} records saved locally, syncing to Supabase (see Saves below)."
+    if save_result.get("inserted") is None:
+        # Saved without a diff (mark_attendance(delta=False)): no new/changed split
+        return f"{save_result['count']} written."
+    return f"{save_result['inserted']} new, {save_result['updated']} changed, {save_result['unchanged']} already up to date."
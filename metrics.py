@@ -0,0 +1,279 @@
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import get_secret
+
+# In-process timing spans and counters for the hot paths (OCR, parsing, database, LLM).
+#
+#     with span("db.attendance_upsert", table="attendance"):
+#         ...
+#
+# Each span name + label set is one series. Durations go into a Prometheus-style
+# histogram plus a window of recent samples for exact p50/p95/p99.
+# Set `enabled = false` under [metrics] to turn every span into a shared no-op.
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Recent samples kept per series for percentiles
+WINDOW = 2048
+
+METRIC_PREFIX = "attendance"
+
+
+class _Series:
+    __slots__ = ("count", "errors", "total", "max", "buckets", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+        self.recent = deque(maxlen=WINDOW)
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of span histograms and counters. One per process (get_registry()).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}  # (name, labels) -> _Series
+        self._counters = {}  # (name, labels) -> float
+        self.started_at = time.time()
+
+    def observe(self, name, seconds, labels=(), error=False):
+        key = (name, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.count += 1
+            series.errors += error
+            series.total += seconds
+            if seconds > series.max:
+                series.max = seconds
+            series.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            series.recent.append(seconds)
+
+    def increment(self, name, value=1, labels=()):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """
+        One dict per span series (count, errors, p50/p95/p99/max/mean in ms), slowest p95 first.
+        """
+        with self._lock:
+            copies = [(name, labels, s.count, s.errors, s.total, s.max, sorted(s.recent))
+                      for (name, labels), s in self._series.items()]
+
+        rows = []
+        for name, labels, count, errors, total, maximum, ordered in copies:
+            rows.append({
+                "span": name,
+                "labels": ", ".join(f"{k}={v}" for k, v in labels),
+                "count": count,
+                "errors": errors,
+                "p50_ms": round(_percentile(ordered, 0.50) * 1000, 2),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+                "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+                "max_ms": round(maximum * 1000, 2),
+                "mean_ms": round(total / count * 1000, 2),
+                "total_s": round(total, 3),
+            })
+        return sorted(rows, key=lambda r: r["p95_ms"], reverse=True)
+
+    def counters(self):
+        with self._lock:
+            items = list(self._counters.items())
+        return [
+            {"counter": name, "labels": ", ".join(f"{k}={v}" for k, v in labels), "value": value}
+            for (name, labels), value in sorted(items)
+        ]
+
+    def prometheus_text(self):
+        """
+        Everything in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            series = [(name, labels, s.count, s.errors, s.total, list(s.buckets)) for (name, labels), s in self._series.items()]
+            counters = list(self._counters.items())
+
+        def render_labels(pairs):
+            if not pairs:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        histogram = f"{METRIC_PREFIX}_span_seconds"
+        lines = [
+            f"# HELP {histogram} Duration of instrumented operations.",
+            f"# TYPE {histogram} histogram",
+        ]
+        for name, labels, count, _, total, buckets in sorted(series):
+            base = (("span", name),) + labels
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + (float("inf"),), buckets):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{histogram}_bucket{render_labels(base + (('le', le),))} {cumulative}")
+            lines.append(f"{histogram}_sum{render_labels(base)} {total}")
+            lines.append(f"{histogram}_count{render_labels(base)} {count}")
+
+        errors = f"{METRIC_PREFIX}_span_errors_total"
+        lines += [f"# HELP {errors} Instrumented operations that raised.", f"# TYPE {errors} counter"]
+        for name, labels, _, error_count, _, _ in sorted(series):
+            lines.append(f"{errors}{render_labels((('span', name),) + labels)} {error_count}")
+
+        for (name, labels), value in sorted(counters):
+            metric = f"{METRIC_PREFIX}_{name.replace('.', '_')}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric}{render_labels(labels)} {value}"]
+
+        return "\n".join(lines) + "\n"
+
+
+class _Span:
+    __slots__ = ("registry", "name", "labels", "started")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.started, self.labels, error=exc_type is not None)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+_registry = MetricsRegistry()
+# The endpoint has no auth: only this machine can scrape it unless `host` under [metrics] says otherwise
+METRICS_HOST = "127.0.0.1"
+
+_enabled = None  # resolved from secrets on first use
+_server = None
+_setup_lock = threading.Lock()
+
+
+def _setup():
+    global _enabled, _server
+    with _setup_lock:
+        if _enabled is None:
+            _enabled = str(get_secret("metrics", "enabled", True)).lower() not in ("false", "0", "no")
+            port = get_secret("metrics", "port")
+            if _enabled and port and _server is None:
+                try:
+                    _server = start_metrics_server(int(port), get_secret("metrics", "host", METRICS_HOST))
+                except OSError:
+                    pass  # another process already serves the port
+    return _enabled
+
+
+def is_enabled() -> bool:
+    return _enabled if _enabled is not None else _setup()
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def span(name: str, **labels):
+    """
+    Context manager that times its block into the `name` histogram.
+    Exceptions are counted as errors and re-raised.
+    """
+    if not (_enabled if _enabled is not None else _setup()):
+        return _NOOP
+    return _Span(_registry, name, tuple(sorted(labels.items())))
+
+
+def timed(name: str):
+    """
+    Decorator form of span().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(name: str, value=1, **labels):
+    if _enabled if _enabled is not None else _setup():
+        _registry.increment(name, value, tuple(sorted(labels.items())))
+
+
+def observe(name: str, seconds: float, **labels):
+    """
+    Records a duration measured elsewhere (e.g. time to first token).
+    """
+    if _enabled if _enabled is not None else _setup():
+        _registry.observe(name, seconds, tuple(sorted(labels.items())))
+
+
+def start_metrics_server(port: int, host: str = METRICS_HOST):
+    """
+    Serves prometheus_text() at http://host:port/metrics from a daemon thread.
+    Started automatically when `port` is set under [metrics]; `host` defaults to
+    loopback since the endpoint is unauthenticated.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = _registry.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+    return server
@@ -0,0 +1,323 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import get_secret
+from image_prep import PREP_OPTIONS, preprocess_image
+from metrics import increment, span, timed
+
+# OCR Space API endpoint
+OCR_URL = "https://api.ocr.space/parse/image"
+
+OCR_OPTIONS = {
+    'language': 'eng',
+    'isOverlayRequired': False,
+    'detectOrientation': True,
+    'scale': True,
+    'OCREngine': 2
+}
+
+# OCR results kept in memory before the least recently used are evicted
+CACHE_SIZE = 256
+
+# OCR results kept in the cache directory (a few KB each), least recently used evicted
+DISK_CACHE_SIZE = 5000
+
+# (connect, read) timeouts in seconds; OCR of a large screenshot can take a while
+OCR_TIMEOUT = (5, 60)
+
+# Attempts per image for timeouts, connection errors, 429 and 5xx responses
+OCR_ATTEMPTS = 3
+OCR_BACKOFF = 1.0  # seconds, doubled after every failed attempt
+
+# Images OCR'd at the same time (also the keep-alive connection pool size)
+OCR_MAX_WORKERS = 4
+
+
+class OcrCache:
+    """
+    Content-addressed cache of OCR results: key = hash(image bytes + OCR options).
+    In-memory LRU, backed by an optional directory so results survive restarts.
+    The directory is an LRU too, by file mtime: past `max_disk_entries` files,
+    the least recently used are deleted on write.
+    Thread-safe; one instance is shared by the whole process.
+    """
+
+    def __init__(self, max_entries: int = CACHE_SIZE, directory: str = None,
+                 max_disk_entries: int = DISK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.directory:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    text = f.read()
+            except OSError:
+                text = None
+            if text is not None:
+                self._remember(key, text)
+                try:
+                    os.utime(self._path(key))  # recently used: evicted last
+                except OSError:
+                    pass
+                with self._lock:
+                    self.disk_hits += 1
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, text):
+        self._remember(key, text)
+        if self.directory:
+            # Write then rename, so a crash never leaves a half-written entry
+            tmp_path = self._path(key) + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp_path, self._path(key))
+            except OSError:
+                return
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """
+        Deletes the least recently used entries past max_disk_entries. Lists the
+        directory, which is cheap next to the OCR request that preceded the write.
+        """
+        with self._disk_lock:
+            try:
+                files = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".txt")]
+            except OSError:
+                return
+            excess = len(files) - self.max_disk_entries
+            if excess <= 0:
+                return
+            files.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in files[:excess]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                with self._lock:
+                    self.disk_evictions += 1
+
+    def _remember(self, key, text):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "disk_store": self.directory,
+                "disk_evictions": self.disk_evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> OcrCache:
+    """
+    The process-wide cache. Set `cache_dir` under [ocr_space] to persist it on disk,
+    `cache_size` to change how many results stay in memory and `disk_cache_size`
+    how many stay on disk.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OcrCache(
+                max_entries=int(get_secret("ocr_space", "cache_size", CACHE_SIZE)),
+                directory=get_secret("ocr_space", "cache_dir"),
+                max_disk_entries=int(get_secret("ocr_space", "disk_cache_size", DISK_CACHE_SIZE)),
+            )
+        return _cache
+
+
+def cache_key(image_bytes: bytes, options: dict) -> str:
+    digest = hashlib.sha256(image_bytes)
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Shared keep-alive session, so repeated OCR calls reuse TLS connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OCR_MAX_WORKERS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def ocr_url():
+    # Overridable so tests and benchmarks can point at a local stub server
+    return get_secret("ocr_space", "url", OCR_URL)
+
+
+def prep_settings():
+    """
+    Image preprocessing options from [ocr_space] (preprocess, max_width, jpeg_quality),
+    or None when preprocessing is switched off.
+    """
+    if str(get_secret("ocr_space", "preprocess", True)).lower() in ("false", "0", "no"):
+        return None
+    return {
+        **PREP_OPTIONS,
+        "max_width": int(get_secret("ocr_space", "max_width", PREP_OPTIONS["max_width"])),
+        "quality": int(get_secret("ocr_space", "jpeg_quality", PREP_OPTIONS["quality"])),
+    }
+
+
+def _prepare_upload(image_bytes: bytes, filename: str, mime_type: str, prep: dict):
+    """
+    Downscales/recompresses the image per `prep`. Falls back to the original on any failure.
+    """
+    if not prep:
+        return image_bytes, filename, mime_type
+    try:
+        with span("ocr.preprocess"):
+            data, mime, extension = preprocess_image(image_bytes, **prep)
+    except Exception:
+        return image_bytes, filename, mime_type
+    if data is image_bytes:
+        return image_bytes, filename, mime_type
+    return data, f"{os.path.splitext(filename)[0]}.{extension}", mime
+
+
+class _RetryableError(Exception):
+    pass
+
+
+def _request_ocr(image_bytes: bytes, filename: str, mime_type: str, api_key: str, options: dict, url: str = OCR_URL):
+    """
+    Calls OCR Space with a timeout, retrying transient failures with exponential backoff.
+    Returns (text, cacheable); errors come back as text, not cacheable.
+    """
+    payload = {'apikey': api_key, **options}
+    files = {
+        'file': (filename, image_bytes, mime_type)
+    }
+
+    for attempt in range(OCR_ATTEMPTS):
+        try:
+            response = get_http_session().post(url, files=files, data=payload, timeout=OCR_TIMEOUT)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise _RetryableError(f"HTTP {response.status_code}")
+            result = response.json()
+
+            if result.get("IsErroredOnProcessing"):
+                return f"OCR Error: {result.get('ErrorMessage')}", False
+
+            parsed_results = result.get("ParsedResults")
+            if parsed_results:
+                return parsed_results[0].get("ParsedText", ""), True
+            else:
+                return "No text found in image.", True
+
+        except (requests.ConnectionError, requests.Timeout, _RetryableError) as e:
+            if attempt == OCR_ATTEMPTS - 1:
+                return f"OCR Request Failed: {str(e)} (after {OCR_ATTEMPTS} attempts)", False
+            # Jitter keeps concurrent retries from hitting the API in lockstep
+            time.sleep(OCR_BACKOFF * (2 ** attempt) * (0.5 + random.random()))
+        except Exception as e:
+            return f"OCR Request Failed: {str(e)}", False
+
+
+@timed("ocr.extract_text")
+def extract_text(image_bytes: bytes, filename: str, mime_type: str, api_key: str,
+                 options: dict = None, url: str = None, prep: dict = None) -> str:
+    """
+    OCRs an image, answering from the cache when the same bytes were seen before.
+    With `prep` (see prep_settings), the image is shrunk before upload on a cache miss.
+    """
+    options = options or OCR_OPTIONS
+    cache = get_ocr_cache()
+    # The original bytes are hashed, so a hit skips preprocessing too
+    key = cache_key(image_bytes, {**options, "prep": prep})
+
+    text = cache.get(key)
+    if text is not None:
+        increment("ocr.cache", result="hit")
+        return text
+    increment("ocr.cache", result="miss")
+
+    upload_bytes, upload_name, upload_mime = _prepare_upload(image_bytes, filename, mime_type, prep)
+    with span("ocr.request"):
+        text, cacheable = _request_ocr(upload_bytes, upload_name, upload_mime, api_key, options, url or ocr_url())
+    if not cacheable:
+        increment("ocr.failures")
+    if cacheable:
+        cache.put(key, text)
+    return text
+
+
+def extract_many(images, api_key: str, max_workers: int = OCR_MAX_WORKERS, options: dict = None):
+    """
+    OCRs several images concurrently. `images` is a list of (bytes, filename, mime_type).
+    Returns the texts in the same order. Wall-clock time is close to the slowest image.
+    """
+    if not images:
+        return []
+
+    # Resolve settings here: worker threads have no Streamlit script context
+    url = ocr_url()
+    prep = prep_settings()
+    get_ocr_cache()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(images))) as pool:
+        return list(pool.map(
+            lambda image: extract_text(*image, api_key, options=options, url=url, prep=prep),
+            images,
+        ))
@@ -5,7 +5,12 @@ import os
 # Add parent dir to path so we can import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils import parse_attendance_text, mark_attendance, init_supabase, extract_text_from_image, require_login
+from utils import parse_attendance_text, init_supabase, extract_texts_from_images, require_login, UPSERT_BATCH_SIZE
+from ingest import ingest_export
+from roster import get_roster, unknown_register_numbers
+from ocr import get_ocr_cache
+from jobs import get_job_queue, is_ocr_error
+from journal import get_journal, journal_enabled, save_attendance, save_message
 
 st.set_page_config(page_title="Upload Attendance", page_icon="📝")
 require_login()
@@ -14,32 +19,137 @@ st.title("📝 Upload Attendance")
 
 st.markdown("""
 **Methods**:
-1. 📸 **Upload Screenshot**: Use OCR to extract text from an image.
+1. 📸 **Upload Screenshots**: Use OCR to extract text from one or more images.
 2. 📋 **Paste Text**: Directly paste the attendance message.
+3. 📦 **Bulk Import**: Backfill from a WhatsApp chat export with many attendance messages.
 """)
 
-tab1, tab2 = st.tabs(["📸 Upload Image", "📋 Paste Text"])
+tab1, tab2, tab3 = st.tabs(["📸 Upload Image", "📋 Paste Text", "📦 Bulk Import"])
 
 attendance_text = ""
+job_owner = st.session_state.get("user_email")
+
+STATUS_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌", "interrupted": "⚠️"}
+
+def job_status_panel():
+    """
+    Background import jobs of this user, if any.
+    """
+    queue = get_job_queue()
+    jobs = queue.list_jobs(owner=job_owner)
+    if not jobs:
+        return
+
+    st.subheader("Import Jobs")
+    for job in jobs:
+        icon = STATUS_ICONS.get(job["status"], "•")
+        label = f"{icon} {job['name']} — {job['message'] or job['status']}"
+        if job["status"] == "running":
+            st.progress(job["progress"], text=f"{label} ({job['stage']})")
+        elif job["status"] == "failed":
+            st.error(label)
+        else:
+            st.write(label)
+        for warning in (job["result"] or {}).get("warnings", []):
+            st.warning(f"{job['name']}: {warning}")
+
+    if st.button("Clear finished jobs"):
+        queue.clear_finished(owner=job_owner)
+        st.rerun(scope="fragment")
+
+SAVE_ICONS = {"pending": "⏳", "flushed": "✅", "failed": "❌"}
+
+def save_status_panel():
+    """
+    Journaled saves of this user, if any, and whether Supabase has them yet.
+    """
+    journal = get_journal()
+    saves = journal.list_saves(owner=job_owner, limit=10)
+    if not saves:
+        return
+
+    st.subheader("Saves")
+    for save in saves:
+        label = f"{SAVE_ICONS.get(save['status'], '•')} {save['section']} - {save['date']} ({save['session']}): {save['rows']} records"
+        if save["status"] == "failed":
+            st.error(f"{label} — not saved: {save['error']}")
+        elif save["status"] == "pending":
+            st.write(f"{label} — {save['error'] or 'syncing...'}")
+        else:
+            st.write(f"{label} — synced: {save['inserted']} new, {save['updated']} changed, {save['unchanged']} already up to date")
+
+    if journal.last_error:
+        st.caption(f"Supabase is unreachable, retrying: {journal.last_error}")
+    if st.button("Clear synced saves"):
+        journal.clear_finished(owner=job_owner)
+        st.rerun(scope="fragment")
 
 # TAB 1: Image Upload
 with tab1:
-    uploaded_file = st.file_uploader("Choose an image (screenshot)...", type=['png', 'jpg', 'jpeg'])
-    if uploaded_file is not None:
-        if st.button("Extract Text from Image"):
-            with st.spinner("Scanning image with OCR Space..."):
-                extracted = extract_text_from_image(uploaded_file)
-                if extracted.startswith("Error") or extracted.startswith("OCR Error"):
+    uploaded_files = st.file_uploader("Choose images (screenshots)...", type=['png', 'jpg', 'jpeg'], accept_multiple_files=True)
+    if uploaded_files:
+        if st.button("Extract Text from Image" if len(uploaded_files) == 1 else f"Extract Text from {len(uploaded_files)} Images"):
+            # All images are OCR'd at once, so this takes about as long as the slowest one
+            with st.spinner(f"Scanning {len(uploaded_files)} image(s) with OCR Space..."):
+                extracted_texts = extract_texts_from_images(uploaded_files)
+
+            if len(uploaded_files) == 1:
+                extracted = extracted_texts[0]
+                if is_ocr_error(extracted):
                     st.error(extracted)
                 else:
                     st.success("Text Extracted!")
                     # Store in session state to pass to text area or processing
                     st.session_state['extracted_text'] = extracted
+            else:
+                # Several screenshots (e.g. both sessions for both sections): parse each one
+                st.session_state['ocr_batch'] = [
+                    {"name": f.name, "text": text, "parsed": None if is_ocr_error(text) else parse_attendance_text(text)}
+                    for f, text in zip(uploaded_files, extracted_texts)
+                ]
+
+        # Or skip the review and let the worker pool OCR, parse and save them
+        if st.button("Import in Background", help="Each image is OCR'd, parsed and saved by a background worker. Progress shows under Import Jobs."):
+            supabase = init_supabase()
+            if "ocr_space" not in st.secrets:
+                st.error("Error: OCR Space API Key missing in secrets.")
+            elif supabase:
+                images = [(f.getvalue(), f.name, f.type) for f in uploaded_files]
+                get_job_queue().submit_images(supabase, images, st.secrets["ocr_space"]["api_key"], owner=job_owner)
+                st.success(f"Queued {len(images)} image(s).")
+
+    ocr_stats = get_ocr_cache().stats()
+    st.caption(f"OCR cache: {ocr_stats['hits'] + ocr_stats['disk_hits']} hits, {ocr_stats['misses']} misses ({ocr_stats['entries']} images cached)")
 
     if 'extracted_text' in st.session_state:
         st.subheader("Extracted Text")
         attendance_text = st.text_area("Edit text if needed:", st.session_state['extracted_text'], height=200, key="ocr_text_area")
 
+    if 'ocr_batch' in st.session_state:
+        st.subheader("Extracted Attendance")
+        for item in st.session_state['ocr_batch']:
+            parsed = item["parsed"]
+            if parsed is None:
+                st.error(f"{item['name']}: {item['text']}")
+                continue
+            with st.expander(f"{item['name']} — {parsed['date']} {parsed['session']} Section {parsed['section']} ({len(parsed['records'])} listed)"):
+                st.text(item["text"])
+                st.json(parsed)
+
+        if st.button("Save All to Database"):
+            supabase = init_supabase()
+            if supabase:
+                with st.spinner("Saving..."):
+                    for item in st.session_state['ocr_batch']:
+                        if item["parsed"] is None:
+                            continue
+                        save_result = save_attendance(supabase, item["parsed"], owner=job_owner)
+                        if "error" in save_result:
+                            st.error(f"{item['name']}: {save_result['error']}")
+                        else:
+                            st.success(f"{item['name']}: {save_message(save_result)}")
+                del st.session_state['ocr_batch']
+
 # TAB 2: Paste Text
 with tab2:
     # If we didn't get text from OCR (or user ignores it), use this text area
@@ -48,6 +158,48 @@ with tab2:
     if not attendance_text:
         attendance_text = manual_text
 
+# TAB 3: Bulk Import
+with tab3:
+    st.caption("Upload a WhatsApp chat export (.txt). Every Date/Session/Section message in it is parsed and saved.")
+    export_file = st.file_uploader("Chat export", type=['txt'], key="bulk_export_file")
+    export_text = st.text_area("...or paste many messages here", height=200, key="bulk_export_text")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        batch_size = st.number_input("Rows per upsert batch", min_value=50, max_value=5000, value=UPSERT_BATCH_SIZE, step=50)
+    with col2:
+        parse_workers = st.number_input("Parser processes", min_value=1, max_value=8, value=1)
+
+    in_background = st.checkbox("Run in background", help="Keep using the app while the import runs. Progress shows under Import Jobs.")
+
+    if st.button("Import All"):
+        bulk_text = export_file.getvalue().decode("utf-8", errors="ignore") if export_file else export_text
+        supabase = init_supabase() if bulk_text else None
+        if not bulk_text:
+            st.warning("Please upload an export or paste messages.")
+        elif supabase and in_background:
+            get_job_queue().submit_export(
+                supabase, bulk_text, name=export_file.name if export_file else "Pasted messages",
+                batch_size=int(batch_size), workers=int(parse_workers), owner=job_owner,
+            )
+            st.success("Import queued.")
+        elif supabase:
+            progress_bar = st.progress(0.0, text="Starting...")
+            bulk_result = ingest_export(supabase, bulk_text, batch_size=int(batch_size), workers=int(parse_workers), progress=progress_bar.progress)
+
+            if bulk_result["error"]:
+                st.error(f"Database Error: {bulk_result['error']} ({bulk_result['rows_written']} rows were saved before the failure)")
+            else:
+                failed = sum(1 for b in bulk_result["blocks"] if b["Status"] != "OK")
+                st.success(f"Imported {len(bulk_result['blocks']) - failed} messages ({bulk_result['rows_written']} records). {failed} messages had errors.")
+            if bulk_result["blocks"]:
+                st.dataframe(bulk_result["blocks"], width="stretch")
+
+# The panel polls on its own (without rerunning the page) and reads the job list
+# itself on every poll, so jobs queued after this run, or from another tab, show
+# up and finish live. A poll is one local SQLite read; with no jobs it draws nothing.
+st.fragment(job_status_panel, run_every=2)()
+
 st.markdown("---")
 
 if st.button("Process Attendance"):
@@ -64,18 +216,37 @@ if st.button("Process Attendance"):
             st.json(result)
             st.session_state['parsed_data'] = result
 
+            # Flag register numbers that aren't in the section (usually OCR misreads)
+            supabase = init_supabase() if result.get("section") else None
+            if supabase:
+                try:
+                    unknown = unknown_register_numbers(result, get_roster(supabase, result["section"]))
+                    if unknown:
+                        st.warning(f"Not in the Section {result['section']} roster: {', '.join(unknown)}. Check for OCR mistakes before saving.")
+                except Exception as e:
+                    st.warning(f"Could not check register numbers against the roster: {e}")
+
 if 'parsed_data' in st.session_state:
     st.info("Review the data above. If correct, click Save.")
     if st.button("Confirm and Save to Database"):
         supabase = init_supabase()
         if supabase:
-            with st.spinner("Saving to Supabase..."):
-                save_result = mark_attendance(supabase, st.session_state['parsed_data'])
+            with st.spinner("Saving..."):
+                save_result = save_attendance(supabase, st.session_state['parsed_data'], owner=job_owner)
                 
             if "error" in save_result:
                 st.error(f"Database Error: {save_result['error']}")
             else:
-                st.success(f"Saved! {save_result['count']} records updated for {save_result['section']} - {save_result['date']} ({save_result['session']}).")
+                st.success(
+                    f"Saved! {save_result['section']} - {save_result['date']} ({save_result['session']}): "
+                    f"{save_message(save_result)}"
+                )
                 # Clear states
                 if 'parsed_data' in st.session_state: del st.session_state['parsed_data']
                 if 'extracted_text' in st.session_state: del st.session_state['extracted_text']
+
+# Rendered last, so a save made in this run already shows as pending. Polls like
+# the job panel, reading the saves on every poll, so saves made by background
+# jobs or another tab show up and turn synced without a page rerun.
+if journal_enabled():
+    st.fragment(save_status_panel, run_every=2)()
@@ -1,119 +1,188 @@
 import streamlit as st
-import pandas as pd
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils import init_supabase, require_login
+from roster import invalidate_roster
+from metrics import span
+from records import PAGE_SIZE, STATUSES, TREND_PERIODS, fetch_attendance_page, fetch_daily_rollup, iter_attendance_pages, to_display_rows
 
 st.set_page_config(page_title="View Records", page_icon="📊", layout="wide")
 require_login()
 
 st.title("📊 View Attendance Records")
 
+# pandas, stats and export (pyarrow) are imported where they are used, below the
+# filters, so the page draws before they load on a cold start (warmup.py preloads them).
+
 supabase = init_supabase()
 
 if not supabase:
     st.stop()
 
-# Filters
-col1, col2 = st.columns(2)
+# Filters (all applied by the database, not in Python)
+col1, col2, col3 = st.columns(3)
 with col1:
-    selected_date = st.date_input("Filter by Date", value=None)
+    date_from = st.date_input("From Date", value=None)
+    date_to = st.date_input("To Date", value=None)
 with col2:
     selected_section = st.selectbox("Filter by Section", ["All", "A", "B"])
+    register_number = st.text_input("Register No", placeholder="e.g. 59").strip()
+with col3:
+    selected_statuses = st.multiselect("Status", STATUSES, default=STATUSES)
+    page_size = st.selectbox("Rows per page", [50, PAGE_SIZE, 250, 500], index=1)
 
-# Fetch Data
-query = supabase.table("attendance").select("*, students(register_number, full_name, section)")
+filters = {
+    "section": None if selected_section == "All" else selected_section,
+    "date_from": date_from,
+    "date_to": date_to,
+    "statuses": selected_statuses,
+    "register_number": register_number or None,
+}
 
-if selected_date:
-    query = query.eq("date", selected_date)
+# Keyset pagination: remember the cursor each visited page started from.
+# Changing any filter starts again from the first page.
+filter_key = (tuple(sorted((k, str(v)) for k, v in filters.items())), page_size)
+if st.session_state.get("records_filter_key") != filter_key:
+    st.session_state["records_filter_key"] = filter_key
+    st.session_state["records_cursors"] = [None]
 
-# Execute query to get Attendance Data
-response = query.execute()
+cursors = st.session_state["records_cursors"]
+# An empty status selection matches nothing (not "every status"), so there is nothing to fetch
+if selected_statuses:
+    page_rows, next_cursor = fetch_attendance_page(supabase, filters, page_size=page_size, after=cursors[-1])
+else:
+    page_rows, next_cursor = [], None
+data = to_display_rows(page_rows)
 
 
-tab1, tab2 = st.tabs(["📝 Detailed Records", "📈 Attendance Percentage"])
+tab1, tab2, tab3 = st.tabs(["📝 Detailed Records", "📈 Attendance Percentage", "📉 Trends"])
 
 with tab1:
-    if response.data:
-        # Transform for display
-        data = []
-        for record in response.data:
-            student = record['students']
-            # Apply Section Filter (Supabase join filtering is tricky, easier to filter in creating list if dataset small)
-            if selected_section != "All" and student['section'] != selected_section:
-                continue
-                
-            data.append({
-                "Date": record['date'],
-                "Session": record['session'],
-                "Register No": student['register_number'],
-                "Name": student['full_name'],
-                "Section": student['section'],
-                "Status": record['status']
-            })
-        
-        if data:
-            df = pd.DataFrame(data)
-            st.dataframe(df, width="stretch")
-            
-            # Download
-            csv = df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                "Download CSV",
-                csv,
-                "attendance_records.csv",
-                "text/csv",
-                key='download-csv'
-            )
-        else:
-            st.info("No records found for the selected filters.")
+    if data:
+        import pandas as pd
+        from export import EXPORT_FORMATS, export_records, export_row_limit
+
+        df = pd.DataFrame(data)
+        st.dataframe(df, width="stretch")
+
+        nav1, nav2, nav3 = st.columns([1, 1, 4])
+        with nav1:
+            if st.button("⬅️ Previous", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with nav2:
+            if st.button("Next ➡️", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
+        with nav3:
+            st.caption(f"Page {len(cursors)} · {len(data)} rows")
+
+        # Download
+        csv = df.to_csv(index=False).encode('utf-8')
+        st.download_button(
+            "Download CSV (this page)",
+            csv,
+            "attendance_records.csv",
+            "text/csv",
+            key='download-csv'
+        )
+
+        # Full export: generated only when clicked, off the script thread, streaming
+        # page by page. The finished file is held in memory by the download, hence the cap.
+        export_limit = export_row_limit()
+        export_format = st.radio("Export all matching records as", list(EXPORT_FORMATS), horizontal=True, format_func=str.upper)
+        export_name, export_mime = EXPORT_FORMATS[export_format]
+        st.download_button(
+            f"Export all ({export_format.upper()})",
+            lambda: export_records(supabase, filters, export_format, max_rows=export_limit),
+            export_name,
+            export_mime,
+            key='export-all'
+        )
+        st.caption(
+            f"Exports hold at most {export_limit:,} rows (the newest first). "
+            "Narrow the date range or section to export older records."
+        )
+    elif not selected_statuses:
+        st.info("No status selected. Pick at least one status to see records.")
+    elif len(cursors) > 1:
+        st.info("No more records.")
     else:
-        st.info("No attendance records found.")
+        st.info("No records found for the selected filters.")
 
 with tab2:
     st.subheader("Student Attendance Statistics")
-    
-    # Fetch ALL data for stats (ignore date filter usually, but maybe keep section)
-    # If date filter is active, stats are for that period.
-    
-    if data: # reuse fetch
-        df_stats = pd.DataFrame(data)
-        
-        # Group by Student
-        stats = []
-        students_group = df_stats.groupby("Register No")
-        
-        for reg_no, group in students_group:
-            total_sessions = len(group)
-            # Present + OD + Late = Present for percentage purposes
-            present_count = len(group[group['Status'].isin(['Present', 'OD', 'Late'])])
-            absent_count = len(group[group['Status'] == 'Absent'])
-            perc = (present_count / total_sessions) * 100 if total_sessions > 0 else 0
-            
-            stats.append({
-                "Register No": reg_no,
-                "Name": group.iloc[0]["Name"],
-                "Total Sessions": total_sessions,
-                "Present": present_count,
-                "Absent": absent_count,
-                "Attendance %": round(perc, 2)
-            })
-            
-        df_summary = pd.DataFrame(stats)
+
+    # Stats need every row in the filtered range, not just the visible page,
+    # so they are only fetched on request.
+    stats_data = []
+    calculate = st.checkbox("Calculate for all records matching the filters", disabled=not selected_statuses)
+    if calculate and selected_statuses:
+        with st.spinner("Fetching records..."), span("view.fetch_all"):
+            for rows in iter_attendance_pages(supabase, filters):
+                stats_data.extend(to_display_rows(rows))
+
+    if stats_data:
+        import pandas as pd
+        from stats import attendance_summary
+
+        df_stats = pd.DataFrame(stats_data)
+
+        group_by = st.radio("Group by", ["student", "section", "date", "session"], horizontal=True, format_func=str.title)
+        with span("view.summary", by=group_by):
+            df_summary = attendance_summary(df_stats, by=group_by)
         st.dataframe(df_summary, use_container_width=True)
-        
+
         st.markdown("**Formula used:** `(Present + OD + Late) / Total Sessions * 100`")
     else:
         st.info("No data to calculate statistics.")
 
+with tab3:
+    st.subheader("Section Trends")
+    st.caption("Uses the section and date filters above. Read from the daily rollup, so any range loads quickly.")
+
+    trend1, trend2 = st.columns(2)
+    with trend1:
+        period = st.radio("Per", list(TREND_PERIODS), horizontal=True, format_func=str.title)
+    with trend2:
+        trend_session = st.selectbox("Session", ["Both", "Morning", "Afternoon"])
+
+    try:
+        rollup_rows = fetch_daily_rollup(supabase, filters)
+    except Exception as e:
+        rollup_rows = None
+        st.warning(f"Could not read the daily rollup ({e}). Run attendance_rollup.sql in the Supabase SQL editor.")
+
+    if rollup_rows:
+        from stats import rollup_trends
+
+        trends = rollup_trends(rollup_rows, period, None if trend_session == "Both" else trend_session)
+        if not trends.empty:
+            st.markdown("**Attendance %**")
+            st.line_chart(trends.pivot(index="Date", columns="Section", values="Attendance %"))
+
+            st.markdown("**Absent / OD / Late**")
+            st.bar_chart(trends.groupby("Date")[["Absent", "OD", "Late"]].sum())
+
+            st.dataframe(trends, use_container_width=True)
+        else:
+            st.info("No attendance in the selected range.")
+    elif rollup_rows is not None:
+        st.info("No attendance in the selected range.")
+
 st.markdown("---")
 st.subheader("Student Database")
 # Quick view of students
 if st.checkbox("Show Student List"):
+    if st.button("Refresh cached rosters", help="Saves use a cached copy of each section's students. Refresh after editing students outside this app."):
+        invalidate_roster()
+        st.success("Roster cache cleared.")
     students_res = supabase.table("students").select("*").execute()
     if students_res.data:
+        import pandas as pd
+
         st.dataframe(pd.DataFrame(students_res.data))
     else:
         st.warning("No students found in database. Please upload student data via SQL or Supabase Dashboard.")
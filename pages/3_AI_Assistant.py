@@ -1,9 +1,12 @@
 import streamlit as st
 import sys
 import os
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from chatbot import get_chatbot_agent
+from chatbot import LatencyTracker, get_chatbot_agent, get_sql_database, invalidate_chatbot_agent
+from intents import answer_fast
+from metrics import observe, span
 from utils import require_login
 
 st.set_page_config(page_title="AI Assistant", page_icon="💬")
@@ -12,6 +15,12 @@ require_login()
 st.title("💬 Attendance Assistant (Groq)")
 st.caption("Ask questions like 'Who was absent on Jan 31st?' or 'Mark 59 as Present'.")
 
+# The agent and its schema snapshot are cached for the whole server process
+with st.sidebar:
+    if st.button("🔄 Refresh database schema", help="Use after tables or columns change."):
+        invalidate_chatbot_agent()
+        st.success("Schema will be reloaded on the next question.")
+
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
@@ -28,14 +37,48 @@ if prompt := st.chat_input("Ask a question..."):
 
     # Output
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
+        started = time.perf_counter()
+        response, served_by, first_token = None, None, None
+
+        # Common question shapes are answered directly with a fixed query
+        db_url = st.secrets["supabase"].get("db_url")
+        if db_url:
             try:
+                with span("chat.fast_path"):
+                    fast = answer_fast(get_sql_database(db_url), prompt)
+            except Exception:
+                fast = None  # let the agent have a go instead
+            if fast:
+                response, intent = fast
+                served_by = f"fast path ({intent})"
+
+        try:
+            if response is None:
                 agent = get_chatbot_agent()
                 if agent:
-                    response = agent.run(prompt)
-                    st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
+                    # Imported here: langchain_community's callbacks are slow to import
+                    # and most questions never reach the agent
+                    from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
+
+                    # The agent's thoughts, tool calls (incl. the SQL it runs) and answer
+                    # are streamed into this message as they are generated
+                    tracker = LatencyTracker(started)
+                    steps = StreamlitCallbackHandler(st.container(), expand_new_thoughts=True)
+                    with span("llm.agent_run"):
+                        response = agent.run(prompt, callbacks=[steps, tracker])
+                    served_by = f"AI agent, {tracker.llm_calls} LLM call(s)"
+                    first_token = tracker.time_to_first_token
+                    if first_token is not None:
+                        observe("llm.first_token", first_token)
                 else:
                     st.error("Chatbot agent could not be initialized. Check secrets.")
-            except Exception as e:
-                st.error(f"Error: {e}")
+
+            if response is not None:
+                caption = f"Answered by {served_by} in {time.perf_counter() - started:.2f}s"
+                if first_token is not None:
+                    caption += f" · first token after {first_token:.2f}s"
+                st.markdown(response)
+                st.caption(caption)
+                st.session_state.messages.append({"role": "assistant", "content": f"{response}\n\n*{caption}*"})
+        except Exception as e:
+            st.error(f"Error: {e}")
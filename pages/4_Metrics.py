@@ -0,0 +1,77 @@
+import streamlit as st
+import pandas as pd
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import require_login
+from config import get_secret
+from metrics import METRICS_HOST, get_registry, is_enabled
+from warmup import warmup_status
+
+st.set_page_config(page_title="Metrics", page_icon="⏱️", layout="wide")
+require_login()
+
+# Optional allow-list: admins = ["you@college.edu"] (or a comma-separated string) under [metrics]
+admins = get_secret("metrics", "admins")
+if isinstance(admins, str):
+    admins = [a.strip() for a in admins.split(",") if a.strip()]
+if admins and st.session_state.get("user_email") not in admins:
+    st.error("This page is only available to administrators.")
+    st.stop()
+
+st.title("⏱️ Performance Metrics")
+
+warmup = warmup_status()
+if warmup:
+    with st.expander("Startup warm-up"):
+        st.dataframe(
+            pd.DataFrame([{"step": name, **step} for name, step in warmup.items()]),
+            width="stretch", hide_index=True,
+        )
+
+if not is_enabled():
+    st.warning("Metrics are disabled (`enabled = false` under `[metrics]`).")
+    st.stop()
+
+registry = get_registry()
+st.caption(
+    f"Collected by this server process since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(registry.started_at))}. "
+    "Percentiles cover the most recent samples of each span."
+)
+
+spans = registry.snapshot()
+if spans:
+    st.subheader("Timings")
+    st.dataframe(pd.DataFrame(spans), width="stretch", hide_index=True)
+else:
+    st.info("Nothing recorded yet. Upload, view records or ask the assistant, then come back.")
+
+counters = registry.counters()
+if counters:
+    st.subheader("Counters")
+    st.dataframe(pd.DataFrame(counters), width="stretch", hide_index=True)
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    if st.button("🔄 Refresh"):
+        st.rerun()
+with col2:
+    st.download_button("Download Prometheus text", registry.prometheus_text(), "metrics.prom", "text/plain")
+with col3:
+    if st.button("Reset metrics"):
+        registry.reset()
+        st.rerun()
+
+with st.expander("Prometheus exposition"):
+    port = get_secret("metrics", "port")
+    if port:
+        host = get_secret("metrics", "host", METRICS_HOST)
+        st.caption(
+            f"Scrape target: `http://{host}:{port}/metrics`. The endpoint has no authentication; "
+            "set `host` under `[metrics]` only to an interface your Prometheus can reach privately."
+        )
+    else:
+        st.caption("Set `port` under `[metrics]` to serve this at `/metrics` for Prometheus.")
+    st.code(registry.prometheus_text(), language="text")
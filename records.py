@@ -0,0 +1,185 @@
+from metrics import span
+
+# Server-side filtered, keyset-paginated reads of the attendance table.
+#
+# Rows are ordered by (date, session, student_id), all descending, which is
+# unique per row thanks to UNIQUE(student_id, date, session), so the last row of
+# a page is a stable cursor for the next one. With every key in one direction,
+# "after the cursor" is a single row comparison,
+# (date, session, student_id) < cursor, which attendance_page_after()
+# (attendance_partitioning.sql) runs as one range scan of the keyset index.
+# Page cost depends on page size, not table size.
+
+# Rows per page on the View Records page
+PAGE_SIZE = 100
+
+# PostgREST returns at most 1000 rows per request by default
+MAX_PAGE_SIZE = 1000
+
+STATUSES = ["Present", "Absent", "OD", "Late"]
+
+# !inner turns the embed into an inner join, so filters on students.* drop attendance rows
+RECORD_COLUMNS = "date, session, status, student_id, students!inner(register_number, full_name, section)"
+
+# SQL function returning the attendance rows after a keyset cursor
+KEYSET_FUNCTION = "attendance_page_after"
+
+# Cleared once the database turns out not to have KEYSET_FUNCTION (PostgREST
+# PGRST202: attendance_partitioning.sql not run yet); pages then use _after_cursor
+_keyset_function_available = True
+
+
+def build_attendance_query(supabase, filters: dict, query=None):
+    """
+    Applies filters in the query itself. `filters` keys (all optional):
+    section, date_from, date_to, statuses (list), register_number.
+    `query` defaults to a select on the attendance table.
+    """
+    if query is None:
+        query = supabase.table("attendance").select(RECORD_COLUMNS)
+
+    if filters.get("section"):
+        query = query.eq("students.section", filters["section"])
+    if filters.get("register_number"):
+        query = query.eq("students.register_number", filters["register_number"])
+    if filters.get("date_from"):
+        query = query.gte("date", str(filters["date_from"]))
+    if filters.get("date_to"):
+        query = query.lte("date", str(filters["date_to"]))
+    if filters.get("statuses") and set(filters["statuses"]) != set(STATUSES):
+        query = query.in_("status", list(filters["statuses"]))
+
+    return query
+
+
+def _keyset_query(supabase, cursor):
+    """
+    Rows strictly after `cursor` = (date, session, student_id) in page order,
+    through KEYSET_FUNCTION, as a query the filters can be applied to.
+    """
+    date_str, session, student_id = cursor
+    params = {"after_date": date_str, "after_session": session, "after_student_id": student_id}
+    return supabase.rpc(KEYSET_FUNCTION, params).select(RECORD_COLUMNS)
+
+
+def _after_cursor(query, cursor):
+    """
+    Fallback for databases without KEYSET_FUNCTION: the same rows as an OR of
+    filters. The `date <= cursor date` bound is what an index can range over;
+    the OR then only filters the cursor's own day.
+    """
+    date_str, session, student_id = cursor
+    return query.lte("date", date_str).or_(
+        f"date.lt.{date_str},"
+        f"and(date.eq.{date_str},session.lt.{session}),"
+        f"and(date.eq.{date_str},session.eq.{session},student_id.lt.{student_id})"
+    )
+
+
+def _execute_page(query, page_size: int):
+    # Fetch one extra row to know whether another page exists
+    return (
+        query.order("date", desc=True)
+        .order("session", desc=True)
+        .order("student_id", desc=True)
+        .limit(page_size + 1)
+        .execute()
+    )
+
+
+def fetch_attendance_page(supabase, filters: dict, page_size: int = PAGE_SIZE, after=None):
+    """
+    Returns (rows, next_cursor). next_cursor is None on the last page.
+    Pass the previous page's next_cursor as `after` to continue.
+    """
+    global _keyset_function_available
+    page_size = min(page_size, MAX_PAGE_SIZE - 1)
+
+    response = None
+    with span("db.records_page"):
+        if after and _keyset_function_available:
+            try:
+                response = _execute_page(build_attendance_query(supabase, filters, _keyset_query(supabase, after)), page_size)
+            except Exception as e:
+                if getattr(e, "code", None) != "PGRST202":
+                    raise
+                _keyset_function_available = False
+        if response is None:
+            query = build_attendance_query(supabase, filters)
+            if after:
+                query = _after_cursor(query, after)
+            response = _execute_page(query, page_size)
+    rows = response.data or []
+
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        return rows, (last["date"], last["session"], last["student_id"])
+    return rows, None
+
+
+def iter_attendance_pages(supabase, filters: dict, page_size: int = MAX_PAGE_SIZE - 1):
+    """
+    Yields every matching page in order, one round trip per page.
+    """
+    cursor = None
+    while True:
+        rows, cursor = fetch_attendance_page(supabase, filters, page_size=page_size, after=cursor)
+        if rows:
+            yield rows
+        if cursor is None:
+            return
+
+
+def to_display_rows(records):
+    """
+    Flattens attendance rows with their embedded student into table rows.
+    """
+    return [
+        {
+            "Date": record['date'],
+            "Session": record['session'],
+            "Register No": record['students']['register_number'],
+            "Name": record['students']['full_name'],
+            "Section": record['students']['section'],
+            "Status": record['status']
+        }
+        for record in records
+    ]
+
+
+# attendance_daily_rollup (attendance_rollup.sql): one row per (section, date, session)
+ROLLUP_COLUMNS = "section, date, session, present, absent, od, late"
+
+# Trend buckets for stats.rollup_trends, as pandas period codes
+TREND_PERIODS = {"day": "D", "week": "W-SUN", "month": "M"}
+
+
+def build_rollup_query(supabase, filters: dict):
+    """
+    Rollup rows for the section and date range in `filters`, ordered by date.
+    The other filters don't apply: the rollup has no per-student or per-status rows.
+    """
+    query = supabase.table("attendance_daily_rollup").select(ROLLUP_COLUMNS)
+    if filters.get("section"):
+        query = query.eq("section", filters["section"])
+    if filters.get("date_from"):
+        query = query.gte("date", str(filters["date_from"]))
+    if filters.get("date_to"):
+        query = query.lte("date", str(filters["date_to"]))
+    return query.order("date").order("section").order("session")
+
+
+def fetch_daily_rollup(supabase, filters: dict):
+    """
+    Returns every matching rollup row. There are at most days x sections x 2
+    of them, so plain offset pages are enough.
+    """
+    rows = []
+    with span("db.rollup_fetch"):
+        while True:
+            start = len(rows)
+            page = build_rollup_query(supabase, filters).range(start, start + MAX_PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < MAX_PAGE_SIZE:
+                return rows
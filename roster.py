@@ -0,0 +1,145 @@
+import threading
+import time
+
+from metrics import increment, span
+
+# Seconds a cached roster is trusted without asking the database.
+# After that, one tiny read of roster_version decides whether to refetch.
+ROSTER_TTL = 300
+
+_lock = threading.Lock()
+_entries = {}  # section -> _RosterEntry
+_stats = {"hits": 0, "revalidated": 0, "misses": 0}
+
+
+class _RosterEntry:
+    def __init__(self, roster, version):
+        self.roster = roster
+        self.version = version
+        self.checked_at = time.monotonic()
+
+
+def _fetch_version(supabase):
+    """
+    Current students version from roster_version.sql, or None if it isn't installed.
+    """
+    try:
+        response = supabase.table("roster_version").select("version").eq("id", 1).limit(1).execute()
+        return response.data[0]["version"] if response.data else None
+    except Exception:
+        return None
+
+
+def _fetch_rosters(supabase, sections):
+    """
+    One round trip for every section: {section: {register_number: student_id}}.
+    """
+    rosters = {section: {} for section in sections}
+    response = supabase.table("students").select("id, register_number, section").in_("section", sorted(sections)).execute()
+    for student in response.data or []:
+        rosters.setdefault(student["section"], {})[student["register_number"]] = student["id"]
+    return rosters
+
+
+def get_rosters(supabase, sections, allow_stale: bool = False) -> dict:
+    """
+    Returns {section: {register_number: student_id}} for the given sections.
+
+    Rosters are cached per section and shared by every session of the process.
+    A cached roster younger than ROSTER_TTL is returned without any round trip.
+    An older one is revalidated against roster_version (bumped by a trigger
+    whenever students change) and refetched only if the version moved.
+
+    With `allow_stale`, an expired cached roster is returned when the database
+    can't be reached instead of raising.
+    """
+    sections = set(sections)
+    if not sections:
+        return {}
+
+    now = time.monotonic()
+    result, stale = {}, set()
+    with _lock:
+        for section in sections:
+            entry = _entries.get(section)
+            if entry is not None and now - entry.checked_at < ROSTER_TTL:
+                result[section] = entry.roster
+                _stats["hits"] += 1
+            else:
+                stale.add(section)
+
+    increment("roster.cache", len(result), result="hit")
+    if not stale:
+        return result
+
+    with span("db.roster_version"):
+        version = _fetch_version(supabase)
+    missing = set()
+    with _lock:
+        for section in stale:
+            entry = _entries.get(section)
+            if entry is not None and version is not None and entry.version == version:
+                entry.checked_at = now
+                result[section] = entry.roster
+                _stats["revalidated"] += 1
+            else:
+                missing.add(section)
+
+    if missing:
+        try:
+            with span("db.roster_fetch"):
+                fetched = _fetch_rosters(supabase, missing)
+        except Exception:
+            with _lock:
+                cached = {section: _entries[section].roster for section in missing if section in _entries}
+            if not allow_stale or len(cached) < len(missing):
+                raise
+            increment("roster.cache", len(cached), result="stale")
+            result.update(cached)
+            return result
+        with _lock:
+            for section, roster in fetched.items():
+                # Empty rosters aren't cached, so a freshly populated section shows up at once
+                if roster:
+                    _entries[section] = _RosterEntry(roster, version)
+                _stats["misses"] += 1
+        result.update(fetched)
+
+    return result
+
+
+def get_roster(supabase, section, allow_stale: bool = False) -> dict:
+    """
+    {register_number: student_id} for one section (see get_rosters).
+    """
+    return get_rosters(supabase, [section], allow_stale=allow_stale).get(section, {})
+
+
+def invalidate_roster(section=None):
+    """
+    Drops the cached roster of `section`, or of every section when None.
+    """
+    with _lock:
+        if section is None:
+            _entries.clear()
+        else:
+            _entries.pop(section, None)
+
+
+def roster_cache_stats():
+    """
+    Returns hit/revalidation/miss counts and the cached sections.
+    """
+    with _lock:
+        return {**_stats, "sections": sorted(_entries)}
+
+
+def unknown_register_numbers(parsed_data: dict, roster: dict):
+    """
+    Register numbers listed in parsed attendance that aren't in the section roster.
+    These usually mean an OCR misread or a wrong section header.
+    """
+    return sorted(
+        {r["register_number"] for r in parsed_data.get("records", [])} - set(roster),
+        key=lambda reg_no: (len(reg_no), reg_no),
+    )
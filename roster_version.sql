@@ -0,0 +1,32 @@
+-- Version counter for the students table.
+-- The app caches section rosters (roster.py) and only refetches them
+-- when this version moves, so the common save path skips the roster scan.
+
+CREATE TABLE IF NOT EXISTS roster_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+INSERT INTO roster_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+-- SECURITY DEFINER: writers of students may not have write access to roster_version
+CREATE OR REPLACE FUNCTION bump_roster_version() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE roster_version
+    SET version = version + 1, updated_at = timezone('utc'::text, now())
+    WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Only changes that affect rosters bump the version. Attendance counter
+-- updates (attendance_counters.sql) touch other columns and are ignored.
+DROP TRIGGER IF EXISTS students_roster_version ON students;
+CREATE TRIGGER students_roster_version
+    AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF id, register_number, section ON students
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_roster_version();
+
+ALTER TABLE roster_version ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "Allow anon read access" ON roster_version;
+CREATE POLICY "Allow anon read access" ON roster_version FOR SELECT USING (true);
@@ -8,6 +8,7 @@ CREATE TABLE IF NOT EXISTS students (
 );
 
 -- Create attendance table
+-- (attendance_partitioning.sql upgrades it to an indexed, monthly partitioned table)
 CREATE TABLE IF NOT EXISTS attendance (
     id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
     student_id UUID REFERENCES students(id) ON DELETE CASCADE,
@@ -0,0 +1,45 @@
+"""
+Checks students.total_sessions / present_sessions (kept by attendance_counters.sql)
+against a full recompute from the attendance table.
+
+    python scripts/verify_counters.py           # report drift, exit 1 if any
+    python scripts/verify_counters.py --repair  # report, then rebuild all counters
+
+Reads Supabase credentials from .streamlit/secrets.toml or SUPABASE_URL / SUPABASE_KEY.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database import get_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="rebuild counters from scratch after reporting")
+    args = parser.parse_args()
+
+    supabase = get_client()
+    mismatches = supabase.rpc("verify_attendance_counters").execute().data or []
+
+    if not mismatches:
+        print("✅ Attendance counters match a full recompute.")
+        return 0
+
+    print(f"❌ {len(mismatches)} students have drifted counters:")
+    for row in mismatches:
+        print(
+            f"  {row['register_number']}: total {row['stored_total']} (actual {row['actual_total']}), "
+            f"present {row['stored_present']} (actual {row['actual_present']})"
+        )
+
+    if args.repair:
+        rebuilt = supabase.rpc("rebuild_attendance_counters").execute().data
+        print(f"Rebuilt counters for {rebuilt} students.")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Checks attendance_daily_rollup (kept by attendance_rollup.sql) against a full
+recompute from the attendance table.
+
+    python scripts/verify_rollup.py           # report drift, exit 1 if any
+    python scripts/verify_rollup.py --repair  # report, then rebuild the rollup
+
+Reads Supabase credentials from .streamlit/secrets.toml or SUPABASE_URL / SUPABASE_KEY.
+--repair calls rebuild_attendance_rollup(), which app keys may not run: it needs
+the service role key, as `service_key` under [supabase] or SUPABASE_SERVICE_KEY.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import get_secret
+from database import get_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="rebuild the rollup from scratch after reporting")
+    args = parser.parse_args()
+
+    supabase = get_client()
+    mismatches = supabase.rpc("verify_attendance_rollup").execute().data or []
+
+    if not mismatches:
+        print("✅ Daily rollup matches a full recompute.")
+        return 0
+
+    print(f"❌ {len(mismatches)} rollup rows have drifted (present/absent/OD/late):")
+    for row in mismatches:
+        print(f"  {row['section']} {row['date']} {row['session']}: stored {row['stored']}, actual {row['actual']}")
+
+    if args.repair:
+        service_key = get_secret("supabase", "service_key")
+        if not service_key:
+            print("--repair needs the service role key (`service_key` under [supabase] or SUPABASE_SERVICE_KEY).")
+            return 1
+
+        from supabase import create_client
+
+        admin = create_client(get_secret("supabase", "url"), service_key)
+        rebuilt = admin.rpc("rebuild_attendance_rollup").execute().data
+        print(f"Rebuilt {rebuilt} rollup rows.")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
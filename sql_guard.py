@@ -0,0 +1,190 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from langchain_community.utilities import SQLDatabase
+
+from config import get_secret
+
+# Limits for SQL written by the AI agent. Overridable under [sql_guard] in secrets.
+STATEMENT_TIMEOUT_MS = 5000  # statements running longer are cancelled
+MAX_ROWS = 200  # SELECTs are capped at this many rows
+MAX_COST = 500000  # Postgres planner cost units; pricier plans are refused
+SLOW_QUERY_MS = 1000  # statements slower than this are logged
+
+logger = logging.getLogger("attendance.sql_guard")
+
+READ_QUERY_RE = re.compile(r"^\s*(?:select|with)\b", re.IGNORECASE)
+WRITE_KEYWORD_RE = re.compile(r"\b(?:insert|update|delete|merge|truncate|drop|alter|create)\b", re.IGNORECASE)
+LEADING_COMMENTS_RE = re.compile(r"^(?:\s*(?:--[^\n]*\n|/\*.*?\*/))*", re.DOTALL)
+
+
+class QueryRejected(SQLAlchemyError):
+    """
+    Raised instead of running a statement the guard considers too expensive.
+    It is an SQLAlchemyError, so the agent receives the message as a tool error and can retry.
+    """
+
+
+def guard_settings():
+    return {
+        "statement_timeout_ms": int(get_secret("sql_guard", "statement_timeout_ms", STATEMENT_TIMEOUT_MS)),
+        "max_rows": int(get_secret("sql_guard", "max_rows", MAX_ROWS)),
+        "max_cost": float(get_secret("sql_guard", "max_cost", MAX_COST)),
+        "slow_query_ms": int(get_secret("sql_guard", "slow_query_ms", SLOW_QUERY_MS)),
+    }
+
+
+def _normalize(command: str) -> str:
+    command = LEADING_COMMENTS_RE.sub("", command).strip()
+    return command.rstrip(";").strip()
+
+
+def _is_plain_read(command: str) -> bool:
+    # Single SELECT/WITH statement with no data-modifying CTEs: safe to wrap in a LIMIT
+    return bool(READ_QUERY_RE.match(command)) and ";" not in command and not WRITE_KEYWORD_RE.search(command)
+
+
+class GuardedSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase that puts cost limits on every statement the agent runs:
+
+    - statement timeout (Postgres `statement_timeout`; SQLite progress-handler interrupt)
+    - row cap: read queries are wrapped in `LIMIT max_rows + 1` and truncated to `max_rows`
+    - plan check (Postgres): reads whose EXPLAIN total cost exceeds `max_cost` are refused
+    - slow-query log: statements over `slow_query_ms` go to the "attendance.sql_guard" logger
+      and to recent_slow_queries()
+    """
+
+    def __init__(self, *args, statement_timeout_ms: int = STATEMENT_TIMEOUT_MS, max_rows: int = MAX_ROWS,
+                 max_cost: float = MAX_COST, slow_query_ms: int = SLOW_QUERY_MS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_timeout_ms = statement_timeout_ms
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+        self.slow_query_ms = slow_query_ms
+        self._state = threading.local()
+
+    # Timeouts
+
+    def _apply_timeout(self, connection):
+        if not self.statement_timeout_ms:
+            return None
+        if self.dialect == "postgresql":
+            # LOCAL: only for this transaction, so pooled connections come back clean
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}")
+            return None
+        if self.dialect == "sqlite":
+            raw = connection.connection.driver_connection
+            deadline = time.perf_counter() + self.statement_timeout_ms / 1000
+            # A non-zero return aborts the running statement with "interrupted"
+            raw.set_progress_handler(lambda: int(time.perf_counter() > deadline), 1000)
+            return lambda: raw.set_progress_handler(None, 0)
+        return None
+
+    # Plan check
+
+    def _plan_cost(self, connection, command: str, parameters: dict):
+        if self.dialect != "postgresql":
+            return None
+        plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {command}"), parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]["Total Cost"]
+
+    # Execution
+
+    def _execute(self, command, fetch="all", *, parameters=None, execution_options=None):
+        if not isinstance(command, str):
+            return super()._execute(command, fetch, parameters=parameters, execution_options=execution_options)
+
+        parameters = parameters or {}
+        command = _normalize(command)
+        limited = _is_plain_read(command) and self.max_rows and fetch != "cursor"
+        statement = f"SELECT * FROM ({command}) AS guarded_query LIMIT {int(self.max_rows) + 1}" if limited else command
+
+        self._state.truncated = False
+        started = time.perf_counter()
+        with self._engine.begin() as connection:
+            restore = self._apply_timeout(connection)
+            try:
+                if limited and self.max_cost:
+                    cost = self._plan_cost(connection, statement, parameters)
+                    if cost is not None and cost > self.max_cost:
+                        self._log_slow(command, 0.0, rejected_cost=cost)
+                        raise QueryRejected(
+                            f"Query refused: estimated cost {cost:,.0f} exceeds the limit of {self.max_cost:,.0f}. "
+                            "Filter by date, section or student, or aggregate (COUNT/GROUP BY) instead of "
+                            "selecting raw attendance rows."
+                        )
+
+                cursor = connection.execute(text(statement), parameters, execution_options=execution_options or {})
+                if fetch == "cursor":
+                    return cursor
+                if not cursor.returns_rows:
+                    rows = []
+                elif fetch == "one":
+                    first = cursor.fetchone()
+                    rows = [] if first is None else [first._asdict()]
+                else:
+                    rows = [row._asdict() for row in cursor.fetchall()]
+            finally:
+                if restore:
+                    restore()
+                self._log_slow(command, time.perf_counter() - started)
+
+        if limited and len(rows) > self.max_rows:
+            rows = rows[:self.max_rows]
+            self._state.truncated = True
+        return rows
+
+    def fetch(self, command: str, parameters: dict = None):
+        """
+        Runs a parameterized read under the same limits as the agent's queries.
+        Returns (rows as dicts, truncated): truncated when more than max_rows matched.
+        """
+        rows = self._execute(command, parameters=parameters)
+        return rows, getattr(self._state, "truncated", False)
+
+    def run(self, command, fetch="all", include_columns=False, **kwargs):
+        result = super().run(command, fetch, include_columns, **kwargs)
+        if getattr(self._state, "truncated", False) and isinstance(result, str):
+            # Tell the model, so it doesn't present a partial list as complete
+            result += (f"\n(Only the first {self.max_rows} rows are shown. "
+                       "Use COUNT or a narrower filter for the full picture.)")
+        return result
+
+    # Slow-query log
+
+    def _log_slow(self, command, elapsed, rejected_cost=None):
+        if rejected_cost is None and elapsed * 1000 < self.slow_query_ms:
+            return
+        entry = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ms": round(elapsed * 1000, 1),
+            "rejected_cost": rejected_cost,
+            "sql": command,
+        }
+        with _slow_lock:
+            _slow_queries.append(entry)
+        if rejected_cost is not None:
+            logger.warning("Rejected agent query (cost %.0f): %s", rejected_cost, command)
+        else:
+            logger.warning("Slow agent query (%.0f ms): %s", elapsed * 1000, command)
+
+
+_slow_queries = deque(maxlen=50)
+_slow_lock = threading.Lock()
+
+
+def recent_slow_queries():
+    """
+    Most recent slow or rejected agent queries, newest first.
+    """
+    with _slow_lock:
+        return list(reversed(_slow_queries))
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from records import STATUSES, TREND_PERIODS
+
+# Present + OD + Late = Present for percentage purposes
+PRESENT_EQUIVALENT = ["Present", "OD", "Late"]
+
+# Grouping levels supported by attendance_summary, as display columns
+GROUP_COLUMNS = {
+    "student": ["Register No"],
+    "section": ["Section"],
+    "date": ["Date"],
+    "session": ["Session"],
+}
+
+SUMMARY_COLUMNS = ["Total Sessions", "Present", "Absent", "OD", "Late", "Attendance %"]
+
+
+def attendance_summary(df: pd.DataFrame, by="student") -> pd.DataFrame:
+    """
+    Computes total, present, absent, OD, late and percentage per group in one vectorized pass.
+
+    `df` has the View Records columns (Date, Session, Register No, Name, Section, Status).
+    `by` is "student", "section", "date", "session" or a list of those, e.g. ["date", "session"].
+    "Present" counts Present + OD + Late; "Total Sessions" counts every row.
+    """
+    levels = [by] if isinstance(by, str) else list(by)
+    keys = [column for level in levels for column in GROUP_COLUMNS[level]]
+
+    if df.empty:
+        extra = ["Name"] if "student" in levels else []
+        return pd.DataFrame(columns=keys + extra + SUMMARY_COLUMNS)
+
+    grouped = df.groupby(keys, sort=True)
+    group_ids = grouped.ngroup().to_numpy()
+    totals = grouped.size()
+
+    # Status as small integer codes (-1 for anything unexpected), then one
+    # bincount over (group, status) pairs gives every count at once.
+    codes = pd.Categorical(df["Status"], categories=STATUSES).codes
+    known = codes >= 0
+    counts = np.bincount(
+        group_ids[known] * len(STATUSES) + codes[known],
+        minlength=grouped.ngroups * len(STATUSES),
+    ).reshape(grouped.ngroups, len(STATUSES))
+    by_status = pd.DataFrame(counts, columns=STATUSES, index=totals.index)
+
+    present = by_status[PRESENT_EQUIVALENT].sum(axis=1)
+    summary = pd.DataFrame({
+        "Total Sessions": totals,
+        "Present": present,
+        "Absent": by_status["Absent"],
+        "OD": by_status["OD"],
+        "Late": by_status["Late"],
+        "Attendance %": (present / totals * 100).round(2),
+    })
+
+    if "student" in levels:
+        summary.insert(0, "Name", grouped["Name"].first())
+
+    return summary.reset_index()
+
+
+ROLLUP_STATUS_COLUMNS = {"present": "Present", "absent": "Absent", "od": "OD", "late": "Late"}
+
+
+def rollup_trends(rows, period="day", session=None) -> pd.DataFrame:
+    """
+    Turns attendance_daily_rollup rows (records.fetch_daily_rollup) into one
+    row per (period start, section) with the attendance_summary columns.
+
+    `period` is "day", "week" (starting Monday) or "month"; `session` keeps
+    only "Morning" or "Afternoon" rows. Work is O(rollup rows), i.e.
+    days x sections, however many attendance rows they stand for.
+    """
+    df = pd.DataFrame(rows, columns=["section", "date", "session", *ROLLUP_STATUS_COLUMNS])
+    if session:
+        df = df[df["session"] == session]
+    if df.empty:
+        return pd.DataFrame(columns=["Date", "Section"] + SUMMARY_COLUMNS)
+
+    df = df.rename(columns={"section": "Section", **ROLLUP_STATUS_COLUMNS})
+    dates = pd.to_datetime(df["date"])
+    if period == "day":
+        df["Date"] = dates
+    else:
+        df["Date"] = dates.dt.to_period(TREND_PERIODS[period]).dt.start_time
+
+    by_status = df.groupby(["Date", "Section"], sort=True)[STATUSES].sum()
+    totals = by_status.sum(axis=1)
+    present = by_status[PRESENT_EQUIVALENT].sum(axis=1)
+    summary = pd.DataFrame({
+        "Total Sessions": totals,
+        "Present": present,
+        "Absent": by_status["Absent"],
+        "OD": by_status["OD"],
+        "Late": by_status["Late"],
+        # Rows emptied by deletes stay in the rollup with all-zero counts
+        "Attendance %": (present / totals.where(totals > 0) * 100).round(2),
+    })
+    return summary[totals > 0].reset_index()
@@ -0,0 +1,34 @@
+import io
+from datetime import date, timedelta
+
+import pyarrow.csv as pa_csv
+
+from database import FakeSupabase
+from export import export_records
+
+
+def fake_records(days: int, students: int = 3):
+    student_rows = [
+        {"id": f"s{i}", "register_number": str(i), "full_name": f"Student {i}", "section": "A"} for i in range(students)
+    ]
+    attendance = [
+        {"date": (date(2026, 1, 1) + timedelta(days=d)).isoformat(), "session": "Morning", "status": "Present", "student_id": s["id"]}
+        for d in range(days)
+        for s in student_rows
+    ]
+    return FakeSupabase({"students": student_rows, "attendance": attendance})
+
+
+def exported_dates(output):
+    return pa_csv.read_csv(io.BytesIO(output.read())).column("Date").to_pylist()
+
+
+def test_export_stops_at_max_rows_newest_first():
+    dates = exported_dates(export_records(fake_records(10), {}, "csv", page_size=4, max_rows=7))
+    assert len(dates) == 7
+    assert dates[0] == date(2026, 1, 10)
+    assert dates == sorted(dates, reverse=True)
+
+
+def test_export_under_the_cap_is_complete():
+    assert len(exported_dates(export_records(fake_records(10), {}, "csv", page_size=4, max_rows=1000))) == 30
@@ -0,0 +1,36 @@
+from ingest import split_export
+
+
+def test_plain_paste_keeps_the_section_line_with_its_date():
+    text = "\n".join([
+        "AD-A",
+        "30 Jan 2026 Morning",
+        "Absentees: 1, 2",
+        "",
+        "AD-B",
+        "31 Jan 2026 Afternoon",
+        "Absentees: 7",
+    ])
+    assert split_export(text) == [
+        "AD-A\n30 Jan 2026 Morning\nAbsentees: 1, 2\n",
+        "AD-B\n31 Jan 2026 Afternoon\nAbsentees: 7",
+    ]
+
+
+def test_plain_paste_without_section_lines_splits_on_dates():
+    text = "30 Jan 2026 Morning AD-A\nAbsent: 3\n31 Jan 2026 Morning AD-B\nOD: 4"
+    assert split_export(text) == ["30 Jan 2026 Morning AD-A\nAbsent: 3", "31 Jan 2026 Morning AD-B\nOD: 4"]
+
+
+def test_export_headers_take_precedence():
+    text = "\n".join([
+        "30/01/2026, 09:15 - Advisor: AD-A 30 Jan 2026 Morning",
+        "Absentees: 1",
+        "30/01/2026, 09:20 - Advisor: AD-B",
+        "30 Jan 2026 Morning",
+        "Absentees: 2",
+    ])
+    assert split_export(text) == [
+        "AD-A 30 Jan 2026 Morning\nAbsentees: 1",
+        "AD-B\n30 Jan 2026 Morning\nAbsentees: 2",
+    ]
@@ -0,0 +1,48 @@
+import os
+
+from ocr import OcrCache
+
+
+def age(cache, key, seconds_ago):
+    # Files written in the same instant share an mtime; spread them out explicitly
+    mtime = os.path.getmtime(cache._path(key)) - seconds_ago
+    os.utime(cache._path(key), (mtime, mtime))
+
+
+def disk_keys(directory):
+    return sorted(name[:-len(".txt")] for name in os.listdir(directory) if name.endswith(".txt"))
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = OcrCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+
+def test_disk_tier_keeps_at_most_max_disk_entries(tmp_path):
+    cache = OcrCache(directory=str(tmp_path), max_disk_entries=3)
+    for i, key in enumerate("abc"):
+        cache.put(key, key.upper())
+        age(cache, key, 100 - i)
+
+    cache.put("d", "D")
+
+    assert disk_keys(tmp_path) == ["b", "c", "d"]
+    assert cache.stats()["disk_evictions"] == 1
+
+
+def test_disk_hits_count_as_recent_use(tmp_path):
+    for i, key in enumerate("abc"):
+        OcrCache(directory=str(tmp_path)).put(key, key.upper())
+        age(OcrCache(directory=str(tmp_path)), key, 100 - i)
+
+    # A new process reads "a" from disk, so "b" is now the least recently used
+    cache = OcrCache(directory=str(tmp_path), max_disk_entries=3)
+    assert cache.get("a") == "A"
+    cache.put("d", "D")
+
+    assert disk_keys(tmp_path) == ["a", "c", "d"]
@@ -0,0 +1,104 @@
+import re
+import time
+
+import pytest
+
+import ocr
+from benchmarks.ocr_stub_server import start_stub_server
+
+
+def echo_filename(body: bytes) -> str:
+    # The stub answers with the uploaded file's name, so results can be matched to images
+    return re.search(rb'filename="([^"]+)"', body).group(1).decode()
+
+
+@pytest.fixture(autouse=True)
+def isolated_ocr(monkeypatch):
+    """
+    A fresh in-memory cache, no preprocessing and fast retries for every test.
+    """
+    monkeypatch.setattr(ocr, "_cache", ocr.OcrCache())
+    monkeypatch.setattr(ocr, "OCR_BACKOFF", 0.01)
+    monkeypatch.setenv("OCR_SPACE_PREPROCESS", "false")
+
+
+def stub(monkeypatch, **options):
+    server, url = start_stub_server(**{"delay": 0.0, "text": echo_filename, **options})
+    monkeypatch.setenv("OCR_SPACE_URL", url)
+    return server
+
+
+def images(count: int, size: int = 16):
+    return [(bytes([i]) * size, f"img{i}.png", "image/png") for i in range(count)]
+
+
+def test_results_come_back_in_input_order(monkeypatch):
+    # Bigger uploads take longer, so the first image finishes last
+    server = stub(monkeypatch, upload_bps=200_000)
+    try:
+        batch = [(bytes([i]) * (40_000 - 10_000 * i), f"img{i}.png", "image/png") for i in range(4)]
+        assert ocr.extract_many(batch, "key") == ["img0.png", "img1.png", "img2.png", "img3.png"]
+    finally:
+        server.shutdown()
+
+
+def test_images_are_processed_concurrently(monkeypatch):
+    server = stub(monkeypatch, delay=0.3)
+    try:
+        started = time.perf_counter()
+        texts = ocr.extract_many(images(4), "key", max_workers=4)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+    assert texts == [f"img{i}.png" for i in range(4)]
+    assert elapsed < 4 * 0.3  # sequential would take at least 1.2 s
+
+
+def test_5xx_responses_are_retried(monkeypatch):
+    server = stub(monkeypatch, fail_first=2)
+    try:
+        assert ocr.extract_many(images(1), "key") == ["img0.png"]
+        assert server.requests == 3
+    finally:
+        server.shutdown()
+
+
+def test_gives_up_after_ocr_attempts_and_does_not_cache_the_failure(monkeypatch):
+    server = stub(monkeypatch, fail_first=ocr.OCR_ATTEMPTS)
+    try:
+        [failed] = ocr.extract_many(images(1), "key")
+        assert failed.startswith("OCR Request Failed: HTTP 503")
+        assert server.requests == ocr.OCR_ATTEMPTS
+
+        # Not cached: the next try reaches the API again and succeeds
+        assert ocr.extract_many(images(1), "key") == ["img0.png"]
+        assert server.requests == ocr.OCR_ATTEMPTS + 1
+    finally:
+        server.shutdown()
+
+
+def test_resubmitted_images_are_answered_from_the_cache(monkeypatch):
+    server = stub(monkeypatch)
+    try:
+        first = ocr.extract_many(images(3), "key")
+        assert server.requests == 3
+
+        again = ocr.extract_many(images(3) + images(4)[3:], "key")
+        assert again == first + ["img3.png"]
+        assert server.requests == 4  # only the new image was sent
+        assert ocr.get_ocr_cache().stats()["hits"] == 3
+    finally:
+        server.shutdown()
+
+
+def test_disk_cache_survives_a_new_cache_instance(monkeypatch, tmp_path):
+    monkeypatch.setattr(ocr, "_cache", ocr.OcrCache(directory=str(tmp_path)))
+    server = stub(monkeypatch)
+    try:
+        ocr.extract_many(images(2), "key")
+        monkeypatch.setattr(ocr, "_cache", ocr.OcrCache(directory=str(tmp_path)))
+        assert ocr.extract_many(images(2), "key") == ["img0.png", "img1.png"]
+        assert server.requests == 2
+        assert ocr.get_ocr_cache().stats()["disk_hits"] == 2
+    finally:
+        server.shutdown()
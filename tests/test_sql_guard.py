@@ -0,0 +1,102 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+from sql_guard import GuardedSQLDatabase, QueryRejected, recent_slow_queries
+
+ROWS = 50
+
+# Counts to a billion: far longer than any timeout below
+SLOW_QUERY = """
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1000000000)
+    SELECT COUNT(*) FROM n
+"""
+
+
+@pytest.fixture
+def engine():
+    # One shared in-memory database for every connection of the pool
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE attendance (id INTEGER PRIMARY KEY, status TEXT NOT NULL)")
+        conn.execute(
+            text("INSERT INTO attendance (status) VALUES (:status)"),
+            [{"status": "Absent" if i % 5 == 0 else "Present"} for i in range(ROWS)],
+        )
+    return engine
+
+
+def guarded(engine, **limits):
+    return GuardedSQLDatabase(engine, **{"statement_timeout_ms": 2000, "max_rows": 10, "slow_query_ms": 60000, **limits})
+
+
+def test_select_is_capped_at_max_rows(engine):
+    rows, truncated = guarded(engine).fetch("SELECT id FROM attendance ORDER BY id")
+    assert [row["id"] for row in rows] == list(range(1, 11))
+    assert truncated
+
+
+def test_select_under_the_cap_is_complete(engine):
+    rows, truncated = guarded(engine).fetch("SELECT id FROM attendance WHERE status = :status", {"status": "Absent"})
+    assert len(rows) == ROWS // 5
+    assert not truncated
+
+
+def test_run_tells_the_agent_when_rows_were_cut(engine):
+    result = guarded(engine).run("SELECT id FROM attendance;")
+    assert "Only the first 10 rows are shown" in result
+
+
+def test_leading_comments_and_cte_reads_are_capped(engine):
+    rows, truncated = guarded(engine).fetch("-- all of them\nWITH a AS (SELECT id FROM attendance) SELECT id FROM a")
+    assert len(rows) == 10
+    assert truncated
+
+
+def test_writes_are_not_wrapped_in_a_limit(engine):
+    db = guarded(engine)
+    db.run("UPDATE attendance SET status = 'Late' WHERE id <= 20")
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM attendance WHERE status = 'Late'").scalar() == 20
+
+
+def test_statement_timeout_interrupts_slow_queries(engine):
+    db = guarded(engine, statement_timeout_ms=100)
+    with pytest.raises(OperationalError, match="interrupted"):
+        db.run(SLOW_QUERY)
+    # The progress handler is removed afterwards: the connection is usable again
+    assert db.fetch("SELECT COUNT(*) AS n FROM attendance")[0] == [{"n": ROWS}]
+
+
+def test_slow_queries_are_logged(engine):
+    db = guarded(engine, slow_query_ms=0)
+    db.run("SELECT COUNT(*) FROM attendance")
+    assert recent_slow_queries()[0]["sql"] == "SELECT COUNT(*) FROM attendance"
+
+
+def test_expensive_plans_are_rejected(engine, monkeypatch):
+    # SQLite has no plan costs; stand in for Postgres' EXPLAIN
+    db = guarded(engine, max_cost=1000)
+    monkeypatch.setattr(db, "_plan_cost", lambda connection, command, parameters: 5000.0)
+    with pytest.raises(QueryRejected, match="estimated cost 5,000 exceeds the limit of 1,000"):
+        db.fetch("SELECT * FROM attendance")
+    entry = recent_slow_queries()[0]
+    assert entry["rejected_cost"] == 5000.0
+
+
+@pytest.mark.skipif(not os.environ.get("DATABASE_URL"), reason="needs a Postgres DATABASE_URL")
+def test_postgres_explain_rejects_expensive_queries_and_times_out():
+    engine = create_engine(os.environ["DATABASE_URL"])
+    db = guarded(engine, max_cost=1000, statement_timeout_ms=100)
+
+    with pytest.raises(QueryRejected):
+        # Sorting all billion rows: the LIMIT the guard adds doesn't make this cheap
+        db.fetch("SELECT a.i * b.j AS k FROM generate_series(1, 1000000) a(i) CROSS JOIN generate_series(1, 1000) b(j) ORDER BY k")
+    with pytest.raises(OperationalError, match="statement timeout"):
+        db.run("SELECT pg_sleep(2)")
+    # SET LOCAL: pooled connections don't keep the timeout
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SHOW statement_timeout").scalar() == "0"
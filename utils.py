@@ -1,15 +1,23 @@
+from typing import TYPE_CHECKING
+
 import streamlit as st
-from supabase import create_client, Client
-import requests
-import re
-from datetime import datetime
+from database import get_client, mark_unhealthy
+from attendance_parser import parse_attendance_text, parse_many
+from roster import get_roster, invalidate_roster
+from ocr import extract_text, extract_many, prep_settings
+from metrics import span, timed
+from warmup import start_warmup
+
+if TYPE_CHECKING:
+    from supabase import Client  # loaded by database.get_client on first use
 
 # Initialize Supabase
-def init_supabase() -> Client:
+def init_supabase() -> "Client":
+    """
+    Returns the shared, pooled Supabase client (see database.get_client).
+    """
     try:
-        url = st.secrets["supabase"]["url"]
-        key = st.secrets["supabase"]["key"]
-        return create_client(url, key)
+        return get_client()
     except Exception as e:
         st.error(f"Supabase connection failed: {e}")
         return None
@@ -18,8 +26,9 @@ def login_user(email, password):
     """
     Authenticates user with Supabase Auth.
     """
-    supabase = init_supabase()
     try:
+        # Dedicated pooled client, so the signed-in session never touches the data client
+        supabase = get_client("auth")
         response = supabase.auth.sign_in_with_password({"email": email, "password": password})
         return response
     except Exception as e:
@@ -29,7 +38,10 @@ def require_login():
     """
     Gatekeeper function. Call this at the start of every page.
     If not logged in, shows login form and stops execution.
+    The first call in a server process also starts the background warm-up.
     """
+    start_warmup()
+
     if "authenticated" not in st.session_state:
         st.session_state["authenticated"] = False
 
@@ -70,198 +82,175 @@ def require_login():
 def extract_text_from_image(image_file) -> str:
     """
     Uploads image to OCR Space API and returns extracted text.
+    Results are cached by image content (see ocr.py), so retries of the same screenshot are instant.
     """
     if "ocr_space" not in st.secrets:
         return "Error: OCR Space API Key missing in secrets."
     
     api_key = st.secrets["ocr_space"]["api_key"]
-    
-    try:
-        # OCR Space API endpoint
-        url = "https://api.ocr.space/parse/image"
-        
-        payload = {
-            'apikey': api_key,
-            'language': 'eng',
-            'isOverlayRequired': False,
-            'detectOrientation': True,
-            'scale': True,
-            'OCREngine': 2 
-        }
-        
-        # Determine file type (Streamlit returns BytesIO-like object)
-        files = {
-            'file': (image_file.name, image_file.getvalue(), image_file.type)
+
+    # Determine file type (Streamlit returns BytesIO-like object)
+    return extract_text(image_file.getvalue(), image_file.name, image_file.type, api_key, prep=prep_settings())
+
+def extract_texts_from_images(image_files) -> list:
+    """
+    OCRs several uploaded images concurrently. Returns texts in upload order.
+    """
+    if "ocr_space" not in st.secrets:
+        return ["Error: OCR Space API Key missing in secrets."] * len(image_files)
+
+    api_key = st.secrets["ocr_space"]["api_key"]
+    images = [(f.getvalue(), f.name, f.type) for f in image_files]
+    return extract_many(images, api_key)
+
+# Rows per multi-row upsert request
+UPSERT_BATCH_SIZE = 500
+ATTENDANCE_CONFLICT_KEY = "student_id, date, session"
+
+def validate_parsed_attendance(parsed_data: dict):
+    """
+    Returns an error message if parsed data can't be saved, else None.
+    """
+    if "error" in parsed_data:
+        return parsed_data["error"]
+
+    if not parsed_data.get("date") or not parsed_data.get("session"):
+        return "Could not extract Date or Session from text. Please ensure format is 'DD MMM YYYY' and 'Morning/Afternoon'."
+
+    if not parsed_data.get("section"):
+        return "Could not extract Section (A or B) from text. keys like 'AD-A' or 'AD-B' are expected."
+
+    return None
+
+def build_attendance_rows(parsed_data: dict, roster: dict):
+    """
+    Builds one attendance row per student in `roster` ({register_number: student_id}).
+    Students not listed in parsed_data default to 'Present'.
+    """
+    # Map parsed records for quick lookup
+    parsed_status_map = {r['register_number']: r['status'] for r in parsed_data.get("records", [])}
+
+    return [
+        {
+            "student_id": student_id,
+            "date": parsed_data["date"],
+            "session": parsed_data["session"],
+            # Determine status: Default to 'Present' if not in parsed list
+            "status": parsed_status_map.get(reg_no, "Present")
         }
-        
-        response = requests.post(url, files=files, data=payload)
-        result = response.json()
-        
-        if result.get("IsErroredOnProcessing"):
-            return f"OCR Error: {result.get('ErrorMessage')}"
-            
-        parsed_results = result.get("ParsedResults")
-        if parsed_results:
-            return parsed_results[0].get("ParsedText", "")
-        else:
-            return "No text found in image."
-            
-    except Exception as e:
-        return f"OCR Request Failed: {str(e)}"
+        for reg_no, student_id in roster.items()
+    ]
 
-def parse_attendance_text(text: str):
+def upsert_attendance_rows(supabase: "Client", rows: list, batch_size: int = UPSERT_BATCH_SIZE, progress=None):
     """
-    Parses attendance text using REGEX (Rule-based) instead of AI.
+    Writes rows through chunked multi-row upserts. Returns the number of rows written.
+    Rows sharing (student_id, date, session) are collapsed first (last one wins),
+    since Postgres rejects an upsert that touches the same row twice.
+    Calls progress(rows_done, rows_total) after each chunk. Raises on failure.
     """
-    
-    # 1. Normalize text
-    # Replace common OCR errors or spacing issues could happen, but let's stick to basic regex first.
-    lines = text.split('\n')
-    
-    data = {
-        "date": None,
-        "session": None,
-        "section": None,
-        "records": []
-    }
-    
-    # REGEX PATTERNS
-    
-    # Date: Matches DD Jan YYYY or DD-MM-YYYY
-    # Example: 31 Jan 2026
-    date_pattern = r"(\d{1,2})[\s\.\-\/]+([A-Za-z]{3,9})[\s\.\-\/]+(\d{4})" 
-    
-    # Session: Morning or Afternoon
-    session_pattern = r"(Morning|Afternoon)"
-    
-    # Section: AD-A, AD-B, Section A, Section B
-    # We look for "-A" or "-B" or " A" / " B" near keywords like AD or Section
-    section_pattern_broad = r"(AD|Section)[\s-]*([AB])"
-    
-    # Categories Keywords
-    cat_absent = r"(Absentees|Absent)"
-    cat_od = r"(OD|On Duty)"
-    cat_late = r"(Late|Late comers)"
-    
-    current_category = "Absent" # Default assumption if numbers appear early? No, usually sections have headers.
-    
-    # SEARCH FOR METADATA GLOBALLY FIRST
-    
-    # Date
-    date_match = re.search(date_pattern, text, re.IGNORECASE)
-    if date_match:
+    unique_rows = list({(r["student_id"], r["date"], r["session"]): r for r in rows}.values())
+
+    written = 0
+    for start in range(0, len(unique_rows), batch_size):
+        chunk = unique_rows[start:start + batch_size]
         try:
-            day, month_str, year = date_match.groups()
-            # Parse date string to object then back to ISO YYYY-MM-DD
-            # Handle standard 3-letter months
-            date_obj = datetime.strptime(f"{day}-{month_str[:3]}-{year}", "%d-%b-%Y")
-            data["date"] = date_obj.strftime("%Y-%m-%d")
-        except:
-            # Fallback or try other formats if complex
-            pass
-            
-    # Session
-    session_match = re.search(session_pattern, text, re.IGNORECASE)
-    if session_match:
-        # Standardize case
-        sess = session_match.group(1).lower()
-        data["session"] = "Morning" if "morning" in sess else "Afternoon"
-        
-    # Section
-    section_match = re.search(section_pattern_broad, text, re.IGNORECASE)
-    if section_match:
-        data["section"] = section_match.group(2).upper()
-        
-    # PARSE RECORDS LINE BY LINE
-    # We detect when we enter a "Block" (Absent, OD, Late)
-    # Then we look for register numbers "69.Name" -> 69
-    
-    active_status = None # None means we haven't hit a header yet
-    
-    for line in lines:
-        line_clean = line.strip()
-        if not line_clean:
-            continue
-            
-        # Check for Headers
-        if re.search(cat_absent, line_clean, re.IGNORECASE):
-            active_status = "Absent"
-            continue
-        elif re.search(cat_od, line_clean, re.IGNORECASE):
-            active_status = "OD"
-            continue
-        elif re.search(cat_late, line_clean, re.IGNORECASE):
-            active_status = "Late"
-            continue
-        elif "Present" in line_clean or "Total" in line_clean:
-            active_status = None # Reset if we hit summary lines
-            continue
-            
-        # extract_students
-        if active_status:
-            # Look for "digits dot" pattern e.g. "59." or just "59" at start of line
-            # Strict mode: Number followed by dot or space and letters
-            # Regex: Start of line, digits, dot or space
-            student_match = re.match(r"^(\d+)", line_clean)
-            if student_match:
-                reg_no = student_match.group(1)
-                data["records"].append({
-                    "register_number": reg_no,
-                    "status": active_status
-                })
+            with span("db.attendance_upsert"):
+                supabase.table("attendance").upsert(chunk, on_conflict=ATTENDANCE_CONFLICT_KEY).execute()
+        except Exception:
+            mark_unhealthy(supabase)
+            raise
+        written += len(chunk)
+        if progress:
+            progress(written, len(unique_rows))
+    return written
+
+def diff_attendance_rows(supabase: "Client", rows: list, section: str):
+    """
+    Compares rows for one (section, date, session) with what is already stored.
+    Returns (inserts, updates, unchanged_count) so only changed rows need writing.
+    """
+    if not rows:
+        return [], [], 0
+
+    with span("db.attendance_diff"):
+        response = (
+            supabase.table("attendance")
+            .select("student_id, status, students!inner(section)")
+            .eq("date", rows[0]["date"])
+            .eq("session", rows[0]["session"])
+            .eq("students.section", section)
+            .execute()
+        )
+    existing = {r["student_id"]: r["status"] for r in response.data or []}
 
-    return data
+    inserts, updates = [], []
+    for row in rows:
+        stored_status = existing.get(row["student_id"])
+        if stored_status is None:
+            inserts.append(row)
+        elif stored_status != row["status"]:
+            updates.append(row)
+    return inserts, updates, len(rows) - len(inserts) - len(updates)
 
-def mark_attendance(supabase: Client, parsed_data: dict):
+@timed("save.mark_attendance")
+def mark_attendance(supabase: "Client", parsed_data: dict, delta: bool = True):
     """
     Updates the database based on parsed data.
     Assumes all students for the section are 'Present' unless listed otherwise in parsed_data.
+
+    With `delta` (the default), rows already stored with the same status are skipped,
+    so re-uploads and corrections only write what changed. Without it every row is
+    written and nothing is read first, so `inserted`, `updated` and `unchanged` are
+    None: which rows were new isn't known.
     """
-    if "error" in parsed_data:
-        return {"error": parsed_data["error"]}
-        
-    date_str = parsed_data.get("date")
-    session = parsed_data.get("session")
-    section = parsed_data.get("section")
-    records = parsed_data.get("records", [])
+    error = validate_parsed_attendance(parsed_data)
+    if error:
+        return {"error": error}
 
-    if not date_str or not session:
-        return {"error": "Could not extract Date or Session from text. Please ensure format is 'DD MMM YYYY' and 'Morning/Afternoon'."}
-    
-    if not section:
-        return {"error": "Could not extract Section (A or B) from text. keys like 'AD-A' or 'AD-B' are expected."}
+    date_str = parsed_data["date"]
+    session = parsed_data["session"]
+    section = parsed_data["section"]
 
-    # 1. Fetch all students in this section to get their IDs
-    response_students = supabase.table("students").select("id, register_number").eq("section", section).execute()
-    
-    if not response_students.data:
+    # 1. Look up student IDs for this section (cached, see roster.py)
+    try:
+        all_students = get_roster(supabase, section)
+    except Exception as e:
+        mark_unhealthy(supabase)
+        return {"error": str(e)}
+
+    if not all_students:
         return {"error": f"No student records found for Section {section}. Please populate 'students' table first."}
     
-    all_students = {s['register_number']: s['id'] for s in response_students.data}
-    
     # 2. Prepare attendance records to upsert
-    attendance_upserts = []
-    
-    # Map parsed records for quick lookup
-    parsed_status_map = {r['register_number']: r['status'] for r in records}
+    attendance_upserts = build_attendance_rows(parsed_data, all_students)
     
-    for reg_no, student_id in all_students.items():
-        # Determine status: Default to 'Present' if not in parsed list
-        status = parsed_status_map.get(reg_no, "Present")
-        
-        attendance_upserts.append({
-            "student_id": student_id,
-            "date": date_str,
-            "session": session,
-            "status": status
-        })
-    
-    # 3. Perform upsert
-    if attendance_upserts:
-        try:
-            result = supabase.table("attendance").upsert(attendance_upserts, on_conflict="student_id, date, session").execute()
-            return {"success": True, "count": len(attendance_upserts), "date": date_str, "session": session, "section": section}
-        except Exception as e:
-            return {"error": str(e)}
-    else:
+    if not attendance_upserts:
         return {"error": "No records generated."}
+
+    try:
+        # 3. Skip rows that are already stored as-is
+        if delta:
+            inserts, updates, unchanged = diff_attendance_rows(supabase, attendance_upserts, section)
+            changed = inserts + updates
+        else:
+            inserts = updates = unchanged = None
+            changed = attendance_upserts
+
+        # 4. Perform upsert
+        count = upsert_attendance_rows(supabase, changed)
+    except Exception as e:
+        mark_unhealthy(supabase)
+        # The cached roster may hold a deleted student; refetch it next time
+        invalidate_roster(section)
+        return {"error": str(e)}
+
+    return {
+        "success": True,
+        "count": count,
+        "inserted": None if inserts is None else len(inserts),
+        "updated": None if updates is None else len(updates),
+        "unchanged": unchanged,
+        "date": date_str,
+        "session": session,
+        "section": section
+    }
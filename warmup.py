@@ -0,0 +1,106 @@
+import importlib
+import threading
+import time
+
+from config import get_secret
+from metrics import observe
+
+# Background warm-up, started once per server process by the first page run
+# (utils.require_login). While the first user is still on the login form it
+# imports the heavy libraries pages load lazily, connects the Supabase client,
+# fills the roster cache and builds the assistant's agent, so neither the first
+# page visit nor the first question pays for them. Disable with
+# [warmup] enabled = false.
+
+# Modules the pages import on first use, heaviest first
+PRELOAD_MODULES = [
+    "langchain_community.agent_toolkits",
+    "langchain_groq",
+    "langchain_community.callbacks.streamlit",
+    "sql_guard",
+    "pandas",
+    "stats",
+    "export",
+]
+
+# Sections whose rosters are cached (the students.section CHECK in schema.sql)
+SECTIONS = ("A", "B")
+
+_lock = threading.Lock()
+_thread = None
+_status = {}  # step -> {"state": "running" | "done" | "failed" | "skipped", "seconds", "error"}
+
+
+def _step(name, fn):
+    _status[name] = {"state": "running"}
+    start = time.perf_counter()
+    try:
+        skipped = fn() is False
+    except Exception as e:
+        _status[name] = {"state": "failed", "seconds": round(time.perf_counter() - start, 3),
+                         "error": f"{type(e).__name__}: {e}"}
+        return
+    elapsed = time.perf_counter() - start
+    _status[name] = {"state": "skipped" if skipped else "done", "seconds": round(elapsed, 3)}
+    if not skipped:
+        observe("warmup.step", elapsed, step=name)
+
+
+def _preload_imports():
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+
+def _connect_supabase():
+    from database import get_client
+
+    get_client()
+
+
+def _fill_rosters():
+    from database import get_client
+    from roster import get_rosters
+
+    get_rosters(get_client(), SECTIONS)
+
+
+def _build_agent():
+    db_url = get_secret("supabase", "db_url")
+    api_key = get_secret("groq", "api_key")
+    if not db_url or not api_key:
+        return False  # assistant not configured
+
+    from chatbot import build_chatbot_agent
+
+    build_chatbot_agent(db_url, api_key)
+
+
+def _run():
+    _step("imports", _preload_imports)
+    _step("supabase", _connect_supabase)
+    _step("rosters", _fill_rosters)
+    if str(get_secret("warmup", "agent", "true")).lower() not in ("0", "false", "no"):
+        _step("agent", _build_agent)
+
+
+def start_warmup() -> bool:
+    """
+    Starts the warm-up thread unless it already ran in this process or
+    [warmup] enabled = false. Returns True if this call started it.
+    """
+    global _thread
+    if str(get_secret("warmup", "enabled", "true")).lower() in ("0", "false", "no"):
+        return False
+    with _lock:
+        if _thread is not None:
+            return False
+        _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+        _thread.start()
+        return True
+
+
+def warmup_status() -> dict:
+    """
+    {step: {"state", "seconds", "error"}} for the steps started so far.
+    """
+    return {name: dict(step) for name, step in _status.items()}